@@ -2,7 +2,6 @@ import sys
 import math
 import os
 import numpy as np
-import pandas as pd
 import time
 import random
 import tempfile
@@ -12,8 +11,16 @@ from PIL import Image, ImageQt
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
 from openpyxl.drawing.image import Image as XLImage
-from parkinsons_detector import ParkinsonsDetector
-from drawing_metrics_logger import DrawingMetricsLogger
+import model_registry
+import persistence_worker
+import results_journal
+from drawing_metrics_logger import (CHAINED_KINEMATICS, INDEXED_KINEMATICS, DrawingMetricsLogger,
+                                    StreamingMetricsAccumulator, model_features)
+from analysis_worker import Stopwatch, run_analysis
+from frame_scheduler import FrameScheduler
+from image_buffers import new_rgb32_image, qimage_alpha
+from paint_regions import blit_exposed, segment_rect
+from stroke_buffer import StrokeBuffer
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import*
@@ -370,9 +377,8 @@ class Level1_Screen(QWidget):
         self.paper_time = 0
         self.last_pen_up_time = None
 
-        self.pressure_readings = []
-        self.pen_positions = []
-        self.pen_timestamps = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.pendown_count = 0
 
         all_colors = [
@@ -394,112 +400,18 @@ class Level1_Screen(QWidget):
         self._draw_dots_and_guide_lines()
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -759,9 +671,10 @@ class Level1_Screen(QWidget):
                 drawing_pixmap=final_drawing,
                 player_name=self.player_name,
                 level="Level 1",
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
+                pen_positions=self.stroke_buffer.positions,
+                accumulator=self.metrics_accumulator,
+                pen_timestamps=self.stroke_buffer.timestamps,
+                pressure_readings=self.stroke_buffer.pressures,
                 start_time=self.start_time,
                 end_time=self.end_time,
                 air_time=self.air_time,
@@ -863,10 +776,12 @@ class Level1_Screen(QWidget):
         self.open_main_screen()
 
     def paintEvent(self, event):
+        # Pen moves only invalidate the segment they drew, so only that part is blitted
+        exposed = event.rect()
         painter = QPainter(self)
-        painter.fillRect(self.rect(), Qt.white)
-        painter.drawPixmap(0, 0, self.reference_layer)
-        painter.drawPixmap(0, 0, self.drawing)
+        painter.fillRect(exposed, Qt.white)
+        blit_exposed(painter, exposed, self.reference_layer)
+        blit_exposed(painter, exposed, self.drawing)
 
     def resizeEvent(self, event):
         new_drawing = QPixmap(self.size())
@@ -882,6 +797,7 @@ class Level1_Screen(QWidget):
         self._draw_dots_and_guide_lines()
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         timestamp = time.time()
         if self.start_time is None:
             self.start_time = timestamp
@@ -908,12 +824,11 @@ class Level1_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp,
+                                      max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
 
             delta_time = timestamp - self.last_time
             self.paper_time += delta_time
@@ -931,6 +846,7 @@ class Level1_Screen(QWidget):
             self.last_time = timestamp
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             if self.is_in_drawing_area(event.pos()):
                 if self.last_pen_up_time is not None:
                     self.air_time += (timestamp - self.last_pen_up_time)
@@ -950,12 +866,10 @@ class Level1_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(pressure)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, pressure)
 
             delta_time = timestamp - self.last_time
             self.paper_time += delta_time
@@ -981,7 +895,7 @@ class Level2_Screen(QWidget):
 
         self.metrics_logger = DrawingMetricsLogger(self.SAVE_FOLDER, "Level1Results.xlsx")
         self.V_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-        self.parkinsons_detector = ParkinsonsDetector(
+        self.parkinsons_detector = model_registry.get_parkinsons_detector(
             model_path=os.path.join(self.V_FOLDER, 'best_parkinsons_model.keras'),
             image_size=(128, 128)
         )
@@ -989,6 +903,8 @@ class Level2_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.alzheimers_model_loaded = False
 
         self.load_alzheimers_model()
@@ -1019,121 +935,26 @@ class Level2_Screen(QWidget):
         self.paper_time = 0
         self.last_pen_up_time = None
 
-        self.pressure_readings = []
-        self.pen_positions = []
-        self.pen_timestamps = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.pendown_count = 0
 
         self._setup_ui()
         self.draw_background()
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER=r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -1231,7 +1052,7 @@ class Level2_Screen(QWidget):
         return not btn_rect.contains(pos)
 
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
 
     def draw_background(self):
         painter = QPainter(self.background_layer)
@@ -1314,10 +1135,12 @@ class Level2_Screen(QWidget):
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
 
-        if len(self.pen_positions) > 1:
-            for i in range(1, len(self.pen_positions)):
-                x1, y1 = self.pen_positions[i - 1]
-                x2, y2 = self.pen_positions[i]
+        # QPainter.drawLine takes ints; the buffer stores float32
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
+            for i in range(1, len(positions)):
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
 
                 x1_adj = x1 - crop_left
                 x2_adj = x2 - crop_left
@@ -1331,16 +1154,16 @@ class Level2_Screen(QWidget):
         painter.end()
         return pixmap
 
-    def run_parkinsons_detection(self, image_path):
-        if not image_path or not os.path.exists(image_path):
+    def run_parkinsons_detection(self, drawing_image):
+        if drawing_image is None or drawing_image.isNull():
             self.prediction_result = {
                 'risk_level': 'Error',
-                'interpretation': 'Image file not found for analysis'
+                'interpretation': 'No drawing image available for analysis'
             }
             return False
 
         try:
-            prediction_result = self.parkinsons_detector.predict(image_path)
+            prediction_result = self.parkinsons_detector.predict_qimage(drawing_image)
 
             if prediction_result and prediction_result['prediction_successful']:
                 self.prediction_result = prediction_result
@@ -1365,17 +1188,18 @@ class Level2_Screen(QWidget):
                 self.end_time = time.time()
 
             metrics = self.metrics_logger.calculate_metrics(
-                self.pen_positions,
-                self.pen_timestamps,
-                self.pressure_readings,
+                self.stroke_buffer.positions,
+                self.stroke_buffer.timestamps,
+                self.stroke_buffer.pressures,
                 self.start_time,
                 self.end_time,
                 self.air_time,
                 self.paper_time,
-                self.pendown_count
+                self.pendown_count,
+                accumulator=self.metrics_accumulator
             )
 
-            minimal_pixmap = QPixmap(100, 100)
+            minimal_pixmap = QImage(100, 100, QImage.Format_RGB32)
             minimal_pixmap.fill(Qt.white)
 
             session_id = self.metrics_logger.get_next_session_id(self.player_name)
@@ -1396,81 +1220,88 @@ class Level2_Screen(QWidget):
             pass
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
-        alzheimers_success = self.run_alzheimers_analysis()
+        stopwatch = Stopwatch()
+        stages = [("Running Alzheimer's analysis", self.run_alzheimers_analysis)]
 
         if self.has_drawing_content():
-            self.save_image_and_log_complete_metrics()
+            drawing_image = self.create_drawing_pixmap().toImage()
+            stages.append(("Analyzing drawing",
+                           lambda: self.save_image_and_log_complete_metrics(drawing_image, stopwatch)))
         else:
-            self.save_basic_metrics()
-            self.prediction_result = {
-                'risk_level': 'No Drawing',
-                'interpretation': 'No drawing content was detected'
-            }
+            stages.append(("Saving results", self.save_no_drawing_metrics))
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def save_no_drawing_metrics(self):
+        self.save_basic_metrics()
+        self.prediction_result = {
+            'risk_level': 'No Drawing',
+            'interpretation': 'No drawing content was detected'
+        }
 
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
-    def save_image_and_log_complete_metrics(self):
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
+    def save_image_and_log_complete_metrics(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return None
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return None
 
-            pixmap = self.create_drawing_pixmap()
+            pixmap = drawing_image if drawing_image is not None else self.create_drawing_pixmap().toImage()
 
-            temp_image_filename = f"temp_{self.player_name}_Level2.png"
-            temp_image_path = os.path.join(self.SAVE_FOLDER, temp_image_filename)
+            with stopwatch.measure("Parkinson's detection"):
+                detection_success = self.run_parkinsons_detection(pixmap)
 
-            if not os.path.exists(self.SAVE_FOLDER):
-                os.makedirs(self.SAVE_FOLDER)
-
-            pixmap.save(temp_image_path)
-
-            detection_success = self.run_parkinsons_detection(temp_image_path)
-
-            metrics_result = self.metrics_logger.save_complete_session(
-                drawing_pixmap=pixmap,
-                player_name=self.player_name,
-                level="Level 2",
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
-                start_time=self.start_time,
-                end_time=self.end_time,
-                air_time=self.air_time,
-                paper_time=self.paper_time,
-                pendown_count=self.pendown_count,
-                prediction_result=self.prediction_result
-            )
-
-            self.cleanup_processed_image(temp_image_path)
+            with stopwatch.measure("Excel write"):
+                metrics_result = self.metrics_logger.save_complete_session(
+                    drawing_pixmap=pixmap,
+                    player_name=self.player_name,
+                    level="Level 2",
+                    pen_positions=self.stroke_buffer.positions,
+                    accumulator=self.metrics_accumulator,
+                    pen_timestamps=self.stroke_buffer.timestamps,
+                    pressure_readings=self.stroke_buffer.pressures,
+                    start_time=self.start_time,
+                    end_time=self.end_time,
+                    air_time=self.air_time,
+                    paper_time=self.paper_time,
+                    pendown_count=self.pendown_count,
+                    prediction_result=self.prediction_result
+                )
 
-            return temp_image_path
+            return metrics_result
 
         except Exception as e:
             self.save_basic_metrics()
             return None
 
-    def cleanup_processed_image(self, image_path):
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                pass
-
     def show_popup_with_home(self):
         popup = QDialog(self)
         popup.setWindowTitle("Analysis Complete")
@@ -1602,32 +1433,21 @@ class Level2_Screen(QWidget):
 
     def save_image_and_log(self):
         try:
-            final_drawing = QPixmap(self.drawing_layer.size())
-            final_drawing.fill(Qt.white)
-
-            painter = QPainter(final_drawing)
-            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-
             drawing_image = self.drawing_layer.toImage()
 
-            for y in range(drawing_image.height()):
-                for x in range(drawing_image.width()):
-                    pixel = drawing_image.pixel(x, y)
-                    alpha = (pixel >> 24) & 0xFF
-
-                    if alpha > 0:
-                        painter.setPen(QPen(Qt.black))
-                        painter.drawPoint(x, y)
-
-            painter.end()
+            # Black wherever the drawing layer has any ink, white elsewhere, written
+            # straight into the new image's pixels
+            final_drawing, pixels = new_rgb32_image(drawing_image.width(), drawing_image.height())
+            pixels[...] = np.where(qimage_alpha(drawing_image) > 0, np.uint32(0xFF000000), np.uint32(0xFFFFFFFF))
 
             metrics = self.metrics_logger.save_complete_session(
                 drawing_pixmap=final_drawing,
                 player_name=self.player_name,
                 level="Level 2",
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
+                pen_positions=self.stroke_buffer.positions,
+                accumulator=self.metrics_accumulator,
+                pen_timestamps=self.stroke_buffer.timestamps,
+                pressure_readings=self.stroke_buffer.pressures,
                 start_time=self.start_time,
                 end_time=self.end_time,
                 air_time=self.air_time,
@@ -1638,9 +1458,11 @@ class Level2_Screen(QWidget):
             pass
 
     def paintEvent(self, event):
+        # Pen moves only invalidate the segment they drew, so only that part is blitted
+        exposed = event.rect()
         painter = QPainter(self)
-        painter.drawPixmap(0, 0, self.background_layer)
-        painter.drawPixmap(0, 0, self.drawing_layer)
+        blit_exposed(painter, exposed, self.background_layer)
+        blit_exposed(painter, exposed, self.drawing_layer)
 
     def resizeEvent(self, event):
         new_background = QPixmap(self.size())
@@ -1656,6 +1478,7 @@ class Level2_Screen(QWidget):
         self.draw_background()
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         timestamp = time.time()
         if self.start_time is None:
             self.start_time = timestamp
@@ -1680,12 +1503,11 @@ class Level2_Screen(QWidget):
             pen = QPen(Qt.black, 25, Qt.SolidLine, Qt.RoundCap)
             painter.setPen(pen)
             painter.drawLine(self.last_point, event.pos())
+            painter.end()
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(1.0)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, 1.0)
 
             delta_time = timestamp - self.last_time
             self.paper_time += delta_time
@@ -1702,6 +1524,7 @@ class Level2_Screen(QWidget):
             self.last_time = timestamp
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             if self.is_in_drawing_area(event.pos()):
                 if self.last_pen_up_time is not None:
                     self.air_time += (timestamp - self.last_pen_up_time)
@@ -1719,12 +1542,11 @@ class Level2_Screen(QWidget):
             pen = QPen(Qt.black,50, Qt.SolidLine, Qt.RoundCap)
             painter.setPen(pen)
             painter.drawLine(self.last_point, event.pos())
+            painter.end()
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(pressure)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, pressure)
 
             delta_time = timestamp - self.last_time
             self.paper_time += delta_time
@@ -1754,7 +1576,7 @@ class Level3_Screen(QWidget):
         self.metrics_logger = DrawingMetricsLogger(self.SAVE_FOLDER, "Level1Results.xlsx")
 
         self.V_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-        self.parkinsons_detector = ParkinsonsDetector(
+        self.parkinsons_detector = model_registry.get_parkinsons_detector(
             model_path=os.path.join(self.V_FOLDER, 'best_parkinsons_model.keras'),
             image_size=(128, 128)
         )
@@ -1762,6 +1584,8 @@ class Level3_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.load_alzheimers_model()
 
         self.prediction_result = None
@@ -1776,33 +1600,27 @@ class Level3_Screen(QWidget):
         self.paper_time = 0
         self.last_pen_up_time = None
 
-        self.pressure_readings = []
-        self.pen_positions = []
-        self.pen_timestamps = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.pendown_count = 0
 
         self.cake_x, self.cake_y = 150, 310
         self.cake_width, self.cake_height = 1700, 700
         self.rotation_angle = 0
-        self.drawing_strokes = []
-        self.current_stroke = []
         self.is_drawing = False
 
+        # Retained layers: the cake, candles and guide are drawn once per rotation and size,
+        # strokes segment by segment as they arrive
+        self.static_layer = None
+        self.stroke_layer = None
+        self.layer_key = None
+        self.committed_samples = 0
+
         self.setup_ui()
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            model_folder = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(model_folder, "model14.pkl")
-            scaler_path = os.path.join(model_folder, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                self.alzheimers_model = joblib.load(model_path)
-                self.alzheimers_scaler = joblib.load(scaler_path)
-        except:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
+        model_folder = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(model_folder)
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -1821,22 +1639,46 @@ class Level3_Screen(QWidget):
             "color: black; border: none; border-radius: 30px; font-weight: bold; font-size: 50px;")
         self.next_btn.clicked.connect(self.handle_next)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), QColor(230, 240, 255))
+    def cake_transform(self):
+        transform = QTransform()
+        transform.translate(self.cake_x + self.cake_width // 2, self.cake_y + self.cake_height // 2)
+        transform.rotate(self.rotation_angle)
+        transform.translate(-self.cake_width // 2, -self.cake_height // 2)
+        return transform
+
+    def update_layers(self):
+        """Rebuild the layers if the rotation or size changed, then add the segments drawn since the last paint."""
+        key = (self.rotation_angle, self.width(), self.height())
+        if key != self.layer_key:
+            self.layer_key = key
+            self.static_layer = QPixmap(self.size())
+            self.static_layer.fill(QColor(230, 240, 255))
+            painter = QPainter(self.static_layer)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setTransform(self.cake_transform())
+            self.draw_cake_base(painter)
+            self.draw_candles(painter)
+            self.draw_sine_wave_guide(painter)
+            painter.end()
 
-        painter.save()
-        painter.translate(self.cake_x + self.cake_width // 2, self.cake_y + self.cake_height // 2)
-        painter.rotate(self.rotation_angle)
-        painter.translate(-self.cake_width // 2, -self.cake_height // 2)
+            self.stroke_layer = QPixmap(self.size())
+            self.stroke_layer.fill(Qt.transparent)
+            self.committed_samples = 0
 
-        self.draw_cake_base(painter)
-        self.draw_candles(painter)
-        self.draw_sine_wave_guide(painter)
-        self.draw_user_drawings(painter)
+        if self.committed_samples < len(self.stroke_buffer):
+            painter = QPainter(self.stroke_layer)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setTransform(self.cake_transform())
+            self.draw_user_drawings(painter, self.committed_samples)
+            painter.end()
+            self.committed_samples = len(self.stroke_buffer)
 
-        painter.restore()
+    def paintEvent(self, event):
+        self.update_layers()
+        exposed = event.rect()
+        painter = QPainter(self)
+        blit_exposed(painter, exposed, self.static_layer)
+        blit_exposed(painter, exposed, self.stroke_layer)
 
     def draw_sine_wave_guide(self, painter):
         painter.setPen(QPen(QColor(255, 255, 255, 200), 6, Qt.DashLine))
@@ -1851,13 +1693,18 @@ class Level3_Screen(QWidget):
         for i in range(len(points) - 1):
             painter.drawLine(points[i], points[i + 1])
 
-    def draw_user_drawings(self, painter):
+    def draw_user_drawings(self, painter, first_sample=0):
+        """Draw the stroke segments that end at first_sample or later."""
         painter.setPen(QPen(QColor(13, 190, 241), 30, Qt.SolidLine, Qt.RoundCap))
-        for stroke in self.drawing_strokes:
-            for i in range(len(stroke) - 1):
-                painter.drawLine(stroke[i], stroke[i + 1])
-        for i in range(len(self.current_stroke) - 1):
-            painter.drawLine(self.current_stroke[i], self.current_stroke[i + 1])
+        start = max(first_sample, 1)
+        positions = self.stroke_buffer.positions[start - 1:].astype(int).tolist()
+        stroke_ids = self.stroke_buffer.stroke_ids[start - 1:].tolist()
+        for i in range(1, len(positions)):
+            if stroke_ids[i] == stroke_ids[i - 1]:
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
+                painter.drawLine(x1, y1, x2, y2)
+
     def draw_cake_base(self, painter):
         cake_color = QColor(139, 69, 19)
         painter.setBrush(QBrush(cake_color))
@@ -1900,6 +1747,7 @@ class Level3_Screen(QWidget):
             painter.drawPolygon(QPolygon(flame_points))
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         if event.button() == Qt.LeftButton:
             cake_point = self.screen_to_cake_coords(event.pos())
             if cake_point and self.point_in_cake(cake_point):
@@ -1914,13 +1762,11 @@ class Level3_Screen(QWidget):
 
                 self.is_drawing = True
                 self.pendown_count += 1
-                self.current_stroke = [cake_point]
                 self.last_point = cake_point
                 self.last_time = current_time
 
-                self.pen_positions.append((cake_point.x(), cake_point.y()))
-                self.pen_timestamps.append(current_time)
-                self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+                self.stroke_buffer.append(cake_point.x(), cake_point.y(), current_time,
+                                          max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
 
                 event.accept()
 
@@ -1929,19 +1775,17 @@ class Level3_Screen(QWidget):
             cake_point = self.screen_to_cake_coords(event.pos())
             if cake_point and self.point_in_cake(cake_point):
                 current_time = time.time()
-                self.current_stroke.append(cake_point)
 
                 if self.last_time is not None:
                     self.paper_time += current_time - self.last_time
 
-                self.pen_positions.append((cake_point.x(), cake_point.y()))
-                self.pen_timestamps.append(current_time)
-                self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+                self.stroke_buffer.append(cake_point.x(), cake_point.y(), current_time,
+                                          max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
 
+                self.update(self.cake_transform().mapRect(segment_rect(self.last_point, cake_point, 30)))
                 self.last_point = cake_point
                 self.last_time = current_time
 
-                self.update()
                 event.accept()
 
     def mouseReleaseEvent(self, event):
@@ -1951,10 +1795,6 @@ class Level3_Screen(QWidget):
             if self.last_time is not None:
                 self.paper_time += current_time - self.last_time
 
-            if self.current_stroke:
-                self.drawing_strokes.append(self.current_stroke.copy())
-            self.current_stroke.clear()
-
             self.is_drawing = False
             self.last_pen_up_time = current_time
 
@@ -1974,66 +1814,17 @@ class Level3_Screen(QWidget):
                 margin <= point.y() <= self.cake_height - margin)
 
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-
-            velocities = []
-            for i in range(1, len(positions)):
-                dt = timestamps[i] - timestamps[i - 1]
-                if dt > 0:
-                    dx = positions[i][0] - positions[i - 1][0]
-                    dy = positions[i][1] - positions[i - 1][1]
-                    velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                    velocities.append(velocity)
-
-            accelerations = []
-            for i in range(1, len(velocities)):
-                dt = timestamps[i + 1] - timestamps[i]
-                if dt > 0:
-                    dv = velocities[i] - velocities[i - 1]
-                    accelerations.append(dv / dt)
-
-            jerks = []
-            for i in range(1, len(accelerations)):
-                dt = timestamps[i + 2] - timestamps[i + 1]
-                if dt > 0:
-                    da = accelerations[i] - accelerations[i - 1]
-                    jerks.append(da / dt)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [total_time, self.air_time, self.paper_time, mean_speed, mean_acc,
-                        pressure_mean, pressure_var, self.pendown_count, max_x, max_y,
-                        gmrtp, mean_jerk, disp_index]
-
-            return features
-        except:
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, INDEXED_KINEMATICS)
+        except Exception as e:
             return None
 
     def predict_alzheimers_risk(self, features):
@@ -2080,24 +1871,46 @@ class Level3_Screen(QWidget):
         return True
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
+        stopwatch = Stopwatch()
+
         if self.has_drawing_content():
-            self.run_alzheimers_analysis()
-            self.save_image_and_log_complete_metrics()
+            drawing_image = self.create_drawing_pixmap().toImage()
+            stages = [
+                ("Running Alzheimer's analysis", self.run_alzheimers_analysis),
+                ("Analyzing drawing",
+                 lambda: self.save_image_and_log_complete_metrics(drawing_image, stopwatch))
+            ]
         else:
-            self.save_basic_metrics()
-            self.prediction_result = {
-                'risk_level': 'No Drawing',
-                'interpretation': 'No drawing content was detected'
-            }
+            stages = [("Saving results", self.save_no_drawing_metrics)]
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def save_no_drawing_metrics(self):
+        self.save_basic_metrics()
+        self.prediction_result = {
+            'risk_level': 'No Drawing',
+            'interpretation': 'No drawing content was detected'
+        }
 
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
     def create_drawing_pixmap(self):
         pixmap = QPixmap(self.cake_width, self.cake_height)
         pixmap.fill(Qt.white)
@@ -2112,25 +1925,27 @@ class Level3_Screen(QWidget):
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
 
-        if len(self.pen_positions) > 1:
-            for i in range(1, len(self.pen_positions)):
-                x1, y1 = self.pen_positions[i - 1]
-                x2, y2 = self.pen_positions[i]
+        # QPainter.drawLine takes ints; the buffer stores float32
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
+            for i in range(1, len(positions)):
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
                 painter.drawLine(x1, y1, x2, y2)
 
         painter.end()
         return pixmap
 
-    def run_parkinsons_detection(self, image_path):
-        if not image_path or not os.path.exists(image_path):
+    def run_parkinsons_detection(self, drawing_image):
+        if drawing_image is None or drawing_image.isNull():
             self.prediction_result = {
                 'risk_level': 'Error',
-                'interpretation': 'Image file not found for analysis'
+                'interpretation': 'No drawing image available for analysis'
             }
             return False
 
         try:
-            prediction_result = self.parkinsons_detector.predict(image_path)
+            prediction_result = self.parkinsons_detector.predict_qimage(drawing_image)
 
             if prediction_result and prediction_result['prediction_successful']:
                 self.prediction_result = prediction_result
@@ -2155,17 +1970,18 @@ class Level3_Screen(QWidget):
                 self.end_time = time.time()
 
             metrics = self.metrics_logger.calculate_metrics(
-                self.pen_positions,
-                self.pen_timestamps,
-                self.pressure_readings,
+                self.stroke_buffer.positions,
+                self.stroke_buffer.timestamps,
+                self.stroke_buffer.pressures,
                 self.start_time,
                 self.end_time,
                 self.air_time,
                 self.paper_time,
-                self.pendown_count
+                self.pendown_count,
+                accumulator=self.metrics_accumulator
             )
 
-            minimal_pixmap = QPixmap(100, 100)
+            minimal_pixmap = QImage(100, 100, QImage.Format_RGB32)
             minimal_pixmap.fill(Qt.white)
 
             session_id = self.metrics_logger.get_next_session_id(self.player_name)
@@ -2185,62 +2001,50 @@ class Level3_Screen(QWidget):
         except Exception as e:
             pass
 
-    def save_image_and_log_complete_metrics(self):
+    def save_image_and_log_complete_metrics(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return None
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return None
 
-            pixmap = self.create_drawing_pixmap()
-
-            temp_image_filename = f"temp_{self.player_name}_Level3.png"
-            temp_image_path = os.path.join(self.SAVE_FOLDER, temp_image_filename)
-
-            if not os.path.exists(self.SAVE_FOLDER):
-                os.makedirs(self.SAVE_FOLDER)
-
-            pixmap.save(temp_image_path)
+            pixmap = drawing_image if drawing_image is not None else self.create_drawing_pixmap().toImage()
 
-            detection_success = self.run_parkinsons_detection(temp_image_path)
+            with stopwatch.measure("Parkinson's detection"):
+                detection_success = self.run_parkinsons_detection(pixmap)
 
-            metrics_result = self.metrics_logger.save_complete_session(
-                drawing_pixmap=pixmap,
-                player_name=self.player_name,
-                level="Level 3",
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
-                start_time=self.start_time,
-                end_time=self.end_time,
-                air_time=self.air_time,
-                paper_time=self.paper_time,
-                pendown_count=self.pendown_count,
-                prediction_result=self.prediction_result
-            )
-
-            self.cleanup_processed_image(temp_image_path)
+            with stopwatch.measure("Excel write"):
+                metrics_result = self.metrics_logger.save_complete_session(
+                    drawing_pixmap=pixmap,
+                    player_name=self.player_name,
+                    level="Level 3",
+                    pen_positions=self.stroke_buffer.positions,
+                    accumulator=self.metrics_accumulator,
+                    pen_timestamps=self.stroke_buffer.timestamps,
+                    pressure_readings=self.stroke_buffer.pressures,
+                    start_time=self.start_time,
+                    end_time=self.end_time,
+                    air_time=self.air_time,
+                    paper_time=self.paper_time,
+                    pendown_count=self.pendown_count,
+                    prediction_result=self.prediction_result
+                )
 
-            return temp_image_path
+            return metrics_result
 
         except Exception as e:
             self.save_basic_metrics()
             return None
 
-    def cleanup_processed_image(self, image_path):
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                pass
-
     def show_popup_with_home(self):
         """Show the results popup with analysis results"""
         popup = QDialog(self)
@@ -2406,14 +2210,14 @@ class Level4_Screen(QWidget):
             os.makedirs(self.SAVE_FOLDER)
 
         try:
-            from drawing_metrics_logger import DrawingMetricsLogger
+            from drawing_metrics_logger import DrawingMetricsLogger, StreamingMetricsAccumulator
             self.metrics_logger = DrawingMetricsLogger(self.SAVE_FOLDER, "Level1Results.xlsx")
         except ImportError:
             self.metrics_logger = None
 
         try:
             self.V_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            self.parkinsons_detector = ParkinsonsDetector(
+            self.parkinsons_detector = model_registry.get_parkinsons_detector(
                 model_path=os.path.join(self.V_FOLDER, 'best_parkinsons_model.keras'),
                 image_size=(128, 128)
             )
@@ -2423,6 +2227,8 @@ class Level4_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.alzheimers_model_loaded = False
 
         self.load_alzheimers_model()
@@ -2434,9 +2240,8 @@ class Level4_Screen(QWidget):
         self.last_time = None
         self.last_pen_up_time = None
 
-        self.pen_positions = []
-        self.pen_timestamps = []
-        self.pressure_readings = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.start_time = None
         self.end_time = None
         self.air_time = 0
@@ -2446,8 +2251,6 @@ class Level4_Screen(QWidget):
         self.air_start_time = None
         self.paper_start_time = None
 
-        self.drawing_strokes = []
-        self.current_stroke = []
 
         self.layout = QVBoxLayout()
         home_btn = QPushButton("Home")
@@ -2498,9 +2301,8 @@ class Level4_Screen(QWidget):
         self.final_trail_distance = 70
         self.current_trail_distance = self.initial_trail_distance
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_trail)
-        self.timer.start(16)
+        # Moves the wolf every 16 ms while it is catching up; sleeps once it has settled
+        self.frame_scheduler = FrameScheduler(self, self.update_trail, interval=16)
 
         QTimer.singleShot(0, self.draw_spiral)
 
@@ -2509,112 +2311,18 @@ class Level4_Screen(QWidget):
             self.air_start_time = self.start_time
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER=r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -2708,14 +2416,21 @@ class Level4_Screen(QWidget):
         return self.next_btn_rect.contains(pos)
 
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
+
+    def trail_rect(self):
+        return QRect(self.trail_pos - QPoint(self.trail_img.width() // 2, self.trail_img.height() // 2),
+                     self.trail_img.size())
 
     def paintEvent(self, event):
+        # Wolf frames only invalidate the sprite's old and new rects, so only those are blitted
+        exposed = event.rect()
         painter = QPainter(self)
-        painter.drawPixmap(0, 0, self.drawing)
+        blit_exposed(painter, exposed, self.drawing)
 
-        trail_draw_pos = self.trail_pos - QPoint(self.trail_img.width() // 2, self.trail_img.height() // 2)
-        painter.drawPixmap(trail_draw_pos, self.trail_img)
+        trail_rect = self.trail_rect()
+        if trail_rect.intersects(exposed):
+            painter.drawPixmap(trail_rect.topLeft(), self.trail_img)
 
     def resizeEvent(self, event):
         new_pixmap = QPixmap(self.size())
@@ -2725,6 +2440,7 @@ class Level4_Screen(QWidget):
         self.drawing = new_pixmap
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         if self.is_over_next_button(event.pos()):
             return
 
@@ -2742,20 +2458,19 @@ class Level4_Screen(QWidget):
 
             self.is_drawing = True
             self.pendown_count += 1
-            self.current_stroke = [event.pos()]
             self.last_point = event.pos()
             self.paper_start_time = current_time
             self.last_time = current_time
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time,
+                                      max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
 
     def mouseMoveEvent(self, event):
         if self.is_over_next_button(event.pos()):
             return
 
         self.cursor_pos = event.pos()
+        self.frame_scheduler.wake()
 
         if self.is_drawing and event.buttons() & Qt.LeftButton and self.last_point:
             current_time = time.time()
@@ -2764,20 +2479,17 @@ class Level4_Screen(QWidget):
             pen = QPen(Qt.darkMagenta, 15, Qt.SolidLine, Qt.RoundCap)
             painter.setPen(pen)
             painter.drawLine(self.last_point, event.pos())
-
-            self.current_stroke.append(event.pos())
+            painter.end()
 
             if self.last_time is not None:
                 delta_time = current_time - self.last_time
                 self.paper_time += delta_time
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(1.0)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time, 1.0)
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
             self.last_time = current_time
-            self.update()
 
     def mouseReleaseEvent(self, event):
         if self.is_drawing:
@@ -2786,10 +2498,6 @@ class Level4_Screen(QWidget):
             if self.last_time is not None:
                 self.paper_time += current_time - self.last_time
 
-            if self.current_stroke:
-                self.drawing_strokes.append(self.current_stroke.copy())
-            self.current_stroke.clear()
-
             self.is_drawing = False
             self.last_pen_up_time = current_time
             self.last_point = None
@@ -2799,6 +2507,7 @@ class Level4_Screen(QWidget):
             return
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             current_time = time.time()
 
             if self.start_time is None:
@@ -2810,13 +2519,11 @@ class Level4_Screen(QWidget):
 
             self.is_drawing = True
             self.pendown_count += 1
-            self.current_stroke = [event.pos()]
             self.last_point = event.pos()
             self.last_time = current_time
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(max(0.1, min(1.0, event.pressure())))
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time,
+                                      max(0.1, min(1.0, event.pressure())))
 
         elif event.type() == QTabletEvent.TabletMove and self.is_drawing and self.last_point:
             current_time = time.time()
@@ -2825,19 +2532,17 @@ class Level4_Screen(QWidget):
             pen = QPen(Qt.darkMagenta, max(5, event.pressure() * 50), Qt.SolidLine, Qt.RoundCap)
             painter.setPen(pen)
             painter.drawLine(self.last_point, event.pos())
-
-            self.current_stroke.append(event.pos())
+            painter.end()
 
             if self.last_time is not None:
                 self.paper_time += current_time - self.last_time
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(max(0.1, min(1.0, event.pressure())))
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time,
+                                      max(0.1, min(1.0, event.pressure())))
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
             self.last_time = current_time
-            self.update()
 
         elif event.type() == QTabletEvent.TabletRelease:
             if self.is_drawing:
@@ -2846,10 +2551,6 @@ class Level4_Screen(QWidget):
                 if self.last_time is not None:
                     self.paper_time += current_time - self.last_time
 
-                if self.current_stroke:
-                    self.drawing_strokes.append(self.current_stroke.copy())
-                self.current_stroke.clear()
-
                 self.is_drawing = False
                 self.last_pen_up_time = current_time
                 self.last_point = None
@@ -2857,6 +2558,14 @@ class Level4_Screen(QWidget):
         event.accept()
 
     def update_trail(self):
+        """
+        Move the wolf one frame towards the cursor.
+
+        Returns:
+            list: The sprite's old and new rects when it moved, an empty list when it did
+                not but may still, or None once it can only move again after the cursor does
+        """
+        progress = 1.0
         if self.start_time is not None:
             transition_duration = 10.0
             elapsed_time = time.time() - self.start_time
@@ -2880,12 +2589,19 @@ class Level4_Screen(QWidget):
             target_y = self.cursor_pos.y() - unit_dy * target_distance
 
             trail_speed = 0.1
-            self.trail_pos += QPoint(
+            step = QPoint(
                 int((target_x - self.trail_pos.x()) * trail_speed),
                 int((target_y - self.trail_pos.y()) * trail_speed)
             )
+            if not step.isNull():
+                old_rect = self.trail_rect()
+                self.trail_pos += step
+                return [old_rect, self.trail_rect()]
 
-        self.update()
+        # The chase distance still shrinks for the first seconds, which can move the wolf again
+        if current_distance > 0 and progress < 1.0:
+            return []
+        return None
 
     def create_drawing_pixmap(self):
         original_size = self.drawing.size()
@@ -2908,10 +2624,12 @@ class Level4_Screen(QWidget):
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
 
-        if len(self.pen_positions) > 1:
-            for i in range(1, len(self.pen_positions)):
-                x1, y1 = self.pen_positions[i - 1]
-                x2, y2 = self.pen_positions[i]
+        # QPainter.drawLine takes ints; the buffer stores float32
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
+            for i in range(1, len(positions)):
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
 
                 x1_adj = x1 - crop_left
                 x2_adj = x2 - crop_left
@@ -2925,16 +2643,16 @@ class Level4_Screen(QWidget):
         painter.end()
         return pixmap
 
-    def run_parkinsons_detection(self, image_path):
-        if not image_path or not os.path.exists(image_path) or not self.parkinsons_detector:
+    def run_parkinsons_detection(self, drawing_image):
+        if drawing_image is None or drawing_image.isNull() or not self.parkinsons_detector:
             self.prediction_result = {
                 'risk_level': 'Error',
-                'interpretation': 'Image file not found for analysis or detector not available'
+                'interpretation': 'No drawing image available for analysis or detector not available'
             }
             return False
 
         try:
-            prediction_result = self.parkinsons_detector.predict(image_path)
+            prediction_result = self.parkinsons_detector.predict_qimage(drawing_image)
 
             if prediction_result and prediction_result.get('prediction_successful'):
                 self.prediction_result = prediction_result
@@ -2964,7 +2682,7 @@ class Level4_Screen(QWidget):
 
             total_time = self.end_time - self.start_time if self.start_time else 0
 
-            blank_pixmap = QPixmap(100, 100)
+            blank_pixmap = QImage(100, 100, QImage.Format_RGB32)
             blank_pixmap.fill(Qt.white)
 
             if hasattr(self.metrics_logger, 'save_complete_session'):
@@ -2990,11 +2708,6 @@ class Level4_Screen(QWidget):
 
     def create_basic_excel_entry(self):
         try:
-            from openpyxl import load_workbook
-
-            wb = load_workbook(self.metrics_logger.excel_path)
-            ws = wb['Results']
-
             total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
 
             row_data = [
@@ -3002,89 +2715,94 @@ class Level4_Screen(QWidget):
                 'No Drawing', 'No drawing content was detected'
             ]
 
-            ws.append(row_data)
-            wb.save(self.metrics_logger.excel_path)
-            wb.close()
+            self.metrics_logger.append_results_row(row_data)
         except Exception as e:
             pass
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
-        alzheimers_success = self.run_alzheimers_analysis()
+        stopwatch = Stopwatch()
+        stages = [("Running Alzheimer's analysis", self.run_alzheimers_analysis)]
 
         if self.has_drawing_content():
-            self.save_image_and_log_complete_metrics()
+            drawing_image = self.create_drawing_pixmap().toImage()
+            stages.append(("Analyzing drawing",
+                           lambda: self.save_image_and_log_complete_metrics(drawing_image, stopwatch)))
         else:
-            self.save_basic_metrics()
-            self.prediction_result = {
-                'risk_level': 'No Drawing',
-                'interpretation': 'No drawing content was detected'
-            }
+            stages.append(("Saving results", self.save_no_drawing_metrics))
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def save_no_drawing_metrics(self):
+        self.save_basic_metrics()
+        self.prediction_result = {
+            'risk_level': 'No Drawing',
+            'interpretation': 'No drawing content was detected'
+        }
 
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
-    def save_image_and_log_complete_metrics(self):
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
+    def save_image_and_log_complete_metrics(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return None
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return None
 
-            pixmap = self.create_drawing_pixmap()
-
-            temp_image_filename = f"temp_{self.player_name}_Level4.png"
-            temp_image_path = os.path.join(self.SAVE_FOLDER, temp_image_filename)
-
-            if not os.path.exists(self.SAVE_FOLDER):
-                os.makedirs(self.SAVE_FOLDER)
-
-            pixmap.save(temp_image_path)
-
-            detection_success = self.run_parkinsons_detection(temp_image_path)
-
-            if hasattr(self.metrics_logger, 'save_complete_session'):
-                metrics_result = self.metrics_logger.save_complete_session(
-                    drawing_pixmap=pixmap,
-                    player_name=self.player_name,
-                    level="Level 4",
-                    pen_positions=self.pen_positions,
-                    pen_timestamps=self.pen_timestamps,
-                    pressure_readings=self.pressure_readings,
-                    start_time=self.start_time,
-                    end_time=self.end_time,
-                    air_time=self.air_time,
-                    paper_time=self.paper_time,
-                    pendown_count=self.pendown_count,
-                    prediction_result=self.prediction_result
-                )
-
-            self.cleanup_processed_image(temp_image_path)
-
-            return temp_image_path
+            pixmap = drawing_image if drawing_image is not None else self.create_drawing_pixmap().toImage()
+
+            with stopwatch.measure("Parkinson's detection"):
+                detection_success = self.run_parkinsons_detection(pixmap)
+
+            with stopwatch.measure("Excel write"):
+                if hasattr(self.metrics_logger, 'save_complete_session'):
+                    metrics_result = self.metrics_logger.save_complete_session(
+                        drawing_pixmap=pixmap,
+                        player_name=self.player_name,
+                        level="Level 4",
+                        pen_positions=self.stroke_buffer.positions,
+                        accumulator=self.metrics_accumulator,
+                        pen_timestamps=self.stroke_buffer.timestamps,
+                        pressure_readings=self.stroke_buffer.pressures,
+                        start_time=self.start_time,
+                        end_time=self.end_time,
+                        air_time=self.air_time,
+                        paper_time=self.paper_time,
+                        pendown_count=self.pendown_count,
+                        prediction_result=self.prediction_result
+                    )
+
+            return metrics_result
 
         except Exception as e:
             self.save_basic_metrics()
             return None
 
-    def cleanup_processed_image(self, image_path):
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                pass
-
     def show_popup_with_home(self):
         popup = QDialog(self)
         popup.setWindowTitle("Analysis Complete")
@@ -3253,14 +2971,14 @@ class Level5_Screen(QWidget):
             os.makedirs(self.SAVE_FOLDER)
 
         try:
-            from drawing_metrics_logger import DrawingMetricsLogger
+            from drawing_metrics_logger import DrawingMetricsLogger, StreamingMetricsAccumulator
             self.metrics_logger = DrawingMetricsLogger(self.SAVE_FOLDER, "Level1Results.xlsx")
         except ImportError:
             self.metrics_logger = None
 
         try:
             self.V_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            self.parkinsons_detector = ParkinsonsDetector(
+            self.parkinsons_detector = model_registry.get_parkinsons_detector(
                 model_path=os.path.join(self.V_FOLDER, 'best_parkinsons_model.keras'),
                 image_size=(128, 128)
             )
@@ -3270,6 +2988,8 @@ class Level5_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.alzheimers_model_loaded = False
 
         self.load_alzheimers_model()
@@ -3280,9 +3000,8 @@ class Level5_Screen(QWidget):
         self.last_pen_up_time = None
         self.last_time = None
 
-        self.pen_positions = []
-        self.pen_timestamps = []
-        self.pressure_readings = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.start_time = None
         self.end_time = None
         self.air_time = 0
@@ -3340,112 +3059,18 @@ class Level5_Screen(QWidget):
         self.setLayout(self.layout)
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER=r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -3544,10 +3169,12 @@ class Level5_Screen(QWidget):
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
 
-        if len(self.pen_positions) > 1:
-            for i in range(1, len(self.pen_positions)):
-                x1, y1 = self.pen_positions[i - 1]
-                x2, y2 = self.pen_positions[i]
+        # QPainter.drawLine takes ints; the buffer stores float32
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
+            for i in range(1, len(positions)):
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
 
                 x1_adj = x1 - crop_left
                 x2_adj = x2 - crop_left
@@ -3561,16 +3188,16 @@ class Level5_Screen(QWidget):
         painter.end()
         return white_drawing
 
-    def run_parkinsons_detection(self, image_path):
-        if not image_path or not os.path.exists(image_path) or not self.parkinsons_detector:
+    def run_parkinsons_detection(self, drawing_image):
+        if drawing_image is None or drawing_image.isNull() or not self.parkinsons_detector:
             self.prediction_result = {
                 'risk_level': 'Error',
-                'interpretation': 'Image file not found for analysis or detector not available'
+                'interpretation': 'No drawing image available for analysis or detector not available'
             }
             return False
 
         try:
-            prediction_result = self.parkinsons_detector.predict(image_path)
+            prediction_result = self.parkinsons_detector.predict_qimage(drawing_image)
 
             if prediction_result and prediction_result.get('prediction_successful'):
                 self.prediction_result = prediction_result
@@ -3589,86 +3216,102 @@ class Level5_Screen(QWidget):
             return False
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
-        alzheimers_success = self.run_alzheimers_analysis()
+        stopwatch = Stopwatch()
+        stages = [("Running Alzheimer's analysis", self.run_alzheimers_analysis)]
 
         if self.has_drawing_content():
-            image_path = self.save_image_and_log_complete_metrics()
-            if not image_path:
-                self.prediction_result = {
-                    'risk_level': 'Error',
-                    'interpretation': 'Failed to process drawing for analysis'
-                }
+            drawing_image = self.create_white_background_drawing().toImage()
+            stages.append(("Analyzing drawing",
+                           lambda: self.save_drawing_for_analysis(drawing_image, stopwatch)))
         else:
-            self.save_basic_metrics()
+            stages.append(("Saving results", self.save_no_drawing_metrics))
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def save_drawing_for_analysis(self, drawing_image, stopwatch):
+        image_path = self.save_image_and_log_complete_metrics(drawing_image, stopwatch)
+        if not image_path:
             self.prediction_result = {
-                'risk_level': 'No Drawing',
-                'interpretation': 'No drawing content was detected'
+                'risk_level': 'Error',
+                'interpretation': 'Failed to process drawing for analysis'
             }
-
+        return image_path
+
+    def save_no_drawing_metrics(self):
+        self.save_basic_metrics()
+        self.prediction_result = {
+            'risk_level': 'No Drawing',
+            'interpretation': 'No drawing content was detected'
+        }
+
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
 
-    def save_image_and_log_complete_metrics(self):
+    def save_image_and_log_complete_metrics(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return None
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return None
 
-            white_drawing = self.create_white_background_drawing()
-
-            temp_image_filename = f"temp_{self.player_name}_Level5.png"
-            temp_image_path = os.path.join(self.SAVE_FOLDER, temp_image_filename)
-
-            white_drawing.save(temp_image_path)
-
-            detection_success = self.run_parkinsons_detection(temp_image_path)
-
-            if hasattr(self.metrics_logger, 'save_complete_session'):
-                metrics_result = self.metrics_logger.save_complete_session(
-                    drawing_pixmap=white_drawing,
-                    player_name=self.player_name,
-                    level="Level 5",
-                    pen_positions=self.pen_positions,
-                    pen_timestamps=self.pen_timestamps,
-                    pressure_readings=self.pressure_readings,
-                    start_time=self.start_time,
-                    end_time=self.end_time,
-                    air_time=self.air_time,
-                    paper_time=self.paper_time,
-                    pendown_count=self.pendown_count,
-                    prediction_result=self.prediction_result
-                )
-
-            self.cleanup_processed_image(temp_image_path)
-            return temp_image_path
+            white_drawing = (drawing_image if drawing_image is not None
+                             else self.create_white_background_drawing().toImage())
+
+            with stopwatch.measure("Parkinson's detection"):
+                detection_success = self.run_parkinsons_detection(white_drawing)
+
+            with stopwatch.measure("Excel write"):
+                if hasattr(self.metrics_logger, 'save_complete_session'):
+                    metrics_result = self.metrics_logger.save_complete_session(
+                        drawing_pixmap=white_drawing,
+                        player_name=self.player_name,
+                        level="Level 5",
+                        pen_positions=self.stroke_buffer.positions,
+                        accumulator=self.metrics_accumulator,
+                        pen_timestamps=self.stroke_buffer.timestamps,
+                        pressure_readings=self.stroke_buffer.pressures,
+                        start_time=self.start_time,
+                        end_time=self.end_time,
+                        air_time=self.air_time,
+                        paper_time=self.paper_time,
+                        pendown_count=self.pendown_count,
+                        prediction_result=self.prediction_result
+                    )
+
+            return metrics_result
 
         except Exception as e:
             self.save_basic_metrics()
             return None
 
-    def cleanup_processed_image(self, image_path):
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                pass
-
     def save_basic_metrics(self):
         if self.metrics_logger is None:
             return
@@ -3681,7 +3324,7 @@ class Level5_Screen(QWidget):
 
             total_time = self.end_time - self.start_time if self.start_time else 0
 
-            blank_pixmap = QPixmap(100, 100)
+            blank_pixmap = QImage(100, 100, QImage.Format_RGB32)
             blank_pixmap.fill(Qt.white)
 
             if hasattr(self.metrics_logger, 'save_complete_session'):
@@ -3707,11 +3350,6 @@ class Level5_Screen(QWidget):
 
     def create_basic_excel_entry(self):
         try:
-            from openpyxl import load_workbook
-
-            wb = load_workbook(self.metrics_logger.excel_path)
-            ws = wb['Results']
-
             total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
 
             row_data = [
@@ -3719,9 +3357,7 @@ class Level5_Screen(QWidget):
                 'No Drawing', 'No drawing content was detected'
             ]
 
-            ws.append(row_data)
-            wb.save(self.metrics_logger.excel_path)
-            wb.close()
+            self.metrics_logger.append_results_row(row_data)
         except Exception as e:
             pass
 
@@ -3890,10 +3526,12 @@ class Level5_Screen(QWidget):
         self.open_main_screen()
 
     def paintEvent(self, event):
+        # Pen moves only invalidate the segment they drew, so only that part is blitted
+        exposed = event.rect()
         painter = QPainter(self)
-        painter.drawPixmap(200, 150, self.original_bg_pixmap)
-        painter.drawPixmap(0, 0, self.reference_layer)
-        painter.drawPixmap(0, 0, self.drawing)
+        blit_exposed(painter, exposed, self.original_bg_pixmap, QPoint(200, 150))
+        blit_exposed(painter, exposed, self.reference_layer)
+        blit_exposed(painter, exposed, self.drawing)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -3909,6 +3547,7 @@ class Level5_Screen(QWidget):
             self.draw_spiral()
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         timestamp = time.time()
 
         if self.start_time is None:
@@ -3928,9 +3567,8 @@ class Level5_Screen(QWidget):
                 self.paper_start_time = timestamp
                 self.last_time = timestamp
 
-                self.pen_positions.append((event.pos().x(), event.pos().y()))
-                self.pen_timestamps.append(timestamp)
-                self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+                self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp,
+                                          max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
             else:
                 self.last_point = None
                 self.is_drawing = False
@@ -3945,12 +3583,10 @@ class Level5_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(1.0)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, 1.0)
 
             if self.last_time is not None:
                 delta_time = timestamp - self.last_time
@@ -3983,7 +3619,7 @@ class Level6_Screen(QWidget):
             os.makedirs(self.SAVE_FOLDER)
 
         try:
-            from drawing_metrics_logger import DrawingMetricsLogger
+            from drawing_metrics_logger import DrawingMetricsLogger, StreamingMetricsAccumulator
             self.metrics_logger = DrawingMetricsLogger(self.SAVE_FOLDER, "Level1Results.xlsx")
         except ImportError:
             self.metrics_logger = None
@@ -3991,6 +3627,8 @@ class Level6_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.alzheimers_model_loaded = False
 
         self.load_alzheimers_model()
@@ -4001,9 +3639,8 @@ class Level6_Screen(QWidget):
         self.last_pen_up_time = None
         self.last_time = None
 
-        self.pen_positions = []
-        self.pen_timestamps = []
-        self.pressure_readings = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.start_time = None
         self.end_time = None
         self.air_time = 0
@@ -4052,112 +3689,18 @@ class Level6_Screen(QWidget):
         self.air_start_time = self.start_time
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER=r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -4280,10 +3823,12 @@ class Level6_Screen(QWidget):
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
 
-        if len(self.pen_positions) > 1:
-            for i in range(1, len(self.pen_positions)):
-                x1, y1 = self.pen_positions[i - 1]
-                x2, y2 = self.pen_positions[i]
+        # QPainter.drawLine takes ints; the buffer stores float32
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
+            for i in range(1, len(positions)):
+                x1, y1 = positions[i - 1]
+                x2, y2 = positions[i]
 
                 y1_adj = y1 - crop_top
                 y2_adj = y2 - crop_top
@@ -4295,77 +3840,83 @@ class Level6_Screen(QWidget):
         return white_drawing
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
-        alzheimers_success = self.run_alzheimers_analysis()
+        stopwatch = Stopwatch()
+        stages = [("Running Alzheimer's analysis", self.run_alzheimers_analysis)]
 
         if self.has_drawing_content():
-            image_path = self.save_image_and_log_complete_metrics()
+            drawing_image = self.create_white_background_drawing().toImage()
+            stages.append(("Analyzing drawing",
+                           lambda: self.save_image_and_log_complete_metrics(drawing_image, stopwatch)))
         else:
-            self.save_basic_metrics()
+            stages.append(("Saving results", self.save_basic_metrics))
 
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
 
-    def save_image_and_log_complete_metrics(self):
+    def save_image_and_log_complete_metrics(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return None
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return None
 
-            white_drawing = self.create_white_background_drawing()
-
-            import time as time_module
-            timestamp = int(time_module.time())
-            temp_image_filename = f"temp_{self.player_name}_Level6.png"
-            temp_image_path = os.path.join(self.SAVE_FOLDER, temp_image_filename)
-
-            white_drawing.save(temp_image_path)
-
-            if hasattr(self.metrics_logger, 'save_complete_session'):
-                metrics_result = self.metrics_logger.save_complete_session(
-                    drawing_pixmap=white_drawing,
-                    player_name=self.player_name,
-                    level="Level 6",
-                    pen_positions=self.pen_positions,
-                    pen_timestamps=self.pen_timestamps,
-                    pressure_readings=self.pressure_readings,
-                    start_time=self.start_time,
-                    end_time=self.end_time,
-                    air_time=self.air_time,
-                    paper_time=self.paper_time,
-                    pendown_count=self.pendown_count,
-                    prediction_result=None
-                )
-
-            self.cleanup_processed_image(temp_image_path)
-            return temp_image_path
+            white_drawing = (drawing_image if drawing_image is not None
+                             else self.create_white_background_drawing())
+
+            with stopwatch.measure("Excel write"):
+                if hasattr(self.metrics_logger, 'save_complete_session'):
+                    metrics_result = self.metrics_logger.save_complete_session(
+                        drawing_pixmap=white_drawing,
+                        player_name=self.player_name,
+                        level="Level 6",
+                        pen_positions=self.stroke_buffer.positions,
+                        accumulator=self.metrics_accumulator,
+                        pen_timestamps=self.stroke_buffer.timestamps,
+                        pressure_readings=self.stroke_buffer.pressures,
+                        start_time=self.start_time,
+                        end_time=self.end_time,
+                        air_time=self.air_time,
+                        paper_time=self.paper_time,
+                        pendown_count=self.pendown_count,
+                        prediction_result=None
+                    )
+
+            return metrics_result
 
         except Exception as e:
             self.save_basic_metrics()
             return None
 
-    def cleanup_processed_image(self, image_path):
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                pass
-
     def save_basic_metrics(self):
         if self.metrics_logger is None:
             return
@@ -4378,7 +3929,7 @@ class Level6_Screen(QWidget):
 
             total_time = self.end_time - self.start_time if self.start_time else 0
 
-            blank_pixmap = QPixmap(100, 100)
+            blank_pixmap = QImage(100, 100, QImage.Format_RGB32)
             blank_pixmap.fill(Qt.white)
 
             if hasattr(self.metrics_logger, 'save_complete_session'):
@@ -4401,11 +3952,6 @@ class Level6_Screen(QWidget):
 
     def create_basic_excel_entry(self):
         try:
-            from openpyxl import load_workbook
-
-            wb = load_workbook(self.metrics_logger.excel_path)
-            ws = wb['Results']
-
             total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
 
             row_data = [
@@ -4413,9 +3959,7 @@ class Level6_Screen(QWidget):
                 'No Drawing', 'No drawing content was detected'
             ]
 
-            ws.append(row_data)
-            wb.save(self.metrics_logger.excel_path)
-            wb.close()
+            self.metrics_logger.append_results_row(row_data)
         except Exception as e:
             pass
 
@@ -4528,10 +4072,12 @@ class Level6_Screen(QWidget):
 
     def paintEvent(self, event):
         if self.drawing is not None:
+            # Pen moves only invalidate the segment they drew, so only that part is blitted
             base_painter = QPainter(self)
-            base_painter.drawPixmap(0, 0, self.drawing)
+            blit_exposed(base_painter, event.rect(), self.drawing)
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         if self.is_over_next_button(event.pos()):
             return
 
@@ -4553,9 +4099,8 @@ class Level6_Screen(QWidget):
             self.paper_start_time = timestamp
             self.last_time = timestamp
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp,
+                                      max(0.1, min(1.0, 0.5 + np.random.normal(0, 0.1))))
 
     def mouseMoveEvent(self, event):
         if self.is_over_next_button(event.pos()):
@@ -4571,12 +4116,10 @@ class Level6_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(1.0)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, 1.0)
 
             if self.last_time is not None:
                 delta_time = timestamp - self.last_time
@@ -4601,6 +4144,7 @@ class Level6_Screen(QWidget):
             self.air_start_time = timestamp
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             if self.last_pen_up_time is not None:
                 self.air_time += (timestamp - self.last_pen_up_time)
                 self.last_pen_up_time = None
@@ -4611,9 +4155,7 @@ class Level6_Screen(QWidget):
             self.paper_start_time = timestamp
             self.last_time = timestamp
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(event.pressure())
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, event.pressure())
 
         elif event.type() == QTabletEvent.TabletMove and self.last_point and self.is_drawing and self.drawing is not None:
             painter = QPainter(self.drawing)
@@ -4622,12 +4164,10 @@ class Level6_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(event.pressure())
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, event.pressure())
 
             if self.last_time is not None:
                 delta_time = timestamp - self.last_time
@@ -4658,16 +4198,16 @@ class Level7_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.load_alzheimers_model()
 
         self.setWindowTitle("Level 7 - Puppy Name Drawing")
         self.setMinimumSize(2000, 1100)
         self.setMouseTracking(True)
 
-        self.pen_positions = []
-        self.pen_timestamps = []
-        self.pressure_readings = []
-        self.stroke_boundaries = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.start_time = None
         self.end_time = None
         self.air_time = 0
@@ -4744,77 +4284,18 @@ class Level7_Screen(QWidget):
         self.draw_white_box()
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            model_folder = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(model_folder, "model14.pkl")
-            scaler_path = os.path.join(model_folder, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                self.alzheimers_model = joblib.load(model_path)
-                self.alzheimers_scaler = joblib.load(scaler_path)
-        except:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
+        model_folder = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(model_folder)
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-
-            velocities = []
-            for i in range(1, len(positions)):
-                dt = timestamps[i] - timestamps[i - 1]
-                if dt > 0:
-                    dx = positions[i][0] - positions[i - 1][0]
-                    dy = positions[i][1] - positions[i - 1][1]
-                    velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                    velocities.append(velocity)
-
-            accelerations = []
-            for i in range(1, len(velocities)):
-                dt = timestamps[i + 1] - timestamps[i]
-                if dt > 0:
-                    dv = velocities[i] - velocities[i - 1]
-                    accelerations.append(dv / dt)
-
-            jerks = []
-            for i in range(1, len(accelerations)):
-                dt = timestamps[i + 2] - timestamps[i + 1]
-                if dt > 0:
-                    da = accelerations[i] - accelerations[i - 1]
-                    jerks.append(da / dt)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [total_time, self.air_time, self.paper_time, mean_speed, mean_acc,
-                        pressure_mean, pressure_var, self.pendown_count, max_x, max_y,
-                        gmrtp, mean_jerk, disp_index]
-
-            return features
-        except:
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, INDEXED_KINEMATICS)
+        except Exception as e:
             return None
 
     def predict_alzheimers_risk(self, features):
@@ -4891,16 +4372,40 @@ class Level7_Screen(QWidget):
         self.update()
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         self.pendown_count = self.pendown_count - 1
+
+        stopwatch = Stopwatch()
+        stages = []
+
         if not self.session_saved:
-            self.save_image_and_log()
-        self.run_alzheimers_analysis()
+            final_image = self.create_final_image().toImage()
+            stages.append(("Saving drawing", lambda: self.save_image_and_log(final_image, stopwatch)))
+
+        stages.append(("Running Alzheimer's analysis", self.run_alzheimers_analysis))
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
+
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
-    def save_image_and_log(self):
+    def on_analysis_cancelled(self):
+        # The save stage runs first and is never interrupted, so going home must not save again
+        self.analysis_task = None
+        self.hide()
+        self.main_dialog.show()
+
+    def save_image_and_log(self, final_image=None, stopwatch=None):
         if not self.metrics_logger or self.session_saved:
             return
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             self.end_time = time.time()
 
@@ -4910,21 +4415,23 @@ class Level7_Screen(QWidget):
             if self.paper_start_time and self.is_drawing:
                 self.paper_time += self.end_time - self.paper_start_time
 
-            final_drawing = self.create_final_image()
+            final_drawing = final_image if final_image is not None else self.create_final_image()
 
-            metrics = self.metrics_logger.save_complete_session(
-                drawing_pixmap=final_drawing,
-                player_name=self.player_name,
-                level="Level 7",
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
-                start_time=self.start_time,
-                end_time=self.end_time,
-                air_time=self.air_time,
-                paper_time=self.paper_time,
-                pendown_count=self.pendown_count
-            )
+            with stopwatch.measure("Excel write"):
+                metrics = self.metrics_logger.save_complete_session(
+                    drawing_pixmap=final_drawing,
+                    player_name=self.player_name,
+                    level="Level 7",
+                    pen_positions=self.stroke_buffer.positions,
+                    accumulator=self.metrics_accumulator,
+                    pen_timestamps=self.stroke_buffer.timestamps,
+                    pressure_readings=self.stroke_buffer.pressures,
+                    start_time=self.start_time,
+                    end_time=self.end_time,
+                    air_time=self.air_time,
+                    paper_time=self.paper_time,
+                    pendown_count=self.pendown_count
+                )
             self.session_saved = True
 
         except Exception as e:
@@ -4942,19 +4449,15 @@ class Level7_Screen(QWidget):
         painter = QPainter(final_pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
 
-        if len(self.pen_positions) > 1:
+        positions = self.stroke_buffer.positions.astype(int).tolist()
+        if len(positions) > 1:
             pen = QPen(Qt.black, 20, Qt.SolidLine, Qt.RoundCap)
             painter.setPen(pen)
 
-            stroke_boundaries = self.stroke_boundaries + [len(self.pen_positions)]
-
-            for stroke_idx in range(len(stroke_boundaries) - 1):
-                start_idx = stroke_boundaries[stroke_idx]
-                end_idx = stroke_boundaries[stroke_idx + 1]
-
+            for start_idx, end_idx in self.stroke_buffer.strokes():
                 for i in range(start_idx + 1, end_idx):
-                    x1, y1 = self.pen_positions[i - 1]
-                    x2, y2 = self.pen_positions[i]
+                    x1, y1 = positions[i - 1]
+                    x2, y2 = positions[i]
 
                     if (box_x <= x1 <= box_x + box_width and box_y <= y1 <= box_y + box_height and
                             box_x <= x2 <= box_x + box_width and box_y <= y2 <= box_y + box_height):
@@ -5075,15 +4578,11 @@ class Level7_Screen(QWidget):
             self.pendown_count += 1
             self.is_drawing = True
 
-            self.stroke_boundaries.append(len(self.pen_positions))
-
             if self.air_start_time:
                 self.air_time += current_time - self.air_start_time
             self.paper_start_time = current_time
 
-        self.pen_positions.append((pos.x(), pos.y()))
-        self.pen_timestamps.append(current_time)
-        self.pressure_readings.append(pressure if pressure is not None else 0)
+        self.stroke_buffer.append(pos.x(), pos.y(), current_time, pressure if pressure is not None else 0)
 
     def _end_drawing(self):
         if self.is_drawing:
@@ -5095,6 +4594,7 @@ class Level7_Screen(QWidget):
             self.air_start_time = current_time
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         if self.next_btn.geometry().contains(event.pos()):
             return
 
@@ -5113,9 +4613,7 @@ class Level7_Screen(QWidget):
             self.last_point = event.pos()
 
             current_time = time.time()
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(0)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time, 0)
 
             self.update()
 
@@ -5128,6 +4626,7 @@ class Level7_Screen(QWidget):
             return
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             self.last_point = event.pos()
             self._start_drawing(event.pos(), pressure=event.pressure())
 
@@ -5139,9 +4638,7 @@ class Level7_Screen(QWidget):
             self.last_point = event.pos()
 
             current_time = time.time()
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(current_time)
-            self.pressure_readings.append(event.pressure())
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), current_time, event.pressure())
 
             self.update()
 
@@ -5171,6 +4668,8 @@ class Level8_Screen(QWidget):
         self.alzheimers_model = None
         self.alzheimers_scaler = None
         self.alzheimers_result = None
+        self.analysis_task = None
+        self.analysis_timings = {}
         self.alzheimers_model_loaded = False
 
         self.load_alzheimers_model()
@@ -5206,9 +4705,8 @@ class Level8_Screen(QWidget):
         ]
         self.current_sentence_index = 0
 
-        self.pen_positions = []
-        self.pen_timestamps = []
-        self.pressure_readings = []
+        self.metrics_accumulator = StreamingMetricsAccumulator()
+        self.stroke_buffer = StrokeBuffer(self.metrics_accumulator)
         self.start_time = None
         self.end_time = None
         self.air_time = 0
@@ -5294,112 +4792,18 @@ class Level8_Screen(QWidget):
         self.air_start_time = self.start_time
 
     def load_alzheimers_model(self):
-        try:
-            import joblib
-            import numpy as np
-            self.Model_FOLDER=r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
-            model_path = os.path.join(self.Model_FOLDER, "model14.pkl")
-            scaler_path = os.path.join(self.Model_FOLDER, "scaler14.pkl")
-
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                try:
-                    self.alzheimers_model = joblib.load(model_path)
-                    self.alzheimers_scaler = joblib.load(scaler_path)
-                    self.alzheimers_model_loaded = True
-                except Exception as e:
-                    self.alzheimers_model = None
-                    self.alzheimers_scaler = None
-                    self.alzheimers_model_loaded = False
-            else:
-                self.alzheimers_model = None
-                self.alzheimers_scaler = None
-                self.alzheimers_model_loaded = False
-
-        except ImportError as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
-        except Exception as e:
-            self.alzheimers_model = None
-            self.alzheimers_scaler = None
-            self.alzheimers_model_loaded = False
+        self.Model_FOLDER = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.alzheimers_model, self.alzheimers_scaler = model_registry.get_alzheimers_model(self.Model_FOLDER)
+        self.alzheimers_model_loaded = self.alzheimers_model is not None and self.alzheimers_scaler is not None
 
     def calculate_drawing_metrics(self):
-        if not self.pen_positions or not self.pen_timestamps:
+        if not self.stroke_buffer:
             return None
 
         try:
-            import numpy as np
-
-            positions = np.array(self.pen_positions)
-            timestamps = np.array(self.pen_timestamps)
-            pressures = np.array(self.pressure_readings) if self.pressure_readings else np.ones(len(positions))
-
-            total_time = self.end_time - self.start_time if self.start_time and self.end_time else 0
-            air_time = self.air_time
-            paper_time = self.paper_time
-
-            velocities = []
-            accelerations = []
-            jerks = []
-
-            if len(positions) > 1:
-                for i in range(1, len(positions)):
-                    dt = timestamps[i] - timestamps[i - 1]
-                    if dt > 0:
-                        dx = positions[i][0] - positions[i - 1][0]
-                        dy = positions[i][1] - positions[i - 1][1]
-                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
-                        velocities.append(velocity)
-
-                        if len(velocities) > 1:
-                            dv = velocities[-1] - velocities[-2]
-                            acceleration = dv / dt
-                            accelerations.append(acceleration)
-
-                            if len(accelerations) > 1:
-                                da = accelerations[-1] - accelerations[-2]
-                                jerk = da / dt
-                                jerks.append(jerk)
-
-            mean_speed = np.mean(velocities) if velocities else 0
-            mean_acc = np.mean(accelerations) if accelerations else 0
-            mean_jerk = np.mean(jerks) if jerks else 0
-
-            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
-            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
-
-            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
-            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
-
-            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
-
-            if len(positions) > 1:
-                center_x = np.mean(positions[:, 0])
-                center_y = np.mean(positions[:, 1])
-                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
-                disp_index = np.std(distances)
-            else:
-                disp_index = 0
-
-            features = [
-                total_time,
-                air_time,
-                paper_time,
-                mean_speed,
-                mean_acc,
-                pressure_mean,
-                pressure_var,
-                self.pendown_count,
-                max_x,
-                max_y,
-                gmrtp,
-                mean_jerk,
-                disp_index
-            ]
-
-            return features
-
+            return model_features(self.stroke_buffer.positions, self.stroke_buffer.timestamps, self.stroke_buffer.pressures,
+                                  self.start_time, self.end_time, self.air_time, self.paper_time,
+                                  self.pendown_count, CHAINED_KINEMATICS)
         except Exception as e:
             return None
 
@@ -5545,23 +4949,38 @@ class Level8_Screen(QWidget):
         return white_drawing
 
     def handle_next(self):
+        if self.analysis_task is not None:
+            return
+
         if self.end_time is None:
             self.end_time = time.time()
 
         if self.last_pen_up_time is not None:
             self.air_time += (self.end_time - self.last_pen_up_time)
 
-        alzheimers_success = self.run_alzheimers_analysis()
+        stopwatch = Stopwatch()
+        stages = [("Running Alzheimer's analysis", self.run_alzheimers_analysis)]
 
         if self.has_drawing_content():
-            self.save_image_and_log()
+            drawing_image = self.create_white_background_drawing().toImage()
+            stages.append(("Saving drawing", lambda: self.save_image_and_log(drawing_image, stopwatch)))
         else:
-            self.save_basic_metrics()
+            stages.append(("Saving results", self.save_basic_metrics))
+
+        self.analysis_task = run_analysis(self, stages, self.on_analysis_finished,
+                                          self.on_analysis_cancelled, stopwatch)
 
+    def on_analysis_finished(self, result):
+        self.analysis_task = None
+        self.analysis_timings = result['timings']
         self.show_popup_with_home()
 
+    def on_analysis_cancelled(self):
+        self.analysis_task = None
+        self.open_main_screen()
+
     def has_drawing_content(self):
-        return len(self.pen_positions) > 0
+        return len(self.stroke_buffer) > 0
 
     def save_basic_metrics(self):
         if self.metrics_logger is None:
@@ -5578,41 +4997,46 @@ class Level8_Screen(QWidget):
         except Exception as e:
             pass
 
-    def save_image_and_log(self):
+    def save_image_and_log(self, drawing_image=None, stopwatch=None):
         if self.metrics_logger is None:
             return
 
         if self.user_drawing is None:
             return
 
+        stopwatch = stopwatch or Stopwatch()
+
         try:
             if self.start_time is None:
                 self.start_time = time.time()
             if self.end_time is None:
                 self.end_time = time.time()
 
-            if not self.pen_positions:
+            if not self.stroke_buffer:
                 self.save_basic_metrics()
                 return
 
-            white_drawing = self.create_white_background_drawing()
+            white_drawing = (drawing_image if drawing_image is not None
+                             else self.create_white_background_drawing())
 
             current_sentence = self.sentences[self.current_sentence_index]
             level_identifier = f"Level 8"
 
-            metrics = self.metrics_logger.save_complete_session(
-                drawing_pixmap=white_drawing,
-                player_name=self.player_name,
-                level=level_identifier,
-                pen_positions=self.pen_positions,
-                pen_timestamps=self.pen_timestamps,
-                pressure_readings=self.pressure_readings,
-                start_time=self.start_time,
-                end_time=self.end_time,
-                air_time=self.air_time,
-                paper_time=self.paper_time,
-                pendown_count=self.pendown_count
-            )
+            with stopwatch.measure("Excel write"):
+                metrics = self.metrics_logger.save_complete_session(
+                    drawing_pixmap=white_drawing,
+                    player_name=self.player_name,
+                    level=level_identifier,
+                    pen_positions=self.stroke_buffer.positions,
+                    accumulator=self.metrics_accumulator,
+                    pen_timestamps=self.stroke_buffer.timestamps,
+                    pressure_readings=self.stroke_buffer.pressures,
+                    start_time=self.start_time,
+                    end_time=self.end_time,
+                    air_time=self.air_time,
+                    paper_time=self.paper_time,
+                    pendown_count=self.pendown_count
+                )
             return metrics
 
         except Exception as e:
@@ -5735,12 +5159,15 @@ class Level8_Screen(QWidget):
 
     def paintEvent(self, event):
         if self.drawing is not None:
+            # Pen moves only invalidate the segment they drew, so only that part is blitted
+            exposed = event.rect()
             base_painter = QPainter(self)
-            base_painter.drawPixmap(0, 0, self.drawing)
+            blit_exposed(base_painter, exposed, self.drawing)
             if self.user_drawing is not None:
-                base_painter.drawPixmap(0, 0, self.user_drawing)
+                blit_exposed(base_painter, exposed, self.user_drawing)
 
     def mousePressEvent(self, event):
+        self.stroke_buffer.pen_down()
         if self.is_over_buttons(event.pos()):
             return
 
@@ -5761,9 +5188,7 @@ class Level8_Screen(QWidget):
             self.paper_start_time = timestamp
             self.last_time = timestamp
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(0.5)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, 0.5)
 
     def mouseMoveEvent(self, event):
         if self.is_over_buttons(event.pos()):
@@ -5778,12 +5203,10 @@ class Level8_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(0.5)
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, 0.5)
 
             if self.last_time is not None:
                 delta_time = timestamp - self.last_time
@@ -5808,6 +5231,7 @@ class Level8_Screen(QWidget):
             self.air_start_time = timestamp
 
         if event.type() == QTabletEvent.TabletPress:
+            self.stroke_buffer.pen_down()
             if self.last_pen_up_time is not None:
                 self.air_time += (timestamp - self.last_pen_up_time)
                 self.last_pen_up_time = None
@@ -5818,9 +5242,7 @@ class Level8_Screen(QWidget):
             self.paper_start_time = timestamp
             self.last_time = timestamp
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(event.pressure())
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, event.pressure())
 
         elif event.type() == QTabletEvent.TabletMove and self.last_point and self.is_drawing and self.user_drawing is not None:
             painter = QPainter(self.user_drawing)
@@ -5829,12 +5251,10 @@ class Level8_Screen(QWidget):
             painter.drawLine(self.last_point, event.pos())
             painter.end()
 
+            self.update(segment_rect(self.last_point, event.pos(), pen.widthF()))
             self.last_point = event.pos()
-            self.update()
 
-            self.pen_positions.append((event.pos().x(), event.pos().y()))
-            self.pen_timestamps.append(timestamp)
-            self.pressure_readings.append(event.pressure())
+            self.stroke_buffer.append(event.pos().x(), event.pos().y(), timestamp, event.pressure())
 
             if self.last_time is not None:
                 delta_time = timestamp - self.last_time
@@ -5860,6 +5280,14 @@ class Name_Screen(QWidget):
         self.setMinimumSize(2000, 1100)
         self.resize(2000, 1100)
 
+        # Load TensorFlow and the models while the player types their name
+        model_folder = r"C:\Users\Hooria\PycharmProjects\Project4\.venv"
+        self.model_warm_up = model_registry.warm_up_in_background([
+            model_registry.register_parkinsons_detector(
+                os.path.join(model_folder, 'best_parkinsons_model.keras'), (128, 128)),
+            model_registry.register_alzheimers_model(model_folder)
+        ])
+
         # Background setup
         self.bg_label = QLabel(self)
         self.bg_label.setScaledContents(True)
@@ -6024,6 +5452,9 @@ class MainMenuScreen(QWidget):
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    # Queued sessions first, so their rows are in the journals that flush_all writes
+    app.aboutToQuit.connect(persistence_worker.drain_all)
+    app.aboutToQuit.connect(results_journal.flush_all)
     window = MainMenuScreen()
     window.show()
     sys.exit(app.exec_())
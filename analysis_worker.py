@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+
+class Stopwatch:
+    """Accumulates wall-clock time per named stage."""
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.timings)
+
+
+class AnalysisSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+
+
+class AnalysisTask(QRunnable):
+    """
+    Runs the end-of-level analysis stages on a worker thread.
+
+    Each stage is a (label, callable) pair. Stages run in order; cancellation is
+    checked between stages, so a stage that has started always runs to completion.
+    The finished signal carries the return value of every stage and the stopwatch
+    breakdown of where the time went.
+    """
+
+    def __init__(self, stages, stopwatch=None):
+        super().__init__()
+        self.stages = list(stages)
+        self.stopwatch = stopwatch or Stopwatch()
+        self.signals = AnalysisSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        results = {}
+        error = None
+        total = len(self.stages)
+
+        with self.stopwatch.measure("Total"):
+            for index, (label, stage) in enumerate(self.stages):
+                if self.is_cancelled():
+                    self.signals.cancelled.emit()
+                    return
+
+                self.signals.progress.emit(int(index * 100 / total), label)
+
+                try:
+                    with self.stopwatch.measure(label):
+                        results[label] = stage()
+                except Exception as e:
+                    error = f"{label}: {e}"
+                    break
+
+        if self.is_cancelled():
+            self.signals.cancelled.emit()
+            return
+
+        self.signals.progress.emit(100, "Done")
+        self.signals.finished.emit({
+            'results': results,
+            'timings': self.stopwatch.snapshot(),
+            'error': error
+        })
+
+
+_analysis_pool = None
+
+
+def analysis_pool():
+    """Dedicated pool for end-of-level analysis, separate from QThreadPool.globalInstance()."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        _analysis_pool = QThreadPool()
+        _analysis_pool.setMaxThreadCount(1)
+    return _analysis_pool
+
+
+def run_analysis(parent, stages, on_finished, on_cancelled, stopwatch=None,
+                 label_text="Analyzing your drawing..."):
+    """
+    Start an AnalysisTask and show a progress dialog over the parent widget.
+
+    The dialog's cancel button is labelled "Home"; pressing it (or closing the dialog)
+    cancels the task and calls on_cancelled(). Otherwise on_finished(result) is called
+    on the GUI thread once every stage has run.
+
+    Returns:
+        AnalysisTask: The running task
+    """
+    task = AnalysisTask(stages, stopwatch)
+
+    dialog = QProgressDialog(label_text, "Home", 0, 100, parent)
+    dialog.setWindowTitle("Please Wait")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(0)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.setFixedSize(700, 200)
+    dialog.setStyleSheet("""
+        QLabel {
+            color: Black;
+            font-weight: bold;
+            font-size: 25px;
+        }
+        QPushButton {
+            color: white;
+            border: none;
+            background-color: #4169E1;
+            border-radius: 15px;
+            font-weight: bold;
+            font-size: 18px;
+            min-width: 150px;
+            min-height: 40px;
+        }
+    """)
+
+    def close_dialog():
+        dialog.canceled.disconnect()
+        dialog.close()
+        dialog.deleteLater()
+
+    def handle_progress(value, stage_label):
+        dialog.setValue(value)
+        dialog.setLabelText(f"{label_text}\n{stage_label}")
+
+    def handle_finished(result):
+        if task.is_cancelled():
+            return
+        close_dialog()
+        on_finished(result)
+
+    def handle_cancel_request():
+        task.cancel()
+        close_dialog()
+        on_cancelled()
+
+    task.signals.progress.connect(handle_progress)
+    task.signals.finished.connect(handle_finished)
+    dialog.canceled.connect(handle_cancel_request)
+
+    dialog.setValue(0)
+    dialog.show()
+    analysis_pool().start(task)
+    return task
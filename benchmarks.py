@@ -0,0 +1,1916 @@
+"""
+Performance checks for the drawing analysis pipeline.
+
+Usage:
+    python benchmarks.py preprocess [--sizes 1 2 4 8 16 32 64] [--resolution 1000]
+    python benchmarks.py startup [--runs 5] [--output startup.json] [--baseline startup.json]
+    python benchmarks.py latency --model best_parkinsons_model.keras [--repeats 20]
+    python benchmarks.py metrics [--sizes 1000 10000 100000]
+    python benchmarks.py images [--resolution 800] [--repeats 5]
+    python benchmarks.py results [--sizes 100 1000 10000 50000] [--legacy-max 10000]
+    python benchmarks.py buffer [--sizes 1000 10000 100000]
+    python benchmarks.py paint [--samples 400] [--rate 200]
+    python benchmarks.py cake [--samples 3000]
+    python benchmarks.py wolf [--seconds 3]
+    python benchmarks.py composite [--width 2000] [--height 1100]
+    python benchmarks.py stages --model best_parkinsons_model.keras [--output stages.json] [--baseline stages.json]
+"""
+import argparse
+import base64
+import glob
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_FOLDER = os.path.join(REPO_ROOT, "city_img")
+
+
+def synthetic_spiral(size=1000, seed=0):
+    """Draw a hand-drawn looking spiral as an (size, size, 3) uint8 RGB array."""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (size, size), 'white')
+    draw = ImageDraw.Draw(image)
+
+    turns = np.linspace(0, 8 * math.pi, 2000)
+    radius = turns * size / (18 * math.pi)
+    jitter = rng.normal(0, size / 400, (2, turns.size))
+    xs = size / 2 + radius * np.cos(turns) + jitter[0]
+    ys = size / 2 + radius * np.sin(turns) + jitter[1]
+
+    draw.line(list(zip(xs.tolist(), ys.tolist())), fill='black', width=max(1, size // 300))
+    return np.array(image)
+
+
+def sample_images(limit=None):
+    """Load the bundled sample drawings as RGB arrays."""
+    paths = sorted(glob.glob(os.path.join(SAMPLE_FOLDER, "*.png")))[:limit]
+    return [(os.path.basename(path), np.array(Image.open(path).convert('RGB'))) for path in paths]
+
+
+def reference_preprocess(image_array):
+    """
+    The original PIL preprocessing chain, kept verbatim as the parity reference:
+    remove_background_and_isolate_drawing followed by enhance_line_drawing.
+    """
+    gray_image = Image.fromarray(image_array).convert('L')
+    blurred = gray_image.filter(ImageFilter.GaussianBlur(radius=1.5))
+    gray_array = np.array(blurred)
+
+    hist, _ = np.histogram(gray_array.flatten(), bins=256, range=(0, 256))
+
+    total_pixels = gray_array.size
+    current_max = 0
+    threshold = 0
+    sum_total = np.sum(np.arange(256) * hist)
+    sum_background = 0
+    weight_background = 0
+
+    for i in range(256):
+        weight_background += hist[i]
+        if weight_background == 0:
+            continue
+
+        weight_foreground = total_pixels - weight_background
+        if weight_foreground == 0:
+            break
+
+        sum_background += i * hist[i]
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_total - sum_background) / weight_foreground
+
+        between_class_variance = weight_background * weight_foreground * (
+                mean_background - mean_foreground) ** 2
+
+        if between_class_variance > current_max:
+            current_max = between_class_variance
+            threshold = i
+
+    binary_array = (gray_array > threshold).astype(np.uint8) * 255
+    binary_image = Image.fromarray(binary_array, mode='L')
+    cleaned = binary_image.filter(ImageFilter.MedianFilter(size=3))
+    edge_enhanced = cleaned.filter(ImageFilter.EDGE_ENHANCE_MORE)
+
+    cleaned_array = np.array(cleaned)
+    edge_array = np.array(edge_enhanced)
+
+    combined_array = np.logical_or(cleaned_array > 128, edge_array > 128).astype(np.uint8) * 255
+    inverted_array = 255 - combined_array
+    final_image_array = np.array(Image.fromarray(inverted_array, mode='L').convert('RGB'))
+
+    pil_image = Image.fromarray(final_image_array)
+    enhanced = ImageEnhance.Contrast(pil_image).enhance(2.0)
+    sharpened = ImageEnhance.Sharpness(enhanced).enhance(1.5)
+    edge_enhanced = sharpened.filter(ImageFilter.EDGE_ENHANCE)
+    unsharp_enhanced = edge_enhanced.filter(ImageFilter.UnsharpMask(radius=1, percent=150, threshold=3))
+    return np.array(unsharp_enhanced)
+
+
+def _best_of(function, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_preprocess(args):
+    from parkinsons_detector import ImagePreprocessor
+
+    print("Parity against the original PIL chain")
+    cases = sample_images(args.samples) + [
+        (f"synthetic_{seed}", synthetic_spiral(args.resolution, seed)) for seed in range(3)
+    ]
+    mismatches = 0
+    for name, image in cases:
+        expected = reference_preprocess(image)
+        actual = ImagePreprocessor.isolate_drawings([image])[0]
+        differing = int(np.count_nonzero(expected != actual))
+        mismatches += differing > 0
+        print(f"  {name:<40} {'ok' if differing == 0 else f'{differing} pixels differ'}")
+
+    print(f"\nPer-image time at {args.resolution}x{args.resolution} (best of {args.repeats})")
+    print(f"  {'batch':>5} {'reference ms':>13} {'engine ms':>10} {'speedup':>8}")
+    for batch_size in args.sizes:
+        stack = np.stack([synthetic_spiral(args.resolution, seed) for seed in range(batch_size)])
+
+        reference_time = _best_of(lambda: [reference_preprocess(image) for image in stack], args.repeats)
+        engine_time = _best_of(lambda: ImagePreprocessor.isolate_drawings(stack), args.repeats)
+
+        reference_ms = reference_time * 1000 / batch_size
+        engine_ms = engine_time * 1000 / batch_size
+        print(f"  {batch_size:>5} {reference_ms:>13.2f} {engine_ms:>10.2f} {reference_ms / engine_ms:>7.1f}x")
+
+    return 1 if mismatches else 0
+
+
+def write_json(path, data):
+    with open(path, 'w') as output_file:
+        json.dump(data, output_file, indent=2, sort_keys=True)
+
+
+def compare_metrics(current, baseline, tolerance, min_value=0.0):
+    """
+    Find metrics that grew by more than tolerance (a fraction) over the baseline.
+
+    Metrics whose baseline and current values are both below min_value are ignored,
+    so tiny timings do not trip the check on noise.
+
+    Returns:
+        list: (name, baseline value, current value) for every regression
+    """
+    regressions = []
+    for name, value in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None or (base < min_value and value < min_value):
+            continue
+        if value > base * (1 + tolerance):
+            regressions.append((name, base, value))
+    return regressions
+
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+FIRST_FRAME_PROBE = r"""
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+
+app = QApplication(sys.argv[:1])
+import UserInterface
+imported = time.perf_counter()
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and watched is window:
+            print("FIRST_FRAME", imported - start, time.perf_counter() - start, time.time(), flush=True)
+            QTimer.singleShot(0, app.quit)
+        return False
+
+
+window = UserInterface.MainMenuScreen()
+probe = FirstPaint()
+window.installEventFilter(probe)
+window.show()
+QTimer.singleShot(60000, app.quit)
+app.exec_()
+"""
+
+
+def measure_import_times():
+    """Cumulative import time in ms of UserInterface and each module it imports directly."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import UserInterface"],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        # importtime indents nested imports by two spaces per level
+        if match and len(match.group(3)) <= 3:
+            times[match.group(4)] = int(match.group(2)) / 1000
+    return times
+
+
+def measure_first_frame():
+    """Time from process launch, and from interpreter start, to the first MainMenuScreen paint."""
+    launched = time.time()
+    completed = subprocess.run([sys.executable, "-c", FIRST_FRAME_PROBE, REPO_ROOT],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith("FIRST_FRAME"):
+            _, import_seconds, frame_seconds, painted_at = line.split()
+            return {
+                'import_ms': float(import_seconds) * 1000,
+                'first_frame_ms': float(frame_seconds) * 1000,
+                'process_first_frame_ms': (float(painted_at) - launched) * 1000,
+            }
+    raise RuntimeError(f"Startup probe did not paint a frame:\n{completed.stderr[-2000:]}")
+
+
+def run_startup(args):
+    import_runs = [measure_import_times() for _ in range(args.runs)]
+    frame_runs = [measure_first_frame() for _ in range(args.runs)]
+
+    metrics = {}
+    for name in frame_runs[0]:
+        metrics[name] = float(np.median([run[name] for run in frame_runs]))
+    for module in import_runs[0]:
+        metrics[f"import:{module}"] = float(np.median([run.get(module, 0.0) for run in import_runs]))
+
+    print(f"Startup over {args.runs} runs (median)")
+    print(f"  time to first frame           {metrics['first_frame_ms']:>9.1f} ms")
+    print(f"  including interpreter launch  {metrics['process_first_frame_ms']:>9.1f} ms")
+    print(f"  importing UserInterface       {metrics['import_ms']:>9.1f} ms")
+    print("  slowest imports:")
+    slowest = sorted((name for name in metrics if name.startswith("import:")), key=metrics.get, reverse=True)
+    for name in slowest[:args.top]:
+        print(f"    {name[len('import:'):]:<30} {metrics[name]:>9.1f} ms")
+
+    if args.output:
+        write_json(args.output, {'metrics': metrics, 'runs': args.runs})
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['metrics']
+        regressions = compare_metrics(metrics, baseline, args.tolerance, args.min_ms)
+        for name, base, value in regressions:
+            print(f"REGRESSION {name}: {base:.1f} ms -> {value:.1f} ms")
+        if regressions:
+            return 1
+        print("No startup regressions against the baseline")
+
+    return 0
+
+
+def _latency_summary(latencies_ms, first_ms):
+    return {
+        'first_call_ms': first_ms,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+
+def _time_calls(function, inputs, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for tensor in inputs:
+            start = time.perf_counter()
+            function(tensor)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_latency(args):
+    from parkinsons_detector import ParkinsonsDetector
+
+    detector = ParkinsonsDetector(model_path=args.model, image_size=(args.image_size, args.image_size),
+                                  warm_up=False)
+    if detector.model is None:
+        print(f"Could not load {args.model}")
+        return 1
+
+    paths = sorted(glob.glob(os.path.join(SAMPLE_FOLDER, "*.png")))
+    inputs = [tensor for tensor in (detector.preprocess_image(path) for path in paths) if tensor is not None]
+    if not inputs:
+        print(f"No usable sample images in {SAMPLE_FOLDER}")
+        return 1
+
+    def keras_predict(tensor):
+        return detector.model.predict(tensor, verbose=0)
+
+    start = time.perf_counter()
+    keras_predict(inputs[0])
+    predict_first = (time.perf_counter() - start) * 1000
+    before = _latency_summary(_time_calls(keras_predict, inputs, args.repeats), predict_first)
+
+    start = time.perf_counter()
+    detector.warm_up()
+    warm_up_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    detector._forward(inputs[0])
+    compiled_first = (time.perf_counter() - start) * 1000
+    after = _latency_summary(_time_calls(detector._forward, inputs, args.repeats), compiled_first)
+
+    print(f"Single-image forward latency over {len(inputs)} samples x {args.repeats} repeats")
+    print(f"  {'':<24} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"  {'model.predict':<24} {before['first_call_ms']:>9.2f} {before['p50_ms']:>8.2f} {before['p99_ms']:>8.2f}")
+    print(f"  {'compiled (after warm-up)':<24} {after['first_call_ms']:>9.2f} {after['p50_ms']:>8.2f} {after['p99_ms']:>8.2f}")
+    print(f"  warm-up at load time took {warm_up_ms:.1f} ms")
+
+    if args.output:
+        write_json(args.output, {'model_predict': before, 'compiled': after, 'warm_up_ms': warm_up_ms})
+        print(f"\nWrote {args.output}")
+
+    return 0
+
+
+class ReferenceKinematics:
+    """The original per-sample DrawingMetricsLogger loops, kept verbatim as the parity reference."""
+
+    @staticmethod
+    def kinematics(pen_positions, pen_timestamps):
+        distances, speeds, accelerations = [], [], []
+
+        if len(pen_positions) > 1:
+            for i in range(1, len(pen_positions)):
+                dx = pen_positions[i][0] - pen_positions[i - 1][0]
+                dy = pen_positions[i][1] - pen_positions[i - 1][1]
+                dist = math.hypot(dx, dy)
+                dt = pen_timestamps[i] - pen_timestamps[i - 1]
+
+                if dt > 0:
+                    speed = dist / dt
+                    distances.append(dist)
+                    speeds.append(speed)
+
+            if len(speeds) > 1:
+                for i in range(1, len(speeds)):
+                    delta_t = pen_timestamps[i] - pen_timestamps[i - 1]
+                    if delta_t > 0:
+                        acc = (speeds[i] - speeds[i - 1]) / delta_t
+                        accelerations.append(acc)
+
+        return distances, speeds, accelerations
+
+    @staticmethod
+    def mean_jerk(accelerations, pen_timestamps):
+        jerks = []
+        for i in range(len(accelerations) - 1):
+            if i + 2 < len(pen_timestamps):
+                dt = pen_timestamps[i + 2] - pen_timestamps[i + 1]
+                if dt > 0:
+                    jerk = (accelerations[i + 1] - accelerations[i]) / dt
+                    jerks.append(jerk)
+        return np.mean(jerks) if jerks else 0
+
+    @staticmethod
+    def average_cisp(pen_positions):
+        cisp_values = []
+        if len(pen_positions) >= 3:
+            for i in range(1, len(pen_positions) - 1):
+                A = np.array(pen_positions[i - 1])
+                B = np.array(pen_positions[i])
+                C = np.array(pen_positions[i + 1])
+
+                v1 = B - A
+                v2 = C - B
+                norm_v1, norm_v2 = np.linalg.norm(v1), np.linalg.norm(v2)
+
+                if norm_v1 == 0 or norm_v2 == 0:
+                    continue
+
+                cosine_angle = np.clip(np.dot(v1, v2) / (norm_v1 * norm_v2), -1, 1)
+                angle = math.acos(cosine_angle)
+                d_sum = norm_v1 + norm_v2
+                cisp = abs(angle) / d_sum if d_sum != 0 else 0
+                cisp_values.append(cisp)
+
+        return np.mean(cisp_values) if cisp_values else 0
+
+    @classmethod
+    def metrics(cls, pen_positions, pen_timestamps):
+        distances, speeds, accelerations = cls.kinematics(pen_positions, pen_timestamps)
+        return {
+            'mean_speed': np.mean(speeds) if speeds else 0,
+            'mean_acceleration': np.mean(accelerations) if accelerations else 0,
+            'path_length': sum(distances),
+            'mean_jerk': cls.mean_jerk(accelerations, pen_timestamps),
+            'avg_cisp': cls.average_cisp(pen_positions),
+        }
+
+
+class ReferenceModelFeatures:
+    """The level screens' calculate_drawing_metrics loops, kept verbatim as the parity reference."""
+
+    @staticmethod
+    def chained(state):
+        if not state.pen_positions or not state.pen_timestamps:
+            return None
+
+        try:
+            import numpy as np
+
+            positions = np.array(state.pen_positions)
+            timestamps = np.array(state.pen_timestamps)
+            pressures = np.array(state.pressure_readings) if state.pressure_readings else np.ones(len(positions))
+
+            total_time = state.end_time - state.start_time if state.start_time and state.end_time else 0
+            air_time = state.air_time
+            paper_time = state.paper_time
+
+            velocities = []
+            accelerations = []
+            jerks = []
+
+            if len(positions) > 1:
+                for i in range(1, len(positions)):
+                    dt = timestamps[i] - timestamps[i - 1]
+                    if dt > 0:
+                        dx = positions[i][0] - positions[i - 1][0]
+                        dy = positions[i][1] - positions[i - 1][1]
+                        velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
+                        velocities.append(velocity)
+
+                        if len(velocities) > 1:
+                            dv = velocities[-1] - velocities[-2]
+                            acceleration = dv / dt
+                            accelerations.append(acceleration)
+
+                            if len(accelerations) > 1:
+                                da = accelerations[-1] - accelerations[-2]
+                                jerk = da / dt
+                                jerks.append(jerk)
+
+            mean_speed = np.mean(velocities) if velocities else 0
+            mean_acc = np.mean(accelerations) if accelerations else 0
+            mean_jerk = np.mean(jerks) if jerks else 0
+
+            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
+            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
+
+            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
+            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
+
+            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
+
+            if len(positions) > 1:
+                center_x = np.mean(positions[:, 0])
+                center_y = np.mean(positions[:, 1])
+                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
+                disp_index = np.std(distances)
+            else:
+                disp_index = 0
+
+            features = [
+                total_time,
+                air_time,
+                paper_time,
+                mean_speed,
+                mean_acc,
+                pressure_mean,
+                pressure_var,
+                state.pendown_count,
+                max_x,
+                max_y,
+                gmrtp,
+                mean_jerk,
+                disp_index
+            ]
+
+            return features
+
+        except Exception as e:
+            return None
+
+    @staticmethod
+    def indexed(state):
+        if not state.pen_positions or not state.pen_timestamps:
+            return None
+
+        try:
+            import numpy as np
+            positions = np.array(state.pen_positions)
+            timestamps = np.array(state.pen_timestamps)
+            pressures = np.array(state.pressure_readings) if state.pressure_readings else np.ones(len(positions))
+
+            total_time = state.end_time - state.start_time if state.start_time and state.end_time else 0
+
+            velocities = []
+            for i in range(1, len(positions)):
+                dt = timestamps[i] - timestamps[i - 1]
+                if dt > 0:
+                    dx = positions[i][0] - positions[i - 1][0]
+                    dy = positions[i][1] - positions[i - 1][1]
+                    velocity = np.sqrt(dx ** 2 + dy ** 2) / dt
+                    velocities.append(velocity)
+
+            accelerations = []
+            for i in range(1, len(velocities)):
+                dt = timestamps[i + 1] - timestamps[i]
+                if dt > 0:
+                    dv = velocities[i] - velocities[i - 1]
+                    accelerations.append(dv / dt)
+
+            jerks = []
+            for i in range(1, len(accelerations)):
+                dt = timestamps[i + 2] - timestamps[i + 1]
+                if dt > 0:
+                    da = accelerations[i] - accelerations[i - 1]
+                    jerks.append(da / dt)
+
+            mean_speed = np.mean(velocities) if velocities else 0
+            mean_acc = np.mean(accelerations) if accelerations else 0
+            mean_jerk = np.mean(jerks) if jerks else 0
+            pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
+            pressure_var = np.var(pressures) if len(pressures) > 0 else 0
+            max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
+            max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
+            gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
+
+            if len(positions) > 1:
+                center_x = np.mean(positions[:, 0])
+                center_y = np.mean(positions[:, 1])
+                distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
+                disp_index = np.std(distances)
+            else:
+                disp_index = 0
+
+            features = [total_time, state.air_time, state.paper_time, mean_speed, mean_acc,
+                        pressure_mean, pressure_var, state.pendown_count, max_x, max_y,
+                        gmrtp, mean_jerk, disp_index]
+
+            return features
+        except:
+            return None
+
+
+def synthetic_session(samples, seed=0, integer=True):
+    """
+    Pen samples shaped like a tablet session: a jittered spiral with pauses and repeated timestamps.
+
+    Returns:
+        tuple: (list of (x, y), list of timestamps)
+    """
+    rng = np.random.default_rng(seed)
+    turns = np.linspace(0, 12 * math.pi, samples)
+    xs = 400 + turns * 12 * np.cos(turns) + rng.normal(0, 1.5, samples)
+    ys = 400 + turns * 12 * np.sin(turns) + rng.normal(0, 1.5, samples)
+
+    # Held pens repeat a position; coalesced events repeat a timestamp
+    held = rng.random(samples) < 0.05
+    xs[1:][held[1:]] = xs[:-1][held[1:]]
+    ys[1:][held[1:]] = ys[:-1][held[1:]]
+    steps = rng.choice([0.0, 0.004, 0.008, 0.016], size=samples, p=[0.1, 0.3, 0.4, 0.2])
+    timestamps = (1000.0 + np.cumsum(steps)).tolist()
+
+    if integer:
+        return list(zip(np.round(xs).astype(int).tolist(), np.round(ys).astype(int).tolist())), timestamps
+    return list(zip(xs.tolist(), ys.tolist())), timestamps
+
+
+def engine_metrics(logger, pen_positions, pen_timestamps):
+    from drawing_metrics_logger import as_sample_arrays
+
+    positions, timestamps = as_sample_arrays(pen_positions, pen_timestamps)
+    distances, speeds, accelerations = logger._calculate_kinematics(positions, timestamps)
+    return {
+        'mean_speed': np.mean(speeds) if speeds.size else 0,
+        'mean_acceleration': np.mean(accelerations) if accelerations.size else 0,
+        'path_length': logger._calculate_gmrtp(distances, 1),
+        'mean_jerk': logger._calculate_mean_jerk(accelerations, timestamps),
+        'avg_cisp': logger._calculate_average_cisp(positions),
+    }
+
+
+def streaming_metrics(pen_positions, pen_timestamps, pressure_readings):
+    from drawing_metrics_logger import StreamingMetricsAccumulator
+
+    accumulator = StreamingMetricsAccumulator()
+    for position, timestamp, pressure in zip(pen_positions, pen_timestamps, pressure_readings):
+        accumulator.add_sample(position, timestamp, pressure)
+    return accumulator
+
+
+def run_metrics(args):
+    from drawing_metrics_logger import DrawingMetricsLogger, session_metrics
+
+    # The metric helpers are static, so no results store or journal is opened
+    logger = DrawingMetricsLogger
+
+    print("Parity against the original per-sample loops")
+    cases = [(f"{kind} {samples} samples seed {seed}", synthetic_session(samples, seed, kind == 'int'))
+             for kind in ('int', 'float') for samples in (0, 1, 2, 3, 5, 1000) for seed in range(3)]
+    cases.append(("all timestamps equal", ([(i, i * i) for i in range(50)], [5.0] * 50)))
+    cases.append(("pen never moves", ([(3, 4)] * 50, [float(i) for i in range(50)])))
+
+    mismatches = 0
+    for name, (positions, timestamps) in cases:
+        expected = ReferenceKinematics.metrics(positions, timestamps)
+        actual = engine_metrics(logger, positions, timestamps)
+        differing = [key for key in expected if expected[key] != actual[key]]
+        mismatches += bool(differing)
+        if differing or args.verbose:
+            print(f"  {name:<32} {'ok' if not differing else 'differs: ' + ', '.join(differing)}")
+    print(f"  {len(cases) - mismatches}/{len(cases)} sessions identical")
+
+    print("\nStreaming accumulator against calculate_metrics (rtol 1e-9)")
+    streaming_mismatches = 0
+    for name, (positions, timestamps) in cases:
+        pressures = np.random.default_rng(len(positions)).uniform(0.1, 1.0, len(positions)).tolist()
+        end_time = timestamps[-1] if timestamps else 0
+        expected = session_metrics(positions, timestamps, pressures, 1.0, end_time, 0.0, 0.0, 0)
+        actual = streaming_metrics(positions, timestamps, pressures).finalize(1.0, end_time, 0.0, 0.0, 0)
+        differing = [key for key in expected if not np.isclose(expected[key], actual[key], rtol=1e-9, atol=0)]
+        streaming_mismatches += bool(differing)
+        if differing or args.verbose:
+            print(f"  {name:<32} {'ok' if not differing else 'differs: ' + ', '.join(differing)}")
+    print(f"  {len(cases) - streaming_mismatches}/{len(cases)} sessions match")
+    mismatches += streaming_mismatches
+
+    print("\nModel feature vector against the level screens' loops")
+    from types import SimpleNamespace
+    from drawing_metrics_logger import CHAINED_KINEMATICS, INDEXED_KINEMATICS, model_features
+    variants = ((CHAINED_KINEMATICS, ReferenceModelFeatures.chained),
+                (INDEXED_KINEMATICS, ReferenceModelFeatures.indexed))
+    feature_mismatches = 0
+    for name, (positions, timestamps) in cases:
+        if not positions:
+            continue
+        state = SimpleNamespace(pen_positions=positions, pen_timestamps=timestamps,
+                                pressure_readings=np.random.default_rng(1).uniform(0.1, 1.0, len(positions)).tolist(),
+                                start_time=timestamps[0], end_time=timestamps[-1], air_time=1.5, paper_time=2.5,
+                                pendown_count=4)
+        for kinematics, reference in variants:
+            expected = reference(state)
+            actual = model_features(state.pen_positions, state.pen_timestamps, state.pressure_readings,
+                                    state.start_time, state.end_time, state.air_time, state.paper_time,
+                                    state.pendown_count, kinematics)
+            same = expected is not None and expected == actual
+            feature_mismatches += not same
+            if not same or args.verbose:
+                print(f"  {name:<32} {kinematics:<8} {'ok' if same else 'differs'}")
+    print(f"  {2 * sum(1 for _, (positions, _) in cases if positions) - feature_mismatches} vectors identical, "
+          f"{feature_mismatches} differ")
+    mismatches += feature_mismatches
+
+    print("\nsession_features against session_metrics and model_features called separately")
+    from drawing_metrics_logger import session_features
+    combined_mismatches = 0
+    for name, (positions, timestamps) in cases:
+        if not positions:
+            continue
+        session = (positions, timestamps, np.random.default_rng(2).uniform(0.1, 1.0, len(positions)).tolist(),
+                   timestamps[0], timestamps[-1], 1.5, 2.5, 4)
+        for kinematics, _ in variants:
+            expected = (session_metrics(*session), model_features(*session, kinematics))
+            same = session_features(*session, kinematics=kinematics) == expected
+            combined_mismatches += not same
+            if not same or args.verbose:
+                print(f"  {name:<32} {kinematics:<8} {'ok' if same else 'differs'}")
+    print(f"  {2 * sum(1 for _, (positions, _) in cases if positions) - combined_mismatches} sessions identical, "
+          f"{combined_mismatches} differ")
+    mismatches += combined_mismatches
+
+    print(f"\nEnd-of-level compute: level loop plus calculate_metrics, the two builders separately, "
+          f"and session_features (best of {args.repeats})")
+    print(f"  {'samples':>8} {'kind':>6} {'before ms':>10} {'separate ms':>12} {'combined ms':>12} "
+          f"{'vs before':>10} {'vs separate':>12}")
+    for samples in args.sizes:
+        for kind in ('int', 'float'):
+            positions, timestamps = synthetic_session(samples, integer=kind == 'int')
+            state = SimpleNamespace(pen_positions=positions, pen_timestamps=timestamps,
+                                    pressure_readings=[0.5] * samples, start_time=timestamps[0],
+                                    end_time=timestamps[-1], air_time=1.5, paper_time=2.5, pendown_count=4)
+            session = (positions, timestamps, state.pressure_readings, state.start_time, state.end_time, 1.5, 2.5, 4)
+            before_time = _best_of(lambda: (ReferenceModelFeatures.chained(state),
+                                            session_metrics(*session)), args.repeats)
+            separate_time = _best_of(lambda: (session_metrics(*session), model_features(*session)), args.repeats)
+            kernel_time = _best_of(lambda: session_features(*session), args.repeats)
+            print(f"  {samples:>8} {kind:>6} {before_time * 1000:>10.2f} {separate_time * 1000:>12.2f} "
+                  f"{kernel_time * 1000:>12.2f} {before_time / kernel_time:>9.1f}x "
+                  f"{separate_time / kernel_time:>11.1f}x")
+
+    print(f"\nTime per session (best of {args.repeats})")
+    print(f"  {'samples':>8} {'loops ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for samples in args.sizes:
+        positions, timestamps = synthetic_session(samples)
+        loop_time = _best_of(lambda: ReferenceKinematics.metrics(positions, timestamps), args.repeats)
+        engine_time = _best_of(lambda: engine_metrics(logger, positions, timestamps), args.repeats)
+        print(f"  {samples:>8} {loop_time * 1000:>10.2f} {engine_time * 1000:>10.2f} "
+              f"{loop_time / engine_time:>7.1f}x")
+
+    print(f"\nStreaming accumulator (best of {args.repeats})")
+    print(f"  {'samples':>8} {'us/sample':>10} {'finalize us':>12}")
+    for samples in args.sizes:
+        positions, timestamps = synthetic_session(samples)
+        pressures = [0.5] * samples
+        feed_time = _best_of(lambda: streaming_metrics(positions, timestamps, pressures), args.repeats)
+        accumulator = streaming_metrics(positions, timestamps, pressures)
+        finalize_time = _best_of(lambda: accumulator.finalize(1.0, 2.0, 0.0, 0.0, 0), args.repeats)
+        print(f"  {samples:>8} {feed_time * 1e6 / samples:>10.2f} {finalize_time * 1e6:>12.2f}")
+
+    return 1 if mismatches else 0
+
+
+def legacy_process_and_save_image(drawing_image, processed_path, excel_img_path, temp_path):
+    """The original round-trip pipeline: temp PNG, standardize, processed PNG, re-open for the thumbnail."""
+    drawing_image.save(temp_path)
+
+    gray = Image.open(temp_path).convert('L')
+    img_array = np.array(gray).astype(np.float32)
+    normalized = img_array / 255.0
+    mean = normalized.mean()
+    std = normalized.std() or 1
+    standardized = (normalized - mean) / std
+    rescaled = ((standardized - standardized.min()) /
+                (standardized.max() - standardized.min()) * 255).astype(np.uint8)
+    Image.fromarray(rescaled).save(processed_path)
+
+    thumbnail_img = Image.open(processed_path)
+    thumbnail_img.thumbnail((150, 75), Image.LANCZOS)
+    thumbnail_img.save(excel_img_path)
+    os.remove(temp_path)
+
+    dispersion = np.array(Image.open(processed_path).convert("L"))
+    return np.count_nonzero(dispersion < 255) / dispersion.size
+
+
+def run_images(args):
+    import tempfile
+    from PyQt5.QtGui import QImage, QPixmap
+    from PyQt5.QtWidgets import QApplication
+    from drawing_metrics_logger import DrawingMetricsLogger
+
+    # QPixmaps need a GUI application
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    folder = tempfile.mkdtemp(prefix="image_bench_")
+    logger = DrawingMetricsLogger(folder, backend="excel")
+
+    def drawing(seed, image_format):
+        rgb = np.ascontiguousarray(synthetic_spiral(args.resolution, seed))
+        image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format_RGB888)
+        return image.convertToFormat(image_format)
+
+    def translucent_drawing(seed, image_format):
+        """Coloured ink on a transparent page with soft edges, like a level's drawing layer."""
+        rgb = synthetic_spiral(args.resolution, seed)
+        ink = 255 - rgb[:, :, 0]
+        rgba = np.zeros(rgb.shape[:2] + (4,), dtype=np.uint8)
+        rgba[:, :, 0] = 200
+        rgba[:, :, 1] = np.linspace(0, 255, rgb.shape[1], dtype=np.uint8)
+        rgba[:, :, 2] = 40
+        # Alpha ramps across the page, so every level of translucency is covered
+        rgba[:, :, 3] = np.maximum(ink, np.linspace(0, 255, rgb.shape[0], dtype=np.uint8)[:, None] // 2)
+        image = QImage(rgba.data, rgba.shape[1], rgba.shape[0], rgba.strides[0], QImage.Format_RGBA8888)
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        return QPixmap.fromImage(image) if image_format == 'pixmap' else image.convertToFormat(image_format)
+
+    print("Parity against the round-trip pipeline")
+    mismatches = 0
+    formats = [('RGB32', drawing, QImage.Format_RGB32), ('ARGB32', drawing, QImage.Format_ARGB32),
+               ('ARGB32_Premultiplied', drawing, QImage.Format_ARGB32_Premultiplied),
+               ('translucent ARGB32', translucent_drawing, QImage.Format_ARGB32),
+               ('translucent Premultiplied', translucent_drawing, QImage.Format_ARGB32_Premultiplied),
+               ('translucent QPixmap', translucent_drawing, 'pixmap')]
+    for seed in range(3):
+        for format_name, make_drawing, image_format in formats:
+            image = make_drawing(seed, image_format)
+            legacy_paths = [os.path.join(folder, f"legacy_{name}.png") for name in ('processed', 'thumb', 'temp')]
+            expected_dispersion = legacy_process_and_save_image(image, *legacy_paths)
+
+            processed_path, thumbnail_path = logger.process_and_save_image(image, "bench", seed, format_name)
+            dispersion = logger.calculate_dispersion_index(processed_path)
+
+            same = all(open(a, 'rb').read() == open(b, 'rb').read()
+                       for a, b in zip(legacy_paths[:2], (processed_path, thumbnail_path)))
+            same = same and dispersion == expected_dispersion
+            mismatches += not same
+            print(f"  seed {seed} {format_name:<26} {'ok' if same else 'differs'}")
+
+    image = drawing(0, QImage.Format_RGB32)
+    legacy_paths = [os.path.join(folder, f"legacy_{name}.png") for name in ('processed', 'thumb', 'temp')]
+
+    def legacy():
+        legacy_process_and_save_image(image, *legacy_paths)
+
+    def single_pass():
+        processed_path, _ = logger.process_and_save_image(image, "bench", 0, "timing")
+        logger.calculate_dispersion_index(processed_path)
+
+    legacy_ms = 1000 * _best_of(legacy, args.repeats)
+    single_pass_ms = 1000 * _best_of(single_pass, args.repeats)
+    print(f"\nProcess, save and measure one {args.resolution}x{args.resolution} drawing (best of {args.repeats})")
+    print(f"  round trips {legacy_ms:.1f} ms, single pass {single_pass_ms:.1f} ms "
+          f"({legacy_ms / single_pass_ms:.1f}x)")
+
+    return 1 if mismatches else 0
+
+
+def legacy_save_to_excel(excel_path, row_data, excel_image_path):
+    """The original per-session save: load the whole workbook, append, embed, save (without its 0.1 s sleep)."""
+    from openpyxl import load_workbook
+    from openpyxl.drawing.image import Image as XLImage
+
+    wb = load_workbook(excel_path)
+    ws = wb["Results"]
+    row = ws.max_row + 1
+    ws.append(row_data)
+    ws.row_dimensions[row].height = 60
+    ws.column_dimensions['B'].width = 25
+    xl_img = XLImage(excel_image_path)
+    xl_img.width = 150
+    xl_img.height = 75
+    xl_img.anchor = f"B{row}"
+    ws.add_image(xl_img)
+    wb.save(excel_path)
+
+
+def legacy_next_session_id(excel_path, player_name):
+    """The original session id lookup: parse the workbook and count column A."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path)
+    return len([cell.value for cell in wb["Results"]['A'] if cell.value == player_name]) + 1
+
+
+def write_results_workbook(excel_path, sessions):
+    """A Results workbook holding the given number of past sessions (rows only, written streaming)."""
+    from openpyxl import Workbook
+    from results_journal import RESULTS_HEADERS
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Results")
+    ws.append(RESULTS_HEADERS)
+    for index in range(sessions):
+        ws.append([f"player{index % 500}", None, f"Level {index % 8 + 1}"] + [float(index)] * 14 + ['Low', ''])
+    wb.save(excel_path)
+
+
+def run_results(args):
+    import tempfile
+    from drawing_metrics_logger import DrawingMetricsLogger
+    from results_index import open_index
+    from results_journal import ResultsJournal
+
+    folder = tempfile.mkdtemp(prefix="results_bench_")
+    processed_path = os.path.join(folder, "processed.png")
+    thumbnail_path = os.path.join(folder, "thumbnail.png")
+    Image.fromarray(synthetic_spiral(400)).convert('L').save(processed_path)
+    Image.open(processed_path).resize((150, 75)).save(thumbnail_path)
+
+    metrics = {name: 0.5 for name in ('total_time', 'air_time', 'paper_time', 'mean_speed', 'mean_acceleration',
+                                      'mean_pressure', 'pressure_variance', 'pendown_count', 'max_x', 'max_y',
+                                      'gmrtp', 'mean_jerk', 'avg_cisp')}
+    prediction = {'risk_level': 'Low Risk', 'interpretation': 'benchmark'}
+    legacy_row = ["bench", None, "Level 1"] + [0.5] * 14 + ['Low Risk', 'benchmark']
+
+    print(f"Per-session save latency, {args.saves} saves per size")
+    print(f"  {'sessions':>8} {'legacy ms':>10} {'journal ms':>11} {'journal max':>12} {'flush s':>8} "
+          f"{'sqlite ms':>10} {'scan id ms':>11} {'index id ms':>12} {'sqlite id ms':>13}")
+    for sessions in args.sizes:
+        excel_path = os.path.join(folder, f"results_{sessions}.xlsx")
+
+        legacy_ms = scan_ms = None
+        if sessions <= args.legacy_max:
+            write_results_workbook(excel_path, sessions)
+            legacy_ms = 1000 * _best_of(lambda: legacy_save_to_excel(excel_path, legacy_row, thumbnail_path), 1)
+            scan_ms = 1000 * _best_of(lambda: legacy_next_session_id(excel_path, "player7"), 1)
+
+        write_results_workbook(excel_path, sessions)
+        logger = DrawingMetricsLogger(folder, os.path.basename(excel_path), backend="excel")
+        # No background flusher: flush is timed on its own below
+        logger.journal = ResultsJournal(excel_path, auto_flush=False, index=open_index(excel_path))
+        index_ms = 1000 * _best_of(lambda: logger._count_sessions("player7"), 20)
+
+        latencies = []
+        for _ in range(args.saves):
+            start = time.perf_counter()
+            logger.save_to_excel("bench", "Level 1", metrics, processed_path, thumbnail_path, prediction)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        flushed = logger.flush_results()
+        flush_s = time.perf_counter() - start
+        assert flushed == args.saves
+
+        # The SQLite store takes over the same workbook's rows, then saves the same sessions
+        store_logger = DrawingMetricsLogger(folder, os.path.basename(excel_path), backend="sqlite")
+        store_latencies = []
+        for _ in range(args.saves):
+            start = time.perf_counter()
+            store_logger.save_to_excel("bench", "Level 1", metrics, processed_path, thumbnail_path, prediction)
+            store_latencies.append((time.perf_counter() - start) * 1000)
+        store_id_ms = 1000 * _best_of(lambda: store_logger._count_sessions("player7"), 20)
+
+        legacy_text = f"{legacy_ms:>10.1f}" if legacy_ms is not None else f"{'-':>10}"
+        scan_text = f"{scan_ms:>11.1f}" if scan_ms is not None else f"{'-':>11}"
+        print(f"  {sessions:>8} {legacy_text} {np.median(latencies):>11.2f} {max(latencies):>12.2f} {flush_s:>8.2f} "
+              f"{np.median(store_latencies):>10.2f} {scan_text} {index_ms:>12.3f} {store_id_ms:>13.3f}")
+
+    # A clock set back between runs must not number new entries below the workbook's marker,
+    # and a flush never drops an entry it did not write
+    import results_journal
+    from openpyxl import load_workbook
+    excel_path = os.path.join(folder, "clock.xlsx")
+    journal = ResultsJournal(excel_path, auto_flush=False)
+    journal.append(["alice", None, "Level 1"] + [0.5] * 16)
+    journal.flush()
+    real_time_ns = results_journal.time.time_ns
+    results_journal.time.time_ns = lambda: real_time_ns() - 3600 * 10 ** 9
+    try:
+        journal = ResultsJournal(excel_path, auto_flush=False)
+        journal.append(["bob", None, "Level 1"] + [0.5] * 16)
+        clock_flushed = journal.flush()
+    finally:
+        results_journal.time.time_ns = real_time_ns
+    with open(journal.journal_path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write(json.dumps({'seq': 1, 'row': ["carol", None, "Level 1"] + [0.5] * 16, 'image': None}) + "\n")
+    stale_flushed = ResultsJournal(excel_path, auto_flush=False).flush()
+    players = [row[0] for row in load_workbook(excel_path, read_only=True)["Results"].iter_rows(
+        min_row=2, max_col=1, values_only=True)]
+    print(f"\nClock set back an hour: {clock_flushed} row flushed; entry numbered below the marker: "
+          f"{stale_flushed} row flushed; workbook holds {players}")
+    if players != ["alice", "bob", "carol"]:
+        print("FAILED: journal lost rows")
+        return 1
+
+    # A workbook that fails to import leaves no store behind; the next start imports it again
+    from results_store import shared_store, store_path_for
+    excel_path = os.path.join(folder, "import.xlsx")
+    with open(excel_path, 'wb') as workbook_file:
+        workbook_file.write(b"truncated by a crash")
+    failed_store = shared_store(excel_path)
+    left_behind = os.path.exists(store_path_for(excel_path))
+    write_results_workbook(excel_path, 50)
+    store = shared_store(excel_path)
+    imported = len(store) if store is not None else 0
+    print(f"\nFailed import: store {'returned' if failed_store is not None else 'unavailable'}, "
+          f"database {'left behind' if left_behind else 'not created'}; {imported} of 50 rows imported on retry")
+    if failed_store is not None or left_behind or imported != 50:
+        print("FAILED: failed import")
+        return 1
+
+    return 0
+
+
+def run_persistence(args):
+    import tempfile
+    import threading
+    from PyQt5.QtGui import QImage
+    from drawing_metrics_logger import DrawingMetricsLogger
+
+    folder = tempfile.mkdtemp(prefix="persistence_bench_")
+    rgb = np.ascontiguousarray(synthetic_spiral(args.resolution))
+    image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format_RGB888).copy()
+    pen_positions, pen_timestamps = synthetic_session(args.samples)
+    pressure_readings = np.random.default_rng(0).uniform(0.2, 1.0, args.samples).tolist()
+    session = (pen_positions, pen_timestamps, pressure_readings,
+               pen_timestamps[0], pen_timestamps[-1], 1.0, 2.0, 5)
+
+    # Synchronous baseline: the same work with the writes done before returning
+    sync_logger = DrawingMetricsLogger(folder, "sync.xlsx")
+    sync_latencies = []
+    for _ in range(args.sessions):
+        start = time.perf_counter()
+        session_id = sync_logger.get_next_session_id("bench")
+        processed_path, excel_img_path = sync_logger.process_and_save_image(image, "bench", session_id, "sync")
+        metrics = sync_logger.calculate_metrics(*session)
+        sync_logger.save_to_excel("bench", "sync", metrics, processed_path, excel_img_path)
+        sync_latencies.append((time.perf_counter() - start) * 1000)
+
+    logger = DrawingMetricsLogger(folder, "queued.xlsx")
+    latencies = []
+    for _ in range(args.sessions):
+        start = time.perf_counter()
+        logger.save_complete_session(image, "bench", "queued", *session)
+        latencies.append((time.perf_counter() - start) * 1000)
+    logger.persistence.drain()
+    stats = logger.persistence.stats()
+
+    print(f"save_complete_session, {args.sessions} sessions of {args.samples} samples, "
+          f"{args.resolution}x{args.resolution} drawing")
+    print(f"  synchronous  p50 {np.median(sync_latencies):7.1f} ms  max {max(sync_latencies):7.1f} ms")
+    print(f"  acknowledged p50 {np.median(latencies):7.1f} ms  max {max(latencies):7.1f} ms")
+    print(f"  worker write p50 {stats['write_p50_ms']:7.1f} ms  p95 {stats['write_p95_ms']:7.1f} ms, "
+          f"end to end max {stats['end_to_end_max_ms']:.1f} ms")
+
+    failures = []
+    if len(logger.store) != args.sessions or stats['written'] != args.sessions:
+        failures.append(f"{len(logger.store)} rows stored, {stats['written']} written")
+    if len(logger.stroke_archive) != args.sessions:
+        failures.append(f"{len(logger.stroke_archive)} sessions archived")
+    session_ids = sorted(int(name.rsplit('_', 1)[1][:-4]) for name in os.listdir(folder)
+                         if name.startswith("bench_queued__"))
+    if session_ids != list(range(1, args.sessions + 1)):
+        failures.append(f"session images {session_ids}")
+
+    # Sessions saved from several threads and loggers at once still get distinct, consecutive IDs
+    race_loggers = [DrawingMetricsLogger(folder, "race.xlsx") for _ in range(2)]
+    threads = [threading.Thread(target=lambda number=number: [
+        race_loggers[number % 2].save_complete_session(image, "race", "queued", *session) for _ in range(5)])
+        for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    race_loggers[0].persistence.drain()
+    race_ids = sorted(int(name.rsplit('_', 1)[1][:-4]) for name in os.listdir(folder)
+                      if name.startswith("race_queued__"))
+    print(f"\nConcurrent saves: {len(race_ids)} sessions, IDs {race_ids[0]}..{race_ids[-1]}, "
+          f"{len(set(race_ids))} distinct")
+    if race_ids != list(range(1, 21)):
+        failures.append(f"concurrent session IDs {race_ids}")
+
+    # Records journaled by a run that died before writing them are written once on the next start,
+    # with their journaled samples; an image the crash kept from being written is stored as missing
+    from PIL import Image
+    from stroke_archive import encode_session
+    crash_folder = os.path.join(folder, "crashed")
+    os.makedirs(crash_folder)
+    row = ["crashed", None, "Level 1"] + [0.5] * 14 + ['', '']
+    written_thumbnail = os.path.join(crash_folder, "a_thumbnail.png")
+    Image.new('L', (8, 8)).save(written_thumbnail)
+    crash_records = {}
+    with open(os.path.join(crash_folder, "Results.xlsx.pending"), 'w', encoding='utf-8') as journal_file:
+        for record_id in ("a", "b", "c"):
+            chunk = encode_session(pen_positions[:50], pen_timestamps[:50], pressure_readings[:50],
+                                   metadata={'player': "crashed", 'record_id': record_id})
+            crash_records[record_id] = {
+                'id': record_id, 'row': row,
+                'processed_image_path': os.path.join(crash_folder, f"{record_id}_processed.png"),
+                'excel_image_path': written_thumbnail if record_id == "a" else os.path.join(crash_folder, "lost.png"),
+                'stroke_chunk': base64.b64encode(chunk).decode('ascii')}
+            journal_file.write(json.dumps({'op': 'record', 'record': crash_records[record_id]}) + "\n")
+        journal_file.write(json.dumps({'op': 'done', 'id': "b"}) + "\n")
+        journal_file.write('{"op": "record", "rec')  # torn by the crash
+    recovered_logger = DrawingMetricsLogger(crash_folder)
+    recovered_logger.persistence.drain()
+    recovered = recovered_logger.store.session_count("crashed")
+    thumbnails = sorted(str(thumbnail) for values, thumbnail in recovered_logger.store.rows())
+    for record_id in ("a", "c"):
+        # A retry after the row was stored but before its "done" line must not add it twice
+        recovered_logger._persist_session(crash_records[record_id], None)
+    retried = recovered_logger.store.session_count("crashed")
+    archived = [metadata['record_id'] for metadata in recovered_logger.stroke_archive.metadata()]
+    print(f"Recovery: {recovered_logger.persistence.recovered} records replayed, "
+          f"{recovered} rows stored, {retried} after retrying them; samples archived for {archived}, "
+          f"thumbnails {[os.path.basename(thumbnail) for thumbnail in thumbnails]}")
+    if (recovered, retried) != (2, 2) or sorted(archived) != ["a", "c"] or thumbnails != sorted(["None", written_thumbnail]):
+        failures.append("recovery")
+
+    # Backpressure: a full queue blocks submit() until the worker takes the next record
+    from persistence_worker import PersistenceWorker
+    release = threading.Event()
+    worker = PersistenceWorker(os.path.join(folder, "backpressure.pending"), lambda record, payload: release.wait(),
+                               maxsize=2)
+    for number in range(3):
+        worker.submit({'n': number})
+    blocked = threading.Thread(target=worker.submit, args=({'n': 3},))
+    blocked.start()
+    blocked.join(0.2)
+    was_blocked = blocked.is_alive()
+    release.set()
+    blocked.join()
+    worker.close()
+    print(f"Backpressure: submit blocked while full: {was_blocked}, "
+          f"{worker.stats()['written']} of 4 written after draining")
+    if not was_blocked or worker.stats()['written'] != 4:
+        failures.append("backpressure")
+
+    # The Excel journal fallback ignores a replayed record it has already journaled, and one
+    # the workbook holds after its journal was truncated, also after a restart
+    from openpyxl import load_workbook
+    from results_journal import ResultsJournal
+    replay_path = os.path.join(folder, "replay.xlsx")
+    journal = ResultsJournal(replay_path, auto_flush=False)
+    for record_id in ("a", "b", "a"):
+        journal.append(row, None, record_id)
+    journal_entries = journal.pending_count("crashed")
+    journal.flush()
+    journal.append(row, None, "b")
+    replayed_pending = journal.pending_count()
+    restarted = ResultsJournal(replay_path, auto_flush=False)
+    for record_id in ("b", "c"):
+        restarted.append(row, None, record_id)
+    restarted_pending = restarted.pending_count()
+    restarted.flush()
+    workbook = load_workbook(replay_path, read_only=True)
+    workbook_rows = workbook["Results"].max_row - 1
+    workbook.close()
+    print(f"Journal replay: {journal_entries} entries for 3 appends of 2 records, "
+          f"{replayed_pending} after a replay of a flushed one, {restarted_pending} after a restart "
+          f"and a replay of a flushed and a new one, {workbook_rows} rows in the workbook")
+    if (journal_entries, replayed_pending, restarted_pending, workbook_rows) != (2, 0, 1, 3):
+        failures.append("journal replay")
+
+    # A failing handler is retried with backoff; a record that keeps failing becomes a dead
+    # letter that is not counted as pending and is retried on the next start
+    attempts = {}
+
+    def flaky(record, payload):
+        attempts[record['n']] = attempts.get(record['n'], 0) + 1
+        if record['n'] == 1 or attempts[record['n']] < 3:
+            raise OSError("workbook locked")
+
+    failing_path = os.path.join(folder, "failing.pending")
+    worker = PersistenceWorker(failing_path, flaky, retry_delay=0.01)
+    for number in range(3):
+        worker.submit({'n': number})
+    worker.close()
+    failing_stats = worker.stats()
+    retry_worker = PersistenceWorker(failing_path, lambda record, payload: None)
+    retry_worker.close()
+    print(f"Failing handler: {failing_stats['written']} written after retries, "
+          f"{failing_stats['dead_letters']} dead letter, {len(worker.pending())} pending, "
+          f"{retry_worker.recovered} retried on restart")
+    if (failing_stats['written'], failing_stats['dead_letters'], len(worker.pending()),
+            retry_worker.recovered, retry_worker.stats()['written']) != (2, 1, 0, 1, 1):
+        failures.append("failing handler")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+def legacy_v1_chunk(pen_positions, pen_timestamps, pressure_readings, stroke_starts, metadata):
+    """A version 1 archive chunk, float32 positions, with its all-set pen-down column."""
+    from stroke_archive import _HEADER, MAGIC
+
+    count = len(pen_positions)
+    timestamps = np.asarray(pen_timestamps, dtype=np.float64)
+    meta = json.dumps(metadata).encode('utf-8')
+    parts = [_HEADER.pack(MAGIC, 1, 0, count, len(stroke_starts), len(meta), timestamps[0]), meta]
+    for column in (np.asarray(pen_positions, dtype=np.float32), (timestamps - timestamps[0]).astype(np.float32),
+                   np.asarray(pressure_readings, dtype=np.float32), np.ones(count, dtype=np.uint8),
+                   np.asarray(stroke_starts, dtype=np.uint32)):
+        parts.append(b"\0" * (-sum(len(part) for part in parts) % 8))
+        parts.append(column.tobytes())
+    parts.append(b"\0" * (-sum(len(part) for part in parts) % 8))
+    return b"".join(parts)
+
+
+def _append_sessions(path, writer, sessions):
+    """Append small sessions to an archive from a separate process."""
+    from stroke_archive import StrokeArchive, encode_session
+
+    archive = StrokeArchive(path)
+    pen_positions, pen_timestamps = synthetic_session(200, seed=writer)
+    for number in range(sessions):
+        archive.append(encode_session(pen_positions, pen_timestamps, [0.5] * 200,
+                                      metadata={'writer': writer, 'n': number}))
+
+
+def run_strokes(args):
+    import tempfile
+    from stroke_archive import StrokeArchive, encode_session
+
+    folder = tempfile.mkdtemp(prefix="stroke_bench_")
+    archive = StrokeArchive(os.path.join(folder, "bench.strokes"))
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    raw_bytes = 0
+    worst_time_error = 0.0
+    for number in range(args.sessions):
+        pen_positions, pen_timestamps = synthetic_session(args.samples, seed=number)
+        pressure_readings = rng.uniform(0.2, 1.0, args.samples).tolist()
+        stroke_starts = sorted(rng.choice(args.samples, 20, replace=False).tolist())
+        archive.append(encode_session(pen_positions, pen_timestamps, pressure_readings, stroke_starts,
+                                      metadata={'player': f"player{number % 50}", 'session_id': number}))
+        raw_bytes += args.samples * (2 * 8 + 8 + 8)
+
+        if number < 20:
+            session = archive[number]
+            positions_match = np.array_equal(session.positions(), np.asarray(pen_positions, dtype=np.float64))
+            worst_time_error = max(worst_time_error, np.abs(session.timestamps() - pen_timestamps).max())
+            if not positions_match:
+                print(f"FAILED: positions of session {number} differ")
+                return 1
+    write_s = time.perf_counter() - start
+    archive_bytes = os.path.getsize(archive.path)
+
+    # A fresh reader, as a later analysis would open it
+    reader = StrokeArchive(archive.path)
+    start = time.perf_counter()
+    path_lengths = [np.hypot(*np.diff(session.positions(), axis=0).T).sum() for session in reader.sessions()]
+    scan_s = time.perf_counter() - start
+    start = time.perf_counter()
+    player_sessions = sum(1 for _ in reader.sessions(player="player7"))
+    filter_s = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions of {args.samples} samples")
+    print(f"  archive {archive_bytes / 1e6:.1f} MB vs {raw_bytes / 1e6:.1f} MB as float64 columns "
+          f"({archive_bytes / (args.sessions * args.samples):.1f} bytes per sample)")
+    print(f"  append {1000 * write_s / args.sessions:.2f} ms per session (fsynced)")
+    print(f"  decode and measure every session {scan_s:.2f} s, filter by player {1000 * filter_s:.0f} ms "
+          f"({player_sessions} sessions)")
+    print(f"  positions exact, worst timestamp error {worst_time_error * 1e6:.1f} us")
+
+    # Chunks written before the pen-down column was dropped still read back, between current ones
+    mixed = StrokeArchive(os.path.join(folder, "mixed.strokes"))
+    pen_positions, pen_timestamps = synthetic_session(500, seed=1)
+    pressure_readings = [0.5] * 500
+    mixed.append(encode_session(pen_positions, pen_timestamps, pressure_readings, [0, 200], metadata={'n': 0}))
+    mixed.append(legacy_v1_chunk(pen_positions, pen_timestamps, pressure_readings, [0, 200], metadata={'n': 1}))
+    mixed.append(encode_session(pen_positions, pen_timestamps, pressure_readings, [0, 200], metadata={'n': 2}))
+    mixed_reader = StrokeArchive(mixed.path)
+    readable = [session.metadata['n'] == number and session.strokes() == [(0, 200), (200, 500)] and
+                np.array_equal(session.positions(), np.asarray(pen_positions, dtype=np.float64))
+                for number, session in enumerate(mixed_reader.sessions())]
+    print(f"  version 1 chunk between version 2 chunks: {sum(readable)} of 3 sessions read back")
+    if readable != [True] * 3:
+        print("FAILED: mixed archive versions")
+        return 1
+
+    # Several processes appending to one archive at once must not cut off each other's chunks
+    from concurrent.futures import ProcessPoolExecutor
+    shared_path = os.path.join(folder, "shared.strokes")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        for future in [pool.submit(_append_sessions, shared_path, writer, 50) for writer in range(4)]:
+            future.result()
+    appended = sorted((meta['writer'], meta['n']) for meta in StrokeArchive(shared_path).metadata())
+    print(f"  4 processes appending 50 sessions each: {len(appended)} of 200 in the archive")
+    if appended != [(writer, number) for writer in range(4) for number in range(50)]:
+        print("FAILED: concurrent appends")
+        return 1
+    return 0 if len(path_lengths) == args.sessions else 1
+
+
+def run_buffer(args):
+    import tracemalloc
+    from drawing_metrics_logger import (CHAINED_KINEMATICS, INDEXED_KINEMATICS, StreamingMetricsAccumulator,
+                                        model_features, session_metrics)
+    from stroke_archive import encode_session
+    from stroke_buffer import StrokeBuffer
+
+    failures = 0
+    rng = np.random.default_rng(0)
+    for samples in args.sizes:
+        pen_positions, pen_timestamps = synthetic_session(samples, seed=samples)
+        # Pressures a float32 holds exactly, so the buffer must reproduce every result bit for bit
+        pressure_readings = (rng.integers(1, 1024, samples) / 1024).tolist()
+        stroke_starts = sorted(set(rng.choice(samples, max(1, samples // 200), replace=False).tolist()) | {0})
+
+        tracemalloc.start()
+        lists = ([], [], [])
+        for (x, y), timestamp, pressure in zip(pen_positions, pen_timestamps, pressure_readings):
+            lists[0].append((x + 0, y + 0))
+            lists[1].append(timestamp + 0.0)
+            lists[2].append(pressure + 0.0)
+        list_bytes = tracemalloc.get_traced_memory()[0]
+        del lists
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        lists = ([], [], [])
+        for (x, y), timestamp, pressure in zip(pen_positions, pen_timestamps, pressure_readings):
+            lists[0].append((x, y))
+            lists[1].append(timestamp)
+            lists[2].append(pressure)
+        list_append_us = 1e6 * (time.perf_counter() - start) / samples
+
+        buffer = StrokeBuffer()
+        starts = set(stroke_starts)
+        start = time.perf_counter()
+        for index, ((x, y), timestamp, pressure) in enumerate(zip(pen_positions, pen_timestamps, pressure_readings)):
+            if index in starts:
+                buffer.pen_down()
+            buffer.append(x, y, timestamp, pressure)
+        buffer_append_us = 1e6 * (time.perf_counter() - start) / samples
+
+        start = time.perf_counter()
+        np.array(pen_positions), np.array(pen_timestamps), np.array(pressure_readings)
+        copy_ms = 1000 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        buffer.positions, buffer.timestamps, buffer.pressures
+        view_ms = 1000 * (time.perf_counter() - start)
+
+        fed = StrokeBuffer(StreamingMetricsAccumulator())
+        for (x, y), timestamp, pressure in zip(pen_positions, pen_timestamps, pressure_readings):
+            fed.append(x, y, timestamp, pressure)
+        session = (1000.0, pen_timestamps[-1] + 0.1, 1.5, 2.5, len(stroke_starts))
+        same = (buffer.stroke_starts.tolist() == stroke_starts and
+                session_metrics(pen_positions, pen_timestamps, pressure_readings, *session) ==
+                session_metrics(buffer.positions, buffer.timestamps, buffer.pressures, *session) and
+                session_metrics(pen_positions, pen_timestamps, pressure_readings, *session,
+                                streaming_metrics(pen_positions, pen_timestamps, pressure_readings)) ==
+                session_metrics(fed.positions, fed.timestamps, fed.pressures, *session, fed.accumulator) and
+                encode_session(pen_positions, pen_timestamps, pressure_readings, stroke_starts) ==
+                encode_session(buffer.positions, buffer.timestamps, buffer.pressures, buffer.stroke_starts))
+        for kinematics in (CHAINED_KINEMATICS, INDEXED_KINEMATICS):
+            same &= (model_features(pen_positions, pen_timestamps, pressure_readings, *session, kinematics) ==
+                     model_features(buffer.positions, buffer.timestamps, buffer.pressures, *session, kinematics))
+
+        print(f"{samples} samples, {len(stroke_starts)} strokes: {'identical' if same else 'DIFFERENT'}")
+        stored = sum(view.nbytes for view in (buffer.positions, buffer.timestamps, buffer.pressures, buffer.stroke_ids))
+        print(f"  memory   lists {list_bytes / 1e6:.2f} MB ({list_bytes / samples:.0f} B/sample), buffer "
+              f"{stored / 1e6:.2f} MB stored ({list_bytes / stored:.1f}x smaller), "
+              f"{buffer.nbytes / 1e6:.2f} MB allocated ({list_bytes / buffer.nbytes:.1f}x)")
+        print(f"  append   lists {list_append_us:.2f} us, buffer {buffer_append_us:.2f} us per sample")
+        print(f"  to NumPy np.array copies {copy_ms:.2f} ms, buffer views {view_ms:.3f} ms")
+        failures += not same
+    return 1 if failures else 0
+
+
+def pen_stream_events(widget, samples, tablet):
+    """Press, moves and release along a spiral in the middle of the widget, as a pen sampled at 200 Hz sends them."""
+    from PyQt5.QtCore import QEvent, QPoint, QPointF, Qt
+    from PyQt5.QtGui import QMouseEvent, QTabletEvent
+
+    center_x, center_y = widget.width() // 2, widget.height() // 2
+    turns = np.linspace(0, 6 * math.pi, samples)
+    points = [QPoint(int(center_x + 15 * turn * math.cos(turn)), int(center_y + 15 * turn * math.sin(turn)))
+              for turn in turns]
+
+    def event(kind, point):
+        if tablet:
+            tablet_kind = {QEvent.MouseButtonPress: QEvent.TabletPress, QEvent.MouseMove: QEvent.TabletMove,
+                           QEvent.MouseButtonRelease: QEvent.TabletRelease}[kind]
+            return QTabletEvent(tablet_kind, QPointF(point), QPointF(point), QTabletEvent.Stylus, QTabletEvent.Pen,
+                                0.6, 0, 0, 0.0, 0.0, 0, Qt.NoModifier, 1, Qt.LeftButton, Qt.LeftButton)
+        buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+        return QMouseEvent(kind, point, Qt.LeftButton, buttons, Qt.NoModifier)
+
+    return ([event(QEvent.MouseButtonPress, points[0])] + [event(QEvent.MouseMove, point) for point in points[1:]] +
+            [event(QEvent.MouseButtonRelease, points[-1])])
+
+
+def run_paint(args):
+    import tempfile
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication, QDialog
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    # The level screens create their results folders relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="paint_bench_"))
+    sys.path.insert(0, REPO_ROOT)
+    import UserInterface
+
+    budget_ms = 1000 / args.rate
+    print(f"{args.samples} pen samples per level at {args.width}x{args.height}, {budget_ms:.1f} ms between samples")
+    for name in args.levels:
+        dialog = QDialog()
+        widget = getattr(UserInterface, name)(dialog, "bench")
+        widget.resize(args.width, args.height)
+        widget.show()
+        app.processEvents()
+        tablet = 'tabletEvent' in type(widget).__dict__
+
+        timings = {}
+        for mode in ('full', 'dirty'):
+            latencies = []
+            for event in pen_stream_events(widget, args.samples, tablet):
+                start = time.perf_counter()
+                if tablet:
+                    widget.tabletEvent(event)
+                elif event.type() == QEvent.MouseButtonPress:
+                    widget.mousePressEvent(event)
+                elif event.type() == QEvent.MouseMove:
+                    widget.mouseMoveEvent(event)
+                else:
+                    widget.mouseReleaseEvent(event)
+                if mode == 'full':
+                    # What every move event did before: invalidate the whole widget
+                    widget.update()
+                app.processEvents()
+                latencies.append((time.perf_counter() - start) * 1000)
+            timings[mode] = latencies[1:-1]
+
+        full, dirty = (np.percentile(timings[mode], [50, 95]) for mode in ('full', 'dirty'))
+        print(f"  {name:<14} {'tablet' if tablet else 'mouse':<6} full repaint p50 {full[0]:6.2f} ms p95 {full[1]:6.2f} ms"
+              f" | segment repaint p50 {dirty[0]:5.2f} ms p95 {dirty[1]:5.2f} ms ({full[0] / dirty[0]:.0f}x)")
+        widget.hide()
+        widget.deleteLater()
+    return 0
+
+
+def legacy_cake_paint(widget, device):
+    """Level3_Screen.paintEvent as it was: the whole cake and every stroke segment on each repaint."""
+    from PyQt5.QtGui import QColor, QPainter
+
+    painter = QPainter(device)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.fillRect(widget.rect(), QColor(230, 240, 255))
+    painter.setTransform(widget.cake_transform())
+    widget.draw_cake_base(painter)
+    widget.draw_candles(painter)
+    widget.draw_sine_wave_guide(painter)
+    widget.draw_user_drawings(painter)
+    painter.end()
+
+
+def run_cake(args):
+    import tempfile
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QEvent, QPoint
+    from PyQt5.QtGui import QImage
+    from PyQt5.QtWidgets import QApplication, QDialog, QWidget
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    os.chdir(tempfile.mkdtemp(prefix="cake_bench_"))
+    sys.path.insert(0, REPO_ROOT)
+    import UserInterface
+    from image_buffers import qimage_to_array
+
+    widget = UserInterface.Level3_Screen(QDialog(), "bench")
+    widget.show()
+    app.processEvents()
+    frame = QImage(widget.size(), QImage.Format_RGB32)
+
+    latencies = {'legacy': [], 'cached': []}
+    strokes = max(1, args.samples // args.stroke_length)
+    for stroke in range(strokes):
+        events = pen_stream_events(widget, args.stroke_length, tablet=False)
+        for event in events:
+            # Each stroke is shifted so strokes overlap only partly, as on a real cake
+            event = type(event)(event.type(), event.pos() + QPoint(40 * stroke - 20 * strokes, 0), event.button(),
+                                event.buttons(), event.modifiers())
+            handler = {QEvent.MouseButtonPress: widget.mousePressEvent, QEvent.MouseMove: widget.mouseMoveEvent,
+                       QEvent.MouseButtonRelease: widget.mouseReleaseEvent}[event.type()]
+            start = time.perf_counter()
+            handler(event)
+            app.processEvents()
+            latencies['cached'].append((time.perf_counter() - start) * 1000)
+            if event.type() == QEvent.MouseMove:
+                start = time.perf_counter()
+                legacy_cake_paint(widget, frame)
+                latencies['legacy'].append((time.perf_counter() - start) * 1000)
+
+    widget.repaint()
+    # qimage_to_array views the pixels, so the grabbed image is kept alive
+    window = app.primaryScreen().grabWindow(widget.winId()).toImage()
+    cached = qimage_to_array(window)
+    legacy_cake_paint(widget, frame)
+    legacy = qimage_to_array(frame)
+    differing = np.abs(cached.astype(int) - legacy).max(axis=2)
+    # Child widgets (title label, Next button) are only in the window grab
+    for child in widget.findChildren(QWidget):
+        if child.isVisible():
+            rect = child.geometry()
+            differing[rect.top():rect.bottom() + 1, rect.left():rect.right() + 1] = 0
+
+    print(f"{len(widget.stroke_buffer)} samples in {strokes} strokes")
+    for name, values in latencies.items():
+        early, late = np.median(values[:50]), np.median(values[-50:])
+        print(f"  {name:<7} per move: first 50 p50 {early:6.2f} ms, last 50 p50 {late:6.2f} ms")
+    print(f"  pixels differing from the legacy frame: {(differing > 0).sum()} "
+          f"(largest difference {differing.max()} of 255)")
+    return 0
+
+
+def run_wolf(args):
+    import tempfile
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QEvent, QEventLoop, QPoint, Qt, QTimer
+    from PyQt5.QtGui import QMouseEvent, QPixmap
+    from PyQt5.QtWidgets import QApplication, QDialog
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    os.chdir(tempfile.mkdtemp(prefix="wolf_bench_"))
+    sys.path.insert(0, REPO_ROOT)
+    import UserInterface
+
+    widget = UserInterface.Level4_Screen(QDialog(), "bench", QPixmap(64, 64))
+    widget.show()
+    # Past the chase distance's 10 s transition
+    widget.start_time -= 10
+    scheduler = widget.frame_scheduler
+    detached = type('DetachedScheduler', (), {'wake': lambda self: None})()
+
+    def legacy_frame():
+        # The old 16 ms timer: move the wolf, repaint the whole widget
+        widget.update_trail()
+        widget.update()
+
+    legacy_timer = QTimer()
+    legacy_timer.setInterval(16)
+    legacy_timer.timeout.connect(legacy_frame)
+
+    angle = [0.0]
+
+    def move_cursor():
+        angle[0] += 0.05
+        position = QPoint(int(1000 + 300 * math.cos(angle[0])), int(600 + 250 * math.sin(angle[0])))
+        widget.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, position, Qt.NoButton, Qt.NoButton, Qt.NoModifier))
+
+    mover = QTimer()
+    mover.setInterval(8)
+    mover.timeout.connect(move_cursor)
+
+    def run_for(seconds):
+        loop = QEventLoop()
+        QTimer.singleShot(int(seconds * 1000), loop.quit)
+        wall, cpu = time.perf_counter(), time.process_time()
+        loop.exec_()
+        return 100 * (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+    rows = []
+    for scenario in ('chase', 'still', 'hidden'):
+        usage = {}
+        for mode in ('legacy', 'scheduler'):
+            if scenario == 'hidden':
+                widget.hide()
+            else:
+                widget.show()
+            if mode == 'legacy':
+                # Detached, so neither mouse moves nor show events restart it
+                scheduler.stop()
+                widget.removeEventFilter(scheduler)
+                widget.frame_scheduler = detached
+                legacy_timer.start()
+            else:
+                legacy_timer.stop()
+                widget.installEventFilter(scheduler)
+                widget.frame_scheduler = scheduler
+                scheduler.wake()
+            if scenario == 'chase':
+                mover.start()
+            run_for(0.5)
+            scheduler.reset_stats()
+            usage[mode] = run_for(args.seconds)
+            mover.stop()
+        rows.append((scenario, usage, scheduler.stats()))
+
+    widget.show()
+    app.processEvents()
+    full_ms = _best_of(lambda: widget.repaint(), args.repeats) * 1000
+    sprite_ms = _best_of(lambda: [widget.repaint(rect) for rect in (widget.trail_rect(), widget.trail_rect())],
+                         args.repeats) * 1000
+
+    print(f"Level 4 wolf chase, {args.seconds:.0f} s per scenario, CPU use of this process")
+    for scenario, usage, stats in rows:
+        print(f"  {scenario:<7} legacy 16 ms timer {usage['legacy']:5.1f}%  scheduler {usage['scheduler']:5.1f}% "
+              f"({stats['frames']} frames, {'running' if stats['running'] else 'stopped'})")
+    print(f"  frame paint: whole widget {full_ms:.2f} ms, old and new sprite rects {sprite_ms:.2f} ms")
+    stats = rows[0][2]
+    if stats['frame_p50_ms'] is not None:
+        print(f"  scheduler frame step p50 {stats['frame_p50_ms']:.3f} ms p95 {stats['frame_p95_ms']:.3f} ms")
+    return 0
+
+
+def legacy_ink_mask(drawing_image):
+    """Level2_Screen.save_image_and_log's compositing as it was: one drawPoint per inked pixel."""
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPainter, QPen, QPixmap
+
+    final_drawing = QPixmap(drawing_image.size())
+    final_drawing.fill(Qt.white)
+    painter = QPainter(final_drawing)
+    painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+    for y in range(drawing_image.height()):
+        for x in range(drawing_image.width()):
+            pixel = drawing_image.pixel(x, y)
+            alpha = (pixel >> 24) & 0xFF
+            if alpha > 0:
+                painter.setPen(QPen(Qt.black))
+                painter.drawPoint(x, y)
+    painter.end()
+    return final_drawing
+
+
+def run_composite(args):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QPoint, Qt
+    from PyQt5.QtGui import QPainter, QPen, QPixmap
+    from PyQt5.QtWidgets import QApplication
+    from drawing_metrics_logger import DrawingMetricsLogger
+    from image_buffers import new_rgb32_image, qimage_alpha, qimage_to_array
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    # A Level 2 drawing layer: transparent, with antialiased strokes whose edges are partly transparent
+    layer = QPixmap(args.width, args.height)
+    layer.fill(Qt.transparent)
+    painter = QPainter(layer)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QPen(Qt.black, 25, Qt.SolidLine, Qt.RoundCap))
+    turns = np.linspace(0, 8 * math.pi, 600)
+    points = [QPoint(int(args.width / 2 + 14 * turn * math.cos(turn)), int(args.height / 2 + 14 * turn * math.sin(turn)))
+              for turn in turns]
+    for start, end in zip(points, points[1:]):
+        painter.drawLine(start, end)
+    painter.end()
+    drawing_image = layer.toImage()
+
+    def bulk():
+        final_drawing, pixels = new_rgb32_image(drawing_image.width(), drawing_image.height())
+        pixels[...] = np.where(qimage_alpha(drawing_image) > 0, np.uint32(0xFF000000), np.uint32(0xFFFFFFFF))
+        return final_drawing
+
+    bulk_ms = _best_of(bulk, args.repeats) * 1000
+    start = time.perf_counter()
+    legacy = legacy_ink_mask(drawing_image)
+    legacy_s = time.perf_counter() - start
+
+    result = bulk()
+    same_pixels = np.array_equal(qimage_to_array(result), qimage_to_array(legacy))
+    processed, thumbnail, dispersion = DrawingMetricsLogger.process_drawing(result)
+    legacy_processed, legacy_thumbnail, legacy_dispersion = DrawingMetricsLogger.process_drawing(legacy)
+    same_processed = (np.array_equal(np.asarray(processed), np.asarray(legacy_processed)) and
+                      np.array_equal(np.asarray(thumbnail), np.asarray(legacy_thumbnail)) and
+                      dispersion == legacy_dispersion)
+
+    print(f"{args.width}x{args.height} drawing layer, {int((qimage_alpha(drawing_image) > 0).sum())} inked pixels")
+    print(f"  per-pixel loop {legacy_s:.1f} s, array path {bulk_ms:.1f} ms ({legacy_s * 1000 / bulk_ms:.0f}x)")
+    print(f"  output pixels {'identical' if same_pixels else 'DIFFERENT'}, processed images and dispersion "
+          f"{'identical' if same_processed else 'DIFFERENT'}")
+    return 0 if same_pixels and same_processed else 1
+
+
+def run_recompute(args):
+    import tempfile
+    from drawing_metrics_logger import session_metrics
+    from recompute_metrics import recompute
+    from results_store import ResultsStore, store_path_for
+    from stroke_archive import StrokeArchive, archive_path_for, encode_session
+
+    folder = tempfile.mkdtemp(prefix="recompute_bench_")
+    excel_path = os.path.join(folder, "Level1Results.xlsx")
+    store = ResultsStore(store_path_for(excel_path))
+    archive = StrokeArchive(archive_path_for(excel_path))
+    rng = np.random.default_rng(0)
+    for number in range(args.sessions):
+        pen_positions, pen_timestamps = synthetic_session(args.samples, seed=number)
+        pressure_readings = rng.uniform(0.2, 1.0, args.samples).tolist()
+        meta = {'player': "bench", 'level': f"Level {number % 8 + 1}", 'session_id': number + 1,
+                'record_id': f"r{number}", 'start_time': pen_timestamps[0], 'end_time': pen_timestamps[-1],
+                'air_time': 1.0, 'paper_time': 2.0, 'pendown_count': 5}
+        archive.append(encode_session(pen_positions, pen_timestamps, pressure_readings, metadata=meta))
+        store.add_session(["bench", None, meta['level']] + [0.0] * 16, record_id=meta['record_id'])
+
+    print(f"{args.sessions} archived sessions of {args.samples} samples, {os.cpu_count()} cores")
+    baseline = None
+    for workers in args.workers:
+        summary = recompute(excel_path, workers, args.chunk_size, run=f"workers{workers}", report=lambda message: None)
+        rate = summary['sessions_per_second']
+        baseline = baseline or rate
+        print(f"  {workers:>3} workers {rate:>8.1f} sessions/s ({rate / baseline:.2f}x), "
+              f"{summary['updated']} rows updated")
+        if summary['updated'] != args.sessions:
+            print("FAILED: not every session was written back")
+            return 1
+
+    # The written-back metrics are what the logger computes from the decoded samples
+    stored = store.latest_session("bench", "Level 1")
+    session = next(StrokeArchive(archive.path).sessions(record_id=stored['record_id']))
+    meta = session.metadata
+    expected = session_metrics(*session.samples(), meta['start_time'], meta['end_time'],
+                               meta['air_time'], meta['paper_time'], meta['pendown_count'])
+    mismatched = [name for name in ('mean_speed', 'mean_jerk', 'avg_cisp', 'gmrtp')
+                  if stored[name] != expected[name]]
+
+    # An interrupted run: half written back, then the run is started again
+    half = args.sessions // 2
+    logger_results = [(f"r{number}", expected, None) for number in range(half)]
+    store.apply_recomputed("resumed", logger_results)
+    summary = recompute(excel_path, args.workers[-1], args.chunk_size, run="resumed", report=lambda message: None)
+    print(f"Resume: {summary['skipped']} sessions skipped, {summary['recomputed']} recomputed")
+    if summary['skipped'] != half or summary['recomputed'] != args.sessions - half or mismatched:
+        print(f"FAILED: resume or parity {mismatched}")
+        return 1
+
+    # A workbook that has no store yet: recompute imports its rows rather than starting an
+    # empty store, and sessions without a row to update are not marked done
+    from results_store import shared_store
+    excel_path = os.path.join(folder, "Unstored.xlsx")
+    write_results_workbook(excel_path, 5)
+    archive = StrokeArchive(archive_path_for(excel_path))
+    for number in range(5):
+        pen_positions, pen_timestamps = synthetic_session(200, seed=number)
+        archive.append(encode_session(pen_positions, pen_timestamps, [0.5] * 200, metadata={
+            'player': f"player{number}", 'level': "Level 1", 'record_id': f"u{number}",
+            'start_time': pen_timestamps[0], 'end_time': pen_timestamps[-1]}))
+    first = recompute(excel_path, 1, args.chunk_size, run="unstored", report=lambda message: None)
+    second = recompute(excel_path, 1, args.chunk_size, run="unstored", report=lambda message: None)
+    sessions = len(shared_store(excel_path))
+    print(f"Workbook without a store: {sessions} of 5 rows in the store after recompute, "
+          f"{first['updated']} updated, {second['skipped']} marked done")
+    if sessions != 5 or first['updated'] != 0 or second['skipped'] != 0:
+        print("FAILED: recompute without a store")
+        return 1
+    return 0
+
+
+PREDICT_STAGES = ('pil_open', 'gray_blur', 'otsu', 'filters', 'enhance_line_drawing', 'resize', 'forward',
+                  'result')
+
+
+def _stage_summary(latencies_ms):
+    latencies_ms = np.asarray(latencies_ms)
+    return {
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'max_ms': float(latencies_ms.max()),
+        'images_per_s': float(1000 / latencies_ms.mean()) if latencies_ms.mean() > 0 else float('inf'),
+    }
+
+
+def time_predict_stages(detector, path):
+    """
+    Run one image through ParkinsonsDetector.predict a stage at a time.
+
+    Returns:
+        dict: stage name -> milliseconds
+    """
+    from parkinsons_detector import ImagePreprocessor, tf
+
+    timings = {}
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        value = function(*args)
+        timings[name] = (time.perf_counter() - start) * 1000
+        return value
+
+    image_array = timed('pil_open', ImagePreprocessor.load_image_array, path)
+    blurred = timed('gray_blur', lambda: ImagePreprocessor._blurred_gray(image_array)[None])
+    thresholds = timed('otsu', ImagePreprocessor.otsu_thresholds, blurred)
+    processed = timed('filters', lambda: ImagePreprocessor._threshold_clean_invert(blurred, thresholds)[0])
+    # predict skips this stage on the binary output; it is timed so the saving stays visible
+    timed('enhance_line_drawing', ImagePreprocessor.enhance_line_drawing, processed)
+
+    def resize():
+        tensor = tf.image.resize(tf.constant(processed, dtype=tf.float32), detector.image_size, method='bilinear')
+        return tf.expand_dims(tensor / 255.0, 0)
+
+    tensor = timed('resize', resize)
+    score = timed('forward', lambda: float(detector._forward(tensor)[0][0]))
+    timed('result', detector._build_result, score)
+
+    timings['total'] = sum(timings[name] for name in PREDICT_STAGES if name != 'enhance_line_drawing')
+    return timings
+
+
+def run_stages(args):
+    from parkinsons_detector import ParkinsonsDetector
+
+    detector = ParkinsonsDetector(model_path=args.model, image_size=(args.image_size, args.image_size))
+    if detector.model is None:
+        print(f"Could not load {args.model}")
+        return 1
+
+    paths = sorted(glob.glob(os.path.join(SAMPLE_FOLDER, "*.png")))[:args.samples]
+    if not paths:
+        print(f"No sample images in {SAMPLE_FOLDER}")
+        return 1
+
+    time_predict_stages(detector, paths[0])
+
+    latencies = {name: [] for name in PREDICT_STAGES + ('total',)}
+    for _ in range(args.repeats):
+        for path in paths:
+            for name, elapsed in time_predict_stages(detector, path).items():
+                latencies[name].append(elapsed)
+
+    stages = {name: _stage_summary(values) for name, values in latencies.items()}
+
+    print(f"Predict stages over {len(paths)} samples x {args.repeats} repeats")
+    print(f"  {'stage':<22} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'images/s':>9}")
+    for name, row in stages.items():
+        print(f"  {name:<22} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['max_ms']:>8.2f} "
+              f"{row['images_per_s']:>9.1f}")
+
+    if args.output:
+        write_json(args.output, {'model': os.path.abspath(args.model), 'samples': len(paths),
+                                 'repeats': args.repeats, 'stages': stages})
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['stages']
+
+        regressions = compare_metrics({name: row['p50_ms'] for name, row in stages.items()},
+                                      {name: row['p50_ms'] for name, row in baseline.items()},
+                                      args.tolerance, args.min_ms)
+        for name, base, value in regressions:
+            print(f"REGRESSION {name}: p50 {base:.2f} ms -> {value:.2f} ms")
+        if regressions:
+            return 1
+        print("No stage regressions against the baseline")
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance checks for the drawing analysis pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    preprocess = subparsers.add_parser('preprocess', help="ImagePreprocessor parity and batch throughput")
+    preprocess.add_argument('--sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    preprocess.add_argument('--resolution', type=int, default=1000)
+    preprocess.add_argument('--repeats', type=int, default=3)
+    preprocess.add_argument('--samples', type=int, default=None, help="Limit the sample drawings checked")
+    preprocess.set_defaults(handler=run_preprocess)
+
+    startup = subparsers.add_parser('startup', help="Import time per module and time to first frame")
+    startup.add_argument('--runs', type=int, default=5)
+    startup.add_argument('--top', type=int, default=10, help="Slowest imports to list")
+    startup.add_argument('--output', help="Write the measured metrics to this JSON file")
+    startup.add_argument('--baseline', help="Fail if a metric regressed against this JSON file")
+    startup.add_argument('--tolerance', type=float, default=0.25, help="Allowed fractional slowdown")
+    startup.add_argument('--min-ms', type=float, default=20.0, help="Ignore metrics below this many ms")
+    startup.set_defaults(handler=run_startup)
+
+    latency = subparsers.add_parser('latency', help="model.predict vs compiled single-image latency")
+    latency.add_argument('--model', default='best_parkinsons_model.keras')
+    latency.add_argument('--image-size', type=int, default=128)
+    latency.add_argument('--repeats', type=int, default=20)
+    latency.add_argument('--output', help="Write the measured latencies to this JSON file")
+    latency.set_defaults(handler=run_latency)
+
+    metrics = subparsers.add_parser('metrics', help="Kinematics, jerk, CISP and streaming parity and timing")
+    metrics.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    metrics.add_argument('--repeats', type=int, default=3)
+    metrics.add_argument('--verbose', action='store_true', help="List every parity case")
+    metrics.set_defaults(handler=run_metrics)
+
+    images = subparsers.add_parser('images', help="process_and_save_image parity and timing")
+    images.add_argument('--resolution', type=int, default=800)
+    images.add_argument('--repeats', type=int, default=5)
+    images.set_defaults(handler=run_images)
+
+    results = subparsers.add_parser('results', help="Session save and session id latency against workbook size")
+    results.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    results.add_argument('--saves', type=int, default=20, help="Sessions saved per size")
+    results.add_argument('--legacy-max', type=int, default=10000, help="Largest size to time the old save at")
+    results.set_defaults(handler=run_results)
+
+    persistence = subparsers.add_parser('persistence', help="Write-behind session saves, recovery and backpressure")
+    persistence.add_argument('--sessions', type=int, default=20)
+    persistence.add_argument('--samples', type=int, default=2000, help="Pen samples per session")
+    persistence.add_argument('--resolution', type=int, default=800)
+    persistence.set_defaults(handler=run_persistence)
+
+    strokes = subparsers.add_parser('strokes', help="Stroke archive size, fidelity and memory-mapped scan time")
+    strokes.add_argument('--sessions', type=int, default=2000)
+    strokes.add_argument('--samples', type=int, default=3000, help="Pen samples per session")
+    strokes.set_defaults(handler=run_strokes)
+
+    buffer = subparsers.add_parser('buffer', help="StrokeBuffer memory, append cost and parity with the sample lists")
+    buffer.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    buffer.set_defaults(handler=run_buffer)
+
+    paint = subparsers.add_parser('paint', help="Per-event paint cost of a pen stream, full vs segment repaints")
+    paint.add_argument('--levels', nargs='+', default=['Level1_Screen', 'Level2_Screen', 'Level5_Screen',
+                                                          'Level6_Screen', 'Level8_Screen'])
+    paint.add_argument('--samples', type=int, default=400)
+    paint.add_argument('--rate', type=float, default=200, help="Pen samples per second")
+    paint.add_argument('--width', type=int, default=2000)
+    paint.add_argument('--height', type=int, default=1100)
+    paint.set_defaults(handler=run_paint)
+
+    cake = subparsers.add_parser('cake', help="Level 3 repaint cost as the drawing grows, legacy vs cached layers")
+    cake.add_argument('--samples', type=int, default=3000)
+    cake.add_argument('--stroke-length', type=int, default=300)
+    cake.set_defaults(handler=run_cake)
+
+    wolf = subparsers.add_parser('wolf', help="Level 4 wolf animation CPU use, legacy timer vs frame scheduler")
+    wolf.add_argument('--seconds', type=float, default=3.0, help="Measured time per scenario and mode")
+    wolf.add_argument('--repeats', type=int, default=20)
+    wolf.set_defaults(handler=run_wolf)
+
+    composite = subparsers.add_parser('composite', help="Level 2 ink mask: per-pixel loop vs NumPy view of the image")
+    composite.add_argument('--width', type=int, default=2000)
+    composite.add_argument('--height', type=int, default=1100)
+    composite.add_argument('--repeats', type=int, default=10)
+    composite.set_defaults(handler=run_composite)
+
+    recompute = subparsers.add_parser('recompute', help="Offline metric recomputation throughput and resume")
+    recompute.add_argument('--sessions', type=int, default=400)
+    recompute.add_argument('--samples', type=int, default=3000, help="Pen samples per session")
+    recompute.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    recompute.add_argument('--chunk-size', type=int, default=16)
+    recompute.set_defaults(handler=run_recompute)
+
+    stages = subparsers.add_parser('stages', help="Per-stage timing of ParkinsonsDetector.predict")
+    stages.add_argument('--model', default='best_parkinsons_model.keras')
+    stages.add_argument('--image-size', type=int, default=128)
+    stages.add_argument('--repeats', type=int, default=5)
+    stages.add_argument('--samples', type=int, default=None, help="Limit the sample drawings timed")
+    stages.add_argument('--output', help="Write the stage timings to this JSON baseline")
+    stages.add_argument('--baseline', help="Fail if a stage's p50 regressed against this JSON file")
+    stages.add_argument('--tolerance', type=float, default=0.25, help="Allowed fractional slowdown")
+    stages.add_argument('--min-ms', type=float, default=0.5, help="Ignore stages below this many ms")
+    stages.set_defaults(handler=run_stages)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
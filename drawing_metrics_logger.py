@@ -0,0 +1,806 @@
+import base64
+import os
+import math
+import itertools
+import threading
+import time
+import uuid
+import numpy as np
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import load_workbook
+
+from image_buffers import qimage_to_array
+from persistence_worker import shared_worker
+from results_journal import new_results_workbook, shared_journal
+from results_store import shared_store
+from stroke_archive import encode_session, shared_archive
+
+
+# PNG encoding releases the GIL, so a processed image and its thumbnail are written in parallel
+_image_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-writer")
+
+# Last session ID handed out per results file and player, shared by every logger of the process
+_session_ids = {}
+_session_ids_lock = threading.Lock()
+
+
+def as_sample_arrays(pen_positions, pen_timestamps):
+    """
+    Pen samples as an (N, 2) position array and an (N,) float64 timestamp array.
+
+    Integer widget coordinates keep their integer dtype, so differences stay exact.
+    A StrokeBuffer's float32 positions are widened to float64, which is exact as well.
+    """
+    positions = np.asarray(pen_positions)
+    if positions.size == 0:
+        positions = positions.reshape(0, 2)
+    elif positions.dtype == np.float32:
+        positions = positions.astype(np.float64)
+    return positions, np.asarray(pen_timestamps, dtype=np.float64)
+
+
+def _row_dots(a, b):
+    """
+    Row-wise dot products of two (N, 2) arrays.
+
+    Stacked matmul goes through the same dot kernel as np.dot and np.linalg.norm, so
+    the results round exactly like the per-point calls they replace.
+    """
+    return np.matmul(a[:, None, :], b[:, :, None])[:, 0, 0]
+
+
+class StreamingMetricsAccumulator:
+    """
+    Incremental version of DrawingMetricsLogger.calculate_metrics.
+
+    Levels push every pen sample from their mouse and tablet handlers, so the work is
+    spread over the drawing and finalize() only combines running sums. Kinematics, jerk
+    and CISP follow the batch definitions sample by sample, zero-dt skipping included;
+    means and the Welford pressure variance agree with the NumPy reductions to
+    floating-point rounding.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.sample_count = 0
+        # Index of the first sample of each stroke, for the stroke archive
+        self.stroke_starts = []
+        # Accelerations pair speed k with the raw timestamps k-1 and k (see
+        # _calculate_kinematics), which can lie far behind the newest sample
+        self._timestamps = []
+        self._last_position = None
+        self._last_step = None
+
+        self.min_x = self.max_x = self.min_y = self.max_y = None
+        self.path_length = 0.0
+
+        self.pressure_count = 0
+        self.pressure_mean = 0.0
+        self._pressure_m2 = 0.0
+
+        # [count, sum, sum of squares]
+        self.speed_moments = [0, 0.0, 0.0]
+        self.acceleration_moments = [0, 0.0, 0.0]
+        self.jerk_moments = [0, 0.0, 0.0]
+        self._last_speed = None
+        self._last_acceleration = None
+
+        self.cisp_count = 0
+        self.cisp_sum = 0.0
+
+    @staticmethod
+    def _add_moment(moments, value):
+        moments[0] += 1
+        moments[1] += value
+        moments[2] += value * value
+
+    def pen_down(self):
+        """Start a new stroke at the next sample; called from the levels' press handlers."""
+        if not self.stroke_starts or self.stroke_starts[-1] != self.sample_count:
+            self.stroke_starts.append(self.sample_count)
+
+    def add_sample(self, position, timestamp, pressure=None):
+        """
+        Args:
+            position (tuple): (x, y) pen position
+            timestamp (float): Sample time in seconds
+            pressure (float): Pen pressure, or None when the sample has no reading
+        """
+        x, y = position
+        self._timestamps.append(timestamp)
+        self.sample_count += 1
+
+        if pressure is not None:
+            self.pressure_count += 1
+            delta = pressure - self.pressure_mean
+            self.pressure_mean += delta / self.pressure_count
+            self._pressure_m2 += delta * (pressure - self.pressure_mean)
+
+        if self._last_position is None:
+            self.min_x = self.max_x = x
+            self.min_y = self.max_y = y
+            self._last_position = (x, y)
+            return
+
+        self.min_x, self.max_x = min(self.min_x, x), max(self.max_x, x)
+        self.min_y, self.max_y = min(self.min_y, y), max(self.max_y, y)
+
+        dx = x - self._last_position[0]
+        dy = y - self._last_position[1]
+        dt = timestamp - self._timestamps[-2]
+
+        if dt > 0:
+            distance = math.hypot(dx, dy)
+            self.path_length += distance
+            self._add_speed(distance / dt)
+
+        if self._last_step is not None:
+            self._add_cisp(self._last_step, (dx, dy))
+
+        self._last_position = (x, y)
+        self._last_step = (dx, dy)
+
+    def _add_speed(self, speed):
+        speed_index = self.speed_moments[0]
+        self._add_moment(self.speed_moments, speed)
+        last_speed, self._last_speed = self._last_speed, speed
+        if speed_index == 0:
+            return
+
+        delta_t = self._timestamps[speed_index] - self._timestamps[speed_index - 1]
+        if delta_t <= 0:
+            return
+
+        acceleration = (speed - last_speed) / delta_t
+        acceleration_index = self.acceleration_moments[0]
+        self._add_moment(self.acceleration_moments, acceleration)
+        last_acceleration, self._last_acceleration = self._last_acceleration, acceleration
+        if acceleration_index == 0:
+            return
+
+        dt = self._timestamps[acceleration_index + 1] - self._timestamps[acceleration_index]
+        if dt > 0:
+            self._add_moment(self.jerk_moments, (acceleration - last_acceleration) / dt)
+
+    def _add_cisp(self, v1, v2):
+        norm_v1 = math.sqrt(v1[0] * v1[0] + v1[1] * v1[1])
+        norm_v2 = math.sqrt(v2[0] * v2[0] + v2[1] * v2[1])
+        if norm_v1 == 0 or norm_v2 == 0:
+            return
+
+        cosine_angle = min(1.0, max(-1.0, (v1[0] * v2[0] + v1[1] * v2[1]) / (norm_v1 * norm_v2)))
+        self.cisp_count += 1
+        self.cisp_sum += math.acos(cosine_angle) / (norm_v1 + norm_v2)
+
+    @staticmethod
+    def _mean(moments):
+        return moments[1] / moments[0] if moments[0] else 0
+
+    def finalize(self, start_time, end_time, air_time, paper_time, pendown_count):
+        """Return the same dictionary as DrawingMetricsLogger.calculate_metrics."""
+        total_time = (end_time - start_time) if start_time else 0
+
+        if self.sample_count:
+            max_x, max_y = self.max_x - self.min_x, self.max_y - self.min_y
+        else:
+            max_x = max_y = 0
+
+        return {
+            'total_time': total_time,
+            'air_time': air_time,
+            'paper_time': paper_time,
+            'mean_speed': self._mean(self.speed_moments),
+            'mean_acceleration': self._mean(self.acceleration_moments),
+            'mean_pressure': self.pressure_mean if self.pressure_count else 0,
+            'pressure_variance': self._pressure_m2 / self.pressure_count if self.pressure_count else 0,
+            'pendown_count': pendown_count,
+            'max_x': max_x,
+            'max_y': max_y,
+            'gmrtp': (self.path_length / total_time) if total_time else 0,
+            'mean_jerk': self._mean(self.jerk_moments),
+            'avg_cisp': self.cisp_sum / self.cisp_count if self.cisp_count else 0
+        }
+
+
+class DrawingMetricsLogger:
+    def __init__(self, save_folder, excel_filename="Results.xlsx", backend="sqlite"):
+        """
+        Initialize the metrics logger.
+
+        Args:
+            save_folder (str): Path to the folder where images and Excel file will be saved
+            excel_filename (str): Name of the Excel file to store results
+            backend (str): "sqlite" keeps results in a database next to the Excel file and
+                writes the workbook only on export_results(); "excel" journals rows into
+                the workbook itself
+        """
+        self.save_folder = save_folder
+        self.excel_path = os.path.join(save_folder, excel_filename)
+        self._dispersion_indices = {}
+        self.store = shared_store(self.excel_path) if backend == "sqlite" else None
+        # The journaled workbook is also the fallback when the database cannot be opened
+        self.journal = shared_journal(self.excel_path) if self.store is None else None
+        self.stroke_archive = shared_archive(self.excel_path)
+        # Sessions from save_complete_session are written behind, from this journal
+        self.persistence = shared_worker(self.excel_path + ".pending", self._persist_session)
+
+    def calculate_metrics(self, pen_positions, pen_timestamps, pressure_readings,
+                          start_time, end_time, air_time, paper_time, pendown_count, accumulator=None):
+        """
+        Calculate all drawing metrics from the collected data.
+
+        Args:
+            pen_positions (list): List of (x, y) pen positions
+            pen_timestamps (list): List of timestamps for each position
+            pressure_readings (list): List of pressure values
+            start_time (float): Start time of drawing
+            end_time (float): End time of drawing
+            air_time (float): Total time pen was in air
+            paper_time (float): Total time pen was on paper
+            pendown_count (int): Number of times pen was pressed down
+            accumulator (StreamingMetricsAccumulator): Optional accumulator fed with the
+                same samples; used instead of the batch computation when it saw all of them
+
+        Returns:
+            dict: Dictionary containing all calculated metrics
+        """
+        return session_metrics(pen_positions, pen_timestamps, pressure_readings, start_time, end_time,
+                               air_time, paper_time, pendown_count, accumulator)
+
+    @staticmethod
+    def _calculate_kinematics(pen_positions, pen_timestamps, arrays=None):
+        """
+        Calculate distances, speeds, and accelerations from pen positions.
+
+        Segments with a non-positive time step are skipped. Accelerations pair
+        consecutive speeds with the raw timestamp steps at the same index, as the
+        original per-sample loop did. arrays, from session_arrays(), saves recomputing
+        the steps.
+        """
+        empty = np.empty(0)
+        if len(pen_positions) < 2:
+            return empty, empty, empty
+
+        if arrays is None:
+            arrays = session_arrays(pen_positions, pen_timestamps)
+        distances, speeds, dts = arrays['distances'], arrays['speeds'], arrays['dts']
+
+        if len(speeds) < 2:
+            return distances, speeds, empty
+
+        delta_t = dts[:len(speeds) - 1]
+        valid = delta_t > 0
+        accelerations = np.diff(speeds)[valid] / delta_t[valid]
+
+        return distances, speeds, accelerations
+
+    @staticmethod
+    def _calculate_spatial_extent(pen_positions):
+        """Calculate the spatial extent of the drawing."""
+        if len(pen_positions):
+            pen_positions = np.asarray(pen_positions)
+            max_x, max_y = (pen_positions.max(axis=0) - pen_positions.min(axis=0)).tolist()
+        else:
+            max_x = max_y = 0
+        return max_x, max_y
+
+    @staticmethod
+    def _calculate_gmrtp(distances, total_time):
+        """Calculate Geometric Mean Radial Trajectory Point (GMRTP)."""
+        if not total_time:
+            return 0
+        # Summed left to right, like the built-in sum the metric was defined with
+        return (float(np.cumsum(distances)[-1]) if len(distances) else 0) / total_time
+
+    @staticmethod
+    def _calculate_mean_jerk(accelerations, pen_timestamps):
+        """Calculate mean jerk (rate of change of acceleration)."""
+        accelerations = np.asarray(accelerations, dtype=np.float64)
+        count = min(len(accelerations) - 1, len(pen_timestamps) - 2)
+        if count <= 0:
+            return 0
+
+        dts = np.diff(np.asarray(pen_timestamps, dtype=np.float64))[1:count + 1]
+        valid = dts > 0
+        jerks = np.diff(accelerations[:count + 1])[valid] / dts[valid]
+        return np.mean(jerks) if jerks.size else 0
+
+    @staticmethod
+    def _calculate_average_cisp(pen_positions, steps=None):
+        """Calculate average Curvature Index of Stroke Path (CISP)."""
+        pen_positions = np.asarray(pen_positions)
+        if len(pen_positions) < 3:
+            return 0
+
+        if steps is None:
+            steps = np.diff(pen_positions.reshape(-1, 2), axis=0)
+        v1, v2 = steps[:-1], steps[1:]
+
+        float_steps = steps.astype(np.float64)
+        norms = np.sqrt(_row_dots(float_steps, float_steps))
+        norm_v1, norm_v2 = norms[:-1], norms[1:]
+        turning = (norm_v1 != 0) & (norm_v2 != 0)
+        if not turning.any():
+            return 0
+
+        v1, v2 = v1[turning], v2[turning]
+        norm_v1, norm_v2 = norm_v1[turning], norm_v2[turning]
+
+        cosines = np.clip(_row_dots(v1, v2) / (norm_v1 * norm_v2), -1, 1)
+        angles = np.fromiter(map(math.acos, cosines.tolist()), dtype=np.float64, count=len(cosines))
+        return np.mean(np.abs(angles) / (norm_v1 + norm_v2))
+
+    def calculate_dispersion_index(self, processed_image_path):
+        """Calculate dispersion index from processed image."""
+        # Images processed by this logger already measured it before writing the file
+        dispersion_index = self._dispersion_indices.pop(processed_image_path, None)
+        if dispersion_index is not None:
+            return dispersion_index
+
+        img = Image.open(processed_image_path).convert("L")
+        img_array = np.array(img)
+        return self._dispersion_of(img_array)
+
+    @staticmethod
+    def _dispersion_of(img_array):
+        return np.count_nonzero(img_array < 255) / img_array.size
+
+    @staticmethod
+    def process_drawing(drawing_pixmap):
+        """
+        Process a drawing straight from its pixel buffer.
+
+        Produces exactly what the save/re-open round trips did: the standardized and
+        rescaled grayscale image, its LANCZOS thumbnail and its dispersion index.
+
+        Args:
+            drawing_pixmap: QPixmap or QImage containing the drawing
+
+        Returns:
+            tuple: (processed PIL image, thumbnail PIL image, dispersion index)
+        """
+        # Process image (grayscale, standardize, rescale)
+        gray = Image.fromarray(np.ascontiguousarray(qimage_to_array(drawing_pixmap)), 'RGB').convert('L')
+        img_array = np.array(gray).astype(np.float32)
+        normalized = img_array / 255.0
+        mean = normalized.mean()
+        std = normalized.std() or 1
+        standardized = (normalized - mean) / std
+        rescaled = ((standardized - standardized.min()) /
+                    (standardized.max() - standardized.min()) * 255).astype(np.uint8)
+        processed = Image.fromarray(rescaled)
+
+        # Create thumbnail for Excel
+        thumbnail_img = processed.copy()
+        thumbnail_img.thumbnail((150, 75), Image.LANCZOS)
+
+        return processed, thumbnail_img, DrawingMetricsLogger._dispersion_of(rescaled)
+
+    def process_and_save_image(self, drawing_pixmap, player_name, session_id,level):
+        """
+        Process the drawing image and save both processed and thumbnail versions.
+
+        The pixels are read once and each file is encoded once; the two PNG encodes run
+        in parallel on the image writer threads.
+
+        Args:
+            drawing_pixmap: QPixmap or QImage containing the drawing
+            player_name (str): Name of the player
+            session_id (int): Session ID for unique naming
+
+        Returns:
+            tuple: (processed_image_path, excel_image_path)
+        """
+        processed_path, excel_img_path = self._session_image_paths(player_name, session_id, level)
+
+        processed, thumbnail_img, dispersion_index = self.process_drawing(drawing_pixmap)
+        self._save_images(processed, thumbnail_img, processed_path, excel_img_path)
+
+        self._dispersion_indices[processed_path] = dispersion_index
+        return processed_path, excel_img_path
+
+    def _session_image_paths(self, player_name, session_id, level):
+        if not os.path.exists(self.save_folder):
+            os.makedirs(self.save_folder)
+
+        suffix = f"_{session_id}"
+        processed_path = os.path.join(self.save_folder, f"{player_name}_{level}_{suffix}.png")
+        excel_img_path = os.path.join(self.save_folder, f"{player_name}_{level}_excel{suffix}.png")
+        return processed_path, excel_img_path
+
+    @staticmethod
+    def _save_images(processed, thumbnail_img, processed_path, excel_img_path):
+        """Write both images; each is saved to a temporary file and renamed, so one that exists is complete."""
+        def save(image, path):
+            temp_path = path + ".tmp"
+            image.save(temp_path, format="PNG")
+            os.replace(temp_path, path)
+
+        writes = [_image_writer.submit(save, processed, processed_path),
+                  _image_writer.submit(save, thumbnail_img, excel_img_path)]
+        for write in writes:
+            write.result()
+
+    def initialize_excel_file(self):
+        """Initialize Excel file with headers if it doesn't exist."""
+        if not os.path.exists(self.excel_path):
+            new_results_workbook().save(self.excel_path)
+
+    def get_next_session_id(self, player_name):
+        """
+        Get the next session ID for a player.
+
+        IDs come from a per-player counter shared by the loggers of this results file,
+        so concurrent callers never get the same one. The counter starts from the rows
+        already stored plus those still waiting in the journals.
+        """
+        key = (os.path.abspath(self.excel_path), player_name)
+        with _session_ids_lock:
+            if key not in _session_ids:
+                _session_ids[key] = self._count_sessions(player_name)
+            _session_ids[key] += 1
+            return _session_ids[key]
+
+    def _count_sessions(self, player_name):
+        """Sessions stored or queued for a player."""
+        # The worker stores a record and retires it under write_lock, so it is counted exactly once
+        with self.persistence.write_lock:
+            queued = len(self.persistence.pending(lambda record: record['row'][0] == player_name))
+
+            if self.store is not None:
+                return self.store.session_count(player_name) + queued
+
+            with self.journal.flush_lock:
+                if self.journal.index is not None:
+                    return self.journal.index.session_count(player_name) + queued
+
+                existing_entries = self.journal.pending_count(player_name) + queued
+
+                if os.path.exists(self.excel_path):
+                    wb = load_workbook(self.excel_path)
+                    ws = wb["Results"]
+                    existing_entries += len([cell.value for cell in ws['A'] if cell.value == player_name])
+
+        return existing_entries
+
+    def save_to_excel(self, player_name, level, metrics, processed_image_path, excel_image_path, prediction_result=None):
+        """
+        Save all metrics and image to the results store.
+
+        With the Excel backend the row goes to the results journal and reaches the
+        workbook on the next flush.
+
+        Args:
+            player_name (str): Name of the player
+            level (str): Level identifier
+            metrics (dict): Dictionary of calculated metrics
+            processed_image_path (str): Path to processed image
+            excel_image_path (str): Path to thumbnail image for Excel
+            prediction_result (dict): Optional Parkinson's detection results
+        """
+        # Calculate dispersion index
+        dispersion_index = self.calculate_dispersion_index(processed_image_path)
+
+        row_data = self._results_row(player_name, level, metrics, dispersion_index, prediction_result)
+        self.append_results_row(row_data, excel_image_path, processed_image_path)
+
+    @staticmethod
+    def _results_row(player_name, level, metrics, dispersion_index, prediction_result=None):
+        # Prepare row data with Parkinson's detection results
+        return [
+            player_name, None, level,
+            metrics['total_time'], metrics['air_time'], metrics['paper_time'],
+            metrics['mean_speed'], metrics['mean_acceleration'],
+            metrics['mean_pressure'], metrics['pressure_variance'],
+            metrics['pendown_count'], metrics['max_x'], metrics['max_y'],
+            metrics['gmrtp'], metrics['mean_jerk'], dispersion_index, metrics['avg_cisp'],
+            prediction_result.get('risk_level', '') if prediction_result else '',
+            prediction_result.get('interpretation', '') if prediction_result else ''
+        ]
+
+    def append_results_row(self, row_data, excel_image_path=None, processed_image_path=None, record_id=None):
+        """Store one Results row; the thumbnail is embedded when the workbook is written."""
+        if self.store is not None:
+            self.store.add_session(row_data, excel_image_path, processed_image_path, record_id=record_id)
+        else:
+            self.journal.append(row_data, excel_image_path, record_id)
+
+    def _persist_session(self, record, payload):
+        """
+        Persistence worker handler: write the session's images and raw samples, then its
+        Results row.
+
+        The raw samples are journaled with the record and are archived either way. The
+        images are held only in memory, so a record recovered after a crash comes without
+        them: an image that was not written before the crash is stored as missing.
+        """
+        processed_path, excel_img_path = record['processed_image_path'], record['excel_image_path']
+        if payload is not None:
+            processed, thumbnail_img = payload
+            self._save_images(processed, thumbnail_img, processed_path, excel_img_path)
+        else:
+            processed_path = self._written_image(record['id'], processed_path)
+            excel_img_path = self._written_image(record['id'], excel_img_path)
+
+        if record.get('stroke_chunk'):
+            self.stroke_archive.append(base64.b64decode(record['stroke_chunk']), record['id'])
+        self.append_results_row(record['row'], excel_img_path, processed_path, record['id'])
+
+    @staticmethod
+    def _written_image(record_id, image_path):
+        """The image path of a recovered record, or None if the image was never written."""
+        if image_path and not os.path.exists(image_path):
+            print(f"Session {record_id}: image lost in a crash, {image_path}")
+            return None
+        return image_path
+
+    def flush_results(self):
+        """Write every journaled row to the workbook now. Returns the number of rows written."""
+        self.persistence.drain()
+        if self.store is not None:
+            return 0
+        return self.journal.flush()
+
+    def export_results(self, excel_path=None):
+        """
+        Bring the Results workbook up to date, by default at the logger's Excel path.
+
+        Returns:
+            str: Path of the workbook written
+        """
+        excel_path = excel_path or self.excel_path
+        self.persistence.drain()
+        if self.store is not None:
+            self.store.export_xlsx(excel_path)
+        else:
+            self.journal.flush()
+        return excel_path
+
+    def save_complete_session(self, drawing_pixmap, player_name, level,
+                              pen_positions, pen_timestamps, pressure_readings,
+                              start_time, end_time, air_time, paper_time, pendown_count, prediction_result=None,
+                              accumulator=None):
+        """
+        Complete method to process image, calculate metrics, and save everything.
+
+        Only the in-memory work happens here. The session, with its raw samples, is
+        journaled (fsynced) and queued for the persistence worker, which writes the images,
+        the stroke archive chunk and the Results row
+        in the background; this blocks only while the worker's queue is full.
+
+        Args:
+            drawing_pixmap: QPixmap or QImage containing the drawing
+            player_name (str): Name of the player
+            level (str): Level identifier
+            pen_positions (list): List of (x, y) pen positions
+            pen_timestamps (list): List of timestamps
+            pressure_readings (list): List of pressure values
+            start_time (float): Start time of drawing
+            end_time (float): End time of drawing
+            air_time (float): Total air time
+            paper_time (float): Total paper time
+            pendown_count (int): Number of pen down events
+            prediction_result (dict): Optional Parkinson's detection results
+            accumulator (StreamingMetricsAccumulator): Optional accumulator fed while drawing
+        """
+        # Get session ID
+        session_id = self.get_next_session_id(player_name)
+
+        # Process images; the worker saves them
+        processed_path, excel_img_path = self._session_image_paths(player_name, session_id, level)
+        processed, thumbnail_img, dispersion_index = self.process_drawing(drawing_pixmap)
+
+        # Calculate metrics
+        metrics = self.calculate_metrics(
+            pen_positions, pen_timestamps, pressure_readings,
+            start_time, end_time, air_time, paper_time, pendown_count, accumulator
+        )
+
+        # Raw samples, with what the metrics need besides them, for recomputing later
+        record_id = uuid.uuid4().hex
+        stroke_starts = [0]
+        if accumulator is not None and accumulator.sample_count == len(pen_positions):
+            stroke_starts += accumulator.stroke_starts
+        stroke_chunk = encode_session(pen_positions, pen_timestamps, pressure_readings, stroke_starts, metadata={
+            'player': player_name, 'level': level, 'session_id': session_id, 'record_id': record_id,
+            'created_at': time.time(), 'start_time': start_time, 'end_time': end_time,
+            'air_time': air_time, 'paper_time': paper_time, 'pendown_count': pendown_count})
+
+        # Queue for saving with prediction results
+        row_data = self._results_row(player_name, level, metrics, dispersion_index, prediction_result)
+        self.persistence.submit({'id': record_id, 'row': row_data, 'processed_image_path': processed_path,
+                                 'excel_image_path': excel_img_path,
+                                 'stroke_chunk': base64.b64encode(stroke_chunk).decode('ascii')},
+                                (processed, thumbnail_img))
+
+        return metrics
+
+
+# How a level's 13-feature model vector times its derivatives. Levels 1, 2, 4, 5, 6 and 8
+# divide each change by the step that produced it; Levels 3 and 7 by the raw timestamp
+# step at the same index.
+CHAINED_KINEMATICS = "chained"
+INDEXED_KINEMATICS = "indexed"
+LEVEL_KINEMATICS = {"Level 3": INDEXED_KINEMATICS, "Level 7": INDEXED_KINEMATICS}
+
+
+def session_arrays(pen_positions, pen_timestamps):
+    """
+    The per-step arrays session_metrics and model_features both start from.
+
+    The two define a step's length with different roundings: calculate_metrics with
+    math.hypot, the level loops as the square root of libm squares. When every moving step
+    is a whole number of pixels, as widget coordinates are, the squares and their sum are
+    exact and both reduce to one correctly rounded square root, so a single array serves
+    both. Fractional steps get one array per rounding.
+
+    Returns:
+        dict: positions and timestamps as from as_sample_arrays; steps and dts between
+            consecutive samples; moving, the steps with a positive time step; distances
+            and speeds of the moving steps as calculate_metrics rounds them; model_speeds
+            as the level loops round them
+    """
+    positions, timestamps = as_sample_arrays(pen_positions, pen_timestamps)
+    steps = np.diff(positions, axis=0)
+    dts = np.diff(timestamps)
+    moving = dts > 0
+    moving_steps = steps[moving]
+    moving_dts = dts[moving]
+
+    # Below 2 ** 26 pixels a sum of two squares stays exact in a float64
+    whole = (moving_steps.dtype.kind in 'iu' or np.array_equal(moving_steps, np.trunc(moving_steps))) and \
+        (not moving_steps.size or np.abs(moving_steps).max() < 2 ** 26)
+    if whole:
+        squares = moving_steps.astype(np.float64) ** 2
+        distances = np.sqrt(squares[:, 0] + squares[:, 1])
+        speeds = model_speeds = distances / moving_dts
+    else:
+        # math.hypot is correctly rounded; np.hypot can differ from it in the last bit
+        distances = np.fromiter(map(math.hypot, moving_steps[:, 0].tolist(), moving_steps[:, 1].tolist()),
+                                dtype=np.float64, count=len(moving_steps))
+        speeds = distances / moving_dts
+        model_speeds = np.sqrt(_squares(moving_steps[:, 0]) + _squares(moving_steps[:, 1])) / moving_dts
+
+    return {'positions': positions, 'timestamps': timestamps, 'steps': steps, 'dts': dts, 'moving': moving,
+            'distances': distances, 'speeds': speeds, 'model_speeds': model_speeds}
+
+
+def session_metrics(pen_positions, pen_timestamps, pressure_readings,
+                    start_time, end_time, air_time, paper_time, pendown_count, accumulator=None, arrays=None):
+    """
+    The spreadsheet metrics of DrawingMetricsLogger.calculate_metrics.
+
+    arrays, from session_arrays() over the same samples, is used instead of recomputing them.
+    """
+    if accumulator is not None and accumulator.sample_count == len(pen_positions):
+        return accumulator.finalize(start_time, end_time, air_time, paper_time, pendown_count)
+
+    total_time = (end_time - start_time) if start_time else 0
+    if arrays is None:
+        arrays = session_arrays(pen_positions, pen_timestamps)
+    pen_positions, pen_timestamps = arrays['positions'], arrays['timestamps']
+
+    # Calculate distances, speeds, and accelerations
+    distances, speeds, accelerations = DrawingMetricsLogger._calculate_kinematics(pen_positions, pen_timestamps,
+                                                                                  arrays)
+
+    # Basic metrics
+    mean_speed = np.mean(speeds) if speeds.size else 0
+    mean_acceleration = np.mean(accelerations) if accelerations.size else 0
+    pressures = np.asarray(pressure_readings, dtype=np.float64)
+    mean_pressure = np.mean(pressures) if pressures.size else 0
+    pressure_variance = np.var(pressures) if pressures.size else 0
+
+    # Spatial metrics
+    max_x, max_y = DrawingMetricsLogger._calculate_spatial_extent(pen_positions)
+
+    # Advanced metrics
+    gmrtp = DrawingMetricsLogger._calculate_gmrtp(distances, total_time)
+    mean_jerk = DrawingMetricsLogger._calculate_mean_jerk(accelerations, pen_timestamps)
+    avg_cisp = DrawingMetricsLogger._calculate_average_cisp(pen_positions, arrays['steps'])
+
+    return {
+        'total_time': total_time,
+        'air_time': air_time,
+        'paper_time': paper_time,
+        'mean_speed': mean_speed,
+        'mean_acceleration': mean_acceleration,
+        'mean_pressure': mean_pressure,
+        'pressure_variance': pressure_variance,
+        'pendown_count': pendown_count,
+        'max_x': max_x,
+        'max_y': max_y,
+        'gmrtp': gmrtp,
+        'mean_jerk': mean_jerk,
+        'avg_cisp': avg_cisp
+    }
+
+
+def _squares(values):
+    """
+    values ** 2 as the per-sample loops computed it. Float scalars are squared with libm
+    pow, which can differ from the x * x of array ** 2 in the last bit.
+    """
+    if values.dtype.kind != 'f':
+        return values ** 2
+    return np.fromiter(map(math.pow, values.tolist(), itertools.repeat(2.0)), dtype=np.float64, count=len(values))
+
+
+def model_features(pen_positions, pen_timestamps, pressure_readings,
+                   start_time, end_time, air_time, paper_time, pendown_count, kinematics=CHAINED_KINEMATICS,
+                   arrays=None):
+    """
+    The 13-feature vector the Alzheimer's model (model14.pkl) takes, as the level screens'
+    calculate_drawing_metrics loops defined it, element for element.
+
+    arrays, from session_arrays() over the same samples, is used instead of recomputing them.
+
+    Returns:
+        list: [total_time, air_time, paper_time, mean_speed, mean_acc, pressure_mean,
+            pressure_var, pendown_count, max_x, max_y, gmrtp, mean_jerk, disp_index]
+    """
+    if arrays is None:
+        arrays = session_arrays(pen_positions, pen_timestamps)
+    positions, timestamps = arrays['positions'], arrays['timestamps']
+    pressures = np.asarray(pressure_readings, dtype=np.float64) if len(pressure_readings) else np.ones(len(positions))
+
+    total_time = end_time - start_time if start_time and end_time else 0
+
+    velocities = accelerations = jerks = np.empty(0)
+    if len(positions) > 1:
+        dts, moving = arrays['dts'], arrays['moving']
+        velocities = arrays['model_speeds']
+
+        if kinematics == CHAINED_KINEMATICS:
+            moving_dts = dts[moving]
+            accelerations = np.diff(velocities) / moving_dts[1:len(velocities)]
+            jerks = np.diff(accelerations) / moving_dts[2:len(velocities)]
+        else:
+            delta_t = dts[1:len(velocities)]
+            accelerations = np.diff(velocities)[delta_t > 0] / delta_t[delta_t > 0]
+            delta_t = dts[2:len(accelerations) + 1]
+            jerks = np.diff(accelerations)[delta_t > 0] / delta_t[delta_t > 0]
+
+    mean_speed = np.mean(velocities) if velocities.size else 0
+    mean_acc = np.mean(accelerations) if accelerations.size else 0
+    mean_jerk = np.mean(jerks) if jerks.size else 0
+
+    pressure_mean = np.mean(pressures) if len(pressures) > 0 else 0
+    pressure_var = np.var(pressures) if len(pressures) > 0 else 0
+
+    max_x = np.max(positions[:, 0]) - np.min(positions[:, 0]) if len(positions) > 0 else 0
+    max_y = np.max(positions[:, 1]) - np.min(positions[:, 1]) if len(positions) > 0 else 0
+
+    gmrtp = total_time / max(1, len(positions)) if len(positions) > 0 else 0
+
+    if len(positions) > 1:
+        center_x = np.mean(positions[:, 0])
+        center_y = np.mean(positions[:, 1])
+        distances = np.sqrt((positions[:, 0] - center_x) ** 2 + (positions[:, 1] - center_y) ** 2)
+        disp_index = np.std(distances)
+    else:
+        disp_index = 0
+
+    return [total_time, air_time, paper_time, mean_speed, mean_acc,
+            pressure_mean, pressure_var, pendown_count, max_x, max_y,
+            gmrtp, mean_jerk, disp_index]
+
+
+def session_features(pen_positions, pen_timestamps, pressure_readings,
+                     start_time, end_time, air_time, paper_time, pendown_count,
+                     accumulator=None, kinematics=CHAINED_KINEMATICS):
+    """
+    Spreadsheet metrics and model feature vector of one session, from one session_arrays()
+    pass shared by both.
+
+    Returns:
+        tuple: (calculate_metrics dict, 13-feature model vector)
+    """
+    arrays = session_arrays(pen_positions, pen_timestamps)
+    session = (arrays['positions'], arrays['timestamps'], np.asarray(pressure_readings, dtype=np.float64),
+               start_time, end_time, air_time, paper_time, pendown_count)
+    return (session_metrics(*session, accumulator, arrays=arrays),
+            model_features(*session, kinematics, arrays=arrays))
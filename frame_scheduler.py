@@ -0,0 +1,101 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+
+class FrameScheduler(QObject):
+    """
+    Runs a widget's animation step on a timer only while something is moving.
+
+    Each frame calls step(), which advances the animation and returns the widget rects
+    it changed; only those are repainted. step() returns None once the animation has
+    settled, and the timer stops until wake() is called, e.g. from a mouse move. The
+    scheduler also stops while the widget is hidden or blocked by a modal dialog, and
+    resumes when it is shown or unblocked again.
+    """
+
+    def __init__(self, widget, step, interval=16, latency_window=256):
+        """
+        Args:
+            widget (QWidget): Widget that is animated and repainted
+            step (callable): step() -> list of QRect to repaint, or None when settled
+            interval (int): Milliseconds between frames while running
+            latency_window (int): Recent frames kept for the frame time statistics
+        """
+        super().__init__(widget)
+        self.widget = widget
+        self.step = step
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._frame)
+        self._blocked = False
+        self._frame_times = deque(maxlen=latency_window)
+        self.frames = 0
+        self.idle_stops = 0
+        self.reset_stats()
+        widget.installEventFilter(self)
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def wake(self):
+        """Start producing frames again, unless the widget is hidden or blocked."""
+        if not self._timer.isActive() and self.widget.isVisible() and not self._blocked:
+            self._timer.start()
+
+    def stop(self):
+        """Stop producing frames until the next wake()."""
+        self._timer.stop()
+
+    def eventFilter(self, watched, event):
+        if watched is self.widget:
+            if event.type() == QEvent.Hide:
+                self._timer.stop()
+            elif event.type() == QEvent.WindowBlocked:
+                self._blocked = True
+                self._timer.stop()
+            elif event.type() == QEvent.WindowUnblocked:
+                self._blocked = False
+                QTimer.singleShot(0, self.wake)
+            elif event.type() == QEvent.Show:
+                # Visible only once the show event has been handled
+                QTimer.singleShot(0, self.wake)
+        return False
+
+    def _frame(self):
+        start = time.perf_counter()
+        rects = self.step()
+        if rects is None:
+            self._timer.stop()
+            self.idle_stops += 1
+        else:
+            for rect in rects:
+                self.widget.update(rect)
+        self.frames += 1
+        self._frame_times.append((time.perf_counter() - start) * 1000)
+
+    def reset_stats(self):
+        """Start a new measurement period for stats()."""
+        self._period_start = time.perf_counter()
+        self._period_cpu = time.process_time()
+        self._period_frames = self.frames
+
+    def stats(self):
+        """
+        Frames run, frame time percentiles in milliseconds (step() and the repaint
+        requests; the paints follow in the event loop) and the process's CPU use since
+        the last reset_stats().
+        """
+        wall = time.perf_counter() - self._period_start
+        cpu = time.process_time() - self._period_cpu
+        frame_times = sorted(self._frame_times)
+        return {
+            'running': self.is_running(),
+            'frames': self.frames - self._period_frames,
+            'idle_stops': self.idle_stops,
+            'frame_p50_ms': frame_times[len(frame_times) // 2] if frame_times else None,
+            'frame_p95_ms': frame_times[min(len(frame_times) - 1, int(len(frame_times) * 0.95))] if frame_times else None,
+            'frame_max_ms': frame_times[-1] if frame_times else None,
+            'cpu_percent': 100 * cpu / wall if wall > 0 else 0.0,
+        }
@@ -0,0 +1,99 @@
+import numpy as np
+from PyQt5.QtGui import QImage
+
+
+_DIRECT_FORMATS = (QImage.Format_RGB32, QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied)
+# Formats whose stored bytes are the straight colours, as a PNG of the image would hold them
+_STRAIGHT_RGB_FORMATS = (QImage.Format_RGB32, QImage.Format_ARGB32)
+
+
+def qimage_to_array(image):
+    """
+    Return an (H, W, 3) uint8 RGB view of a QImage without copying its pixels.
+
+    QImages in RGB32 or ARGB32 are viewed in place, so the image must stay alive and
+    unmodified while the array is in use. QPixmaps and other formats need a conversion
+    first, and the result is then copied out of the temporary image. Premultiplied
+    images, which is what a QPixmap with transparency becomes, are un-premultiplied to
+    ARGB32, so translucent pixels get the colours a saved PNG would have.
+
+    Args:
+        image: QImage or QPixmap
+
+    Returns:
+        numpy.ndarray: Read-only RGB pixel data
+    """
+    converted = False
+    if not isinstance(image, QImage):
+        image = image.toImage()
+        converted = True
+
+    if image.format() not in _STRAIGHT_RGB_FORMATS:
+        image = image.convertToFormat(QImage.Format_ARGB32 if image.hasAlphaChannel() else QImage.Format_RGB32)
+        converted = True
+
+    height = image.height()
+    width = image.width()
+
+    bits = image.constBits()
+    bits.setsize(image.bytesPerLine() * height)
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, image.bytesPerLine())
+
+    # 32-bit Qt formats are stored as B, G, R, A bytes on little-endian machines
+    bgra = rows[:, :width * 4].reshape(height, width, 4)
+    rgb = bgra[:, :, 2::-1]
+
+    # A converted image is local to this call, so its pixels cannot be borrowed
+    return rgb.copy() if converted else rgb
+
+
+def qimage_alpha(image):
+    """
+    Return an (H, W) uint8 view of a QImage's alpha channel without copying its pixels.
+
+    As with qimage_to_array, 32-bit images are viewed in place and must outlive the
+    array; premultiplying leaves alpha unchanged, so ARGB32_Premultiplied is viewed too.
+    Other formats are converted to ARGB32 first and the alpha copied out.
+
+    Args:
+        image: QImage or QPixmap
+
+    Returns:
+        numpy.ndarray: Read-only alpha values; 255 everywhere for formats without alpha
+    """
+    converted = False
+    if not isinstance(image, QImage):
+        image = image.toImage()
+        converted = True
+
+    if image.format() not in _DIRECT_FORMATS:
+        image = image.convertToFormat(QImage.Format_ARGB32)
+        converted = True
+
+    height = image.height()
+    width = image.width()
+
+    bits = image.constBits()
+    bits.setsize(image.bytesPerLine() * height)
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, image.bytesPerLine())
+
+    # RGB32 pixels are stored as 0xffRRGGBB, so their alpha byte is 255 as well
+    alpha = rows[:, :width * 4].reshape(height, width, 4)[:, :, 3]
+    return alpha.copy() if converted else alpha
+
+
+def new_rgb32_image(width, height):
+    """
+    Create an RGB32 QImage together with a writable NumPy view of its pixels.
+
+    Whatever is written to the array is the image's content, with no copy in either
+    direction. Pixels are 0xffRRGGBB values.
+
+    Returns:
+        tuple: (QImage, (H, W) uint32 array)
+    """
+    image = QImage(width, height, QImage.Format_RGB32)
+    bits = image.bits()
+    bits.setsize(image.bytesPerLine() * height)
+    rows = np.frombuffer(bits, dtype=np.uint32).reshape(height, image.bytesPerLine() // 4)
+    return image, rows[:, :width]
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+
+
+def resident_memory_bytes():
+    """Return the resident set size of this process in bytes, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    Each model is registered under a key together with a loader callable. The loader
+    runs at most once, either lazily on the first get() or eagerly through warm_up(),
+    and every caller afterwards receives the same instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders = {}
+        self._key_locks = {}
+        self._models = {}
+        self._stats = {}
+
+    def register(self, key, loader):
+        """
+        Register a loader for a model key. Registering an existing key is a no-op.
+
+        Args:
+            key (hashable): Identifier of the model
+            loader (callable): Zero-argument function returning the loaded model
+        """
+        with self._lock:
+            if key not in self._loaders:
+                self._loaders[key] = loader
+                self._key_locks[key] = threading.Lock()
+        return key
+
+    def get(self, key):
+        """Return the model for a registered key, loading it on first use."""
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            if key not in self._loaders:
+                raise KeyError(f"No model registered under {key!r}")
+            key_lock = self._key_locks[key]
+
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+
+            memory_before = resident_memory_bytes()
+            start = time.perf_counter()
+            model = self._loaders[key]()
+            load_time = time.perf_counter() - start
+            memory_after = resident_memory_bytes()
+
+            with self._lock:
+                self._models[key] = model
+                self._stats[key] = {
+                    'load_time': load_time,
+                    'memory_bytes': (memory_after - memory_before
+                                     if memory_before is not None and memory_after is not None else None),
+                    'thread': threading.current_thread().name
+                }
+            return model
+
+    def get_or_load(self, key, loader):
+        """Register the loader if needed and return the model for the key."""
+        self.register(key, loader)
+        return self.get(key)
+
+    def is_loaded(self, key):
+        with self._lock:
+            return key in self._models
+
+    def warm_up(self, keys=None):
+        """
+        Load registered models ahead of first use.
+
+        Args:
+            keys (iterable): Keys to load, defaults to every registered key
+
+        Returns:
+            dict: Load statistics for the warmed models
+        """
+        with self._lock:
+            keys = list(self._loaders) if keys is None else list(keys)
+
+        for key in keys:
+            self.get(key)
+
+        stats = self.stats()
+        return {key: stats[key] for key in keys if key in stats}
+
+    def warm_up_in_background(self, keys=None):
+        """
+        Load models on a daemon thread so the GUI stays responsive.
+
+        A model that fails to load here is reported and left unloaded; the caller that
+        needs it will retry through get() and see the error itself.
+
+        Returns:
+            threading.Thread: The started loader thread
+        """
+        with self._lock:
+            keys = list(self._loaders) if keys is None else list(keys)
+
+        def load_all():
+            for key in keys:
+                try:
+                    self.get(key)
+                except Exception as e:
+                    print(f"Warming up model {key} failed: {e}")
+
+        thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Return a copy of the load time (s) and resident memory delta (bytes) per loaded model."""
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def clear(self):
+        """Drop every loaded model so the next get() reloads it."""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+
+registry = ModelRegistry()
+
+
+CACHE_FILENAME = "prediction_cache.sqlite3"
+
+
+def _open_cache(model_path):
+    """Shared prediction cache stored next to the model file, or None if it cannot be opened."""
+    try:
+        from prediction_cache import shared_cache
+        return shared_cache(os.path.join(os.path.dirname(os.path.abspath(model_path)), CACHE_FILENAME))
+    except Exception as e:
+        return None
+
+
+def _load_parkinsons_detector(model_path, image_size, backend='keras'):
+    from parkinsons_detector import ParkinsonsDetector
+    return ParkinsonsDetector(model_path=model_path, image_size=image_size, backend=backend,
+                              cache=_open_cache(model_path))
+
+
+def _load_alzheimers_model(model_folder):
+    """Load model14.pkl/scaler14.pkl; a file that fails to load raises, so nothing is cached for it."""
+    try:
+        import joblib
+    except ImportError:
+        return None, None
+
+    model_path = os.path.join(model_folder, "model14.pkl")
+    scaler_path = os.path.join(model_folder, "scaler14.pkl")
+
+    if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+        return None, None
+
+    model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+
+    cache = _open_cache(model_path)
+    if cache is not None:
+        from prediction_cache import CachedClassifier, file_digest
+        model = CachedClassifier(model, cache, file_digest(model_path), kind='alzheimers_proba')
+
+    return model, scaler
+
+
+def register_parkinsons_detector(model_path, image_size=(128, 128), backend='keras'):
+    key = ('parkinsons_detector', os.path.abspath(model_path), tuple(image_size), backend)
+    return registry.register(key, lambda: _load_parkinsons_detector(model_path, tuple(image_size), backend))
+
+
+def register_alzheimers_model(model_folder):
+    key = ('alzheimers_model', os.path.abspath(model_folder))
+    return registry.register(key, lambda: _load_alzheimers_model(model_folder))
+
+
+def get_parkinsons_detector(model_path, image_size=(128, 128), backend='keras'):
+    """Return the shared ParkinsonsDetector for a model file and backend ("keras" or "tflite")."""
+    return registry.get(register_parkinsons_detector(model_path, image_size, backend))
+
+
+def get_alzheimers_model(model_folder):
+    """
+    Return the shared (model, scaler) pair from model14.pkl/scaler14.pkl, or (None, None).
+
+    A load that fails is reported and not cached, so the next call tries again.
+    """
+    try:
+        return registry.get(register_alzheimers_model(model_folder))
+    except Exception as e:
+        print(f"Error loading Alzheimer's model: {e}")
+        return None, None
+
+
+def warm_up(keys=None):
+    return registry.warm_up(keys)
+
+
+def warm_up_in_background(keys=None):
+    return registry.warm_up_in_background(keys)
+
+
+def model_stats():
+    return registry.stats()
@@ -0,0 +1,35 @@
+import math
+
+from PyQt5.QtCore import QPoint, QRect
+
+
+def segment_rect(start, end, pen_width):
+    """
+    Widget area a drawLine(start, end) with a round-capped pen of this width can touch.
+
+    Args:
+        start (QPoint): First end of the segment
+        end (QPoint): Second end of the segment
+        pen_width (float): Width of the pen the segment is drawn with
+
+    Returns:
+        QRect: The segment's bounding box, grown by half the pen width plus a pixel of
+            antialiasing on every side
+    """
+    margin = math.ceil(pen_width / 2) + 1
+    return QRect(start, end).normalized().adjusted(-margin, -margin, margin, margin)
+
+
+def blit_exposed(painter, exposed, pixmap, origin=QPoint(0, 0)):
+    """
+    Draw only the part of a layer pixmap placed at origin that lies inside exposed.
+
+    Args:
+        painter (QPainter): Painter on the widget, inside paintEvent
+        exposed (QRect): The paint event's rect
+        pixmap (QPixmap): Layer to draw
+        origin (QPoint): Widget position of the layer's top-left corner
+    """
+    target = exposed.intersected(QRect(origin, pixmap.size()))
+    if not target.isEmpty():
+        painter.drawPixmap(target, pixmap, target.translated(-origin))
@@ -1,10 +1,8 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
-from tensorflow.keras.applications import MobileNetV2
-from tensorflow.keras.optimizers import Adam
 from PIL import Image, ImageEnhance, ImageFilter
 import warnings
 import openpyxl
@@ -12,34 +10,95 @@ from openpyxl import load_workbook
 
 warnings.filterwarnings('ignore')
 
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-tf.config.threading.set_inter_op_parallelism_threads(0)
-tf.config.threading.set_intra_op_parallelism_threads(0)
+# TensorFlow takes seconds to import, so it is only loaded when a detector needs it
+tf = None
+keras = None
+_tensorflow_lock = threading.Lock()
+
+# Part of every cached prediction's key. Bump it whenever ImagePreprocessor or
+# preprocess_array changes what the model is fed, so stale results are not served.
+PREPROCESSING_VERSION = 1
+
+
+def _ensure_tensorflow():
+    """Import TensorFlow and apply the global threading, JIT and precision settings once."""
+    global tf, keras
 
-try:
-    tf.config.optimizer.set_jit(True)
-except:
-    pass
+    with _tensorflow_lock:
+        if tf is not None:
+            return tf
 
-gpus = tf.config.list_physical_devices('GPU')
-if gpus:
-    try:
-        for gpu in gpus:
-            tf.config.experimental.set_memory_growth(gpu, True)
-        tf.keras.mixed_precision.set_global_policy('mixed_float16')
-    except RuntimeError:
-        pass
-else:
-    tf.keras.mixed_precision.set_global_policy('float32')
+        os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+        import tensorflow
+        from tensorflow import keras as tensorflow_keras
 
-np.random.seed(42)
-tf.random.set_seed(42)
+        tensorflow.config.threading.set_inter_op_parallelism_threads(0)
+        tensorflow.config.threading.set_intra_op_parallelism_threads(0)
+
+        try:
+            tensorflow.config.optimizer.set_jit(True)
+        except:
+            pass
+
+        gpus = tensorflow.config.list_physical_devices('GPU')
+        if gpus:
+            try:
+                for gpu in gpus:
+                    tensorflow.config.experimental.set_memory_growth(gpu, True)
+                tensorflow.keras.mixed_precision.set_global_policy('mixed_float16')
+            except RuntimeError:
+                pass
+        else:
+            tensorflow.keras.mixed_precision.set_global_policy('float32')
+
+        np.random.seed(42)
+        tensorflow.random.set_seed(42)
+
+        keras = tensorflow_keras
+        tf = tensorflow
+        return tf
+
+
+def _bilinear_weights(in_size, out_size):
+    # Half-pixel centers, matching tf.image.resize(method='bilinear') without antialiasing
+    positions = (np.arange(out_size, dtype=np.float32) + 0.5) * np.float32(in_size / out_size) - 0.5
+    floors = np.floor(positions)
+    lower = np.maximum(floors, 0).astype(np.intp)
+    upper = np.minimum(np.ceil(positions), in_size - 1).astype(np.intp)
+    return lower, upper, (positions - floors).astype(np.float32)
+
+
+def resize_bilinear(image, size):
+    """
+    Resize an (H, W, C) image to size with NumPy, the way tf.image.resize does.
+
+    Lets the TFLite backend preprocess drawings without importing TensorFlow.
+
+    Args:
+        image (np.ndarray): Image with a trailing channel axis
+        size (tuple): Output height and width
+
+    Returns:
+        np.ndarray: float32 array of shape (height, width, C)
+    """
+    image = np.asarray(image, dtype=np.float32)
+    height, width = size
+    top, bottom, y_lerp = _bilinear_weights(image.shape[0], height)
+    left, right, x_lerp = _bilinear_weights(image.shape[1], width)
+
+    y_lerp = y_lerp[:, None, None]
+    x_lerp = x_lerp[None, :, None]
+    upper_rows = image[top]
+    lower_rows = image[bottom]
+    top_values = upper_rows[:, left] + (upper_rows[:, right] - upper_rows[:, left]) * x_lerp
+    bottom_values = lower_rows[:, left] + (lower_rows[:, right] - lower_rows[:, left]) * x_lerp
+    return top_values + (bottom_values - top_values) * y_lerp
 
 
 class ImagePreprocessor:
 
     @staticmethod
-    def remove_background_and_isolate_drawing(image_path, output_path=None):
+    def load_image_array(image_path):
         try:
             image = Image.open(image_path)
             if image is None:
@@ -48,60 +107,110 @@ class ImagePreprocessor:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
 
-            gray_image = image.convert('L')
-            blurred = gray_image.filter(ImageFilter.GaussianBlur(radius=1.5))
-            gray_array = np.array(blurred)
+            return np.asarray(image)
 
-            hist, _ = np.histogram(gray_array.flatten(), bins=256, range=(0, 256))
+        except Exception as e:
+            return None
 
-            total_pixels = gray_array.size
-            current_max = 0
-            threshold = 0
-            sum_total = np.sum(np.arange(256) * hist)
-            sum_background = 0
-            weight_background = 0
+    @staticmethod
+    def remove_background_and_isolate_drawing(image_path, output_path=None):
+        image_array = ImagePreprocessor.load_image_array(image_path)
+        if image_array is None:
+            return None
 
-            for i in range(256):
-                weight_background += hist[i]
-                if weight_background == 0:
-                    continue
+        return ImagePreprocessor.isolate_drawing_from_array(image_array, output_path)
 
-                weight_foreground = total_pixels - weight_background
-                if weight_foreground == 0:
-                    break
+    @staticmethod
+    def isolate_drawing_from_array(image_array, output_path=None):
+        try:
+            final_image_array = ImagePreprocessor.isolate_drawings([image_array])[0]
 
-                sum_background += i * hist[i]
-                mean_background = sum_background / weight_background
-                mean_foreground = (sum_total - sum_background) / weight_foreground
+            if output_path:
+                Image.fromarray(final_image_array, mode='RGB').save(output_path)
 
-                between_class_variance = weight_background * weight_foreground * (
-                        mean_background - mean_foreground) ** 2
+            return final_image_array
 
-                if between_class_variance > current_max:
-                    current_max = between_class_variance
-                    threshold = i
+        except Exception as e:
+            return None
 
-            binary_array = (gray_array > threshold).astype(np.uint8) * 255
-            binary_image = Image.fromarray(binary_array, mode='L')
-            cleaned = binary_image.filter(ImageFilter.MedianFilter(size=3))
-            edge_enhanced = cleaned.filter(ImageFilter.EDGE_ENHANCE_MORE)
+    @staticmethod
+    def isolate_drawings(images):
+        """
+        Remove the background from a stack of equally sized drawings.
+
+        Produces the same white-on-black output as the original PIL chain (grayscale,
+        GaussianBlur, Otsu, MedianFilter, EDGE_ENHANCE_MORE OR, invert). On a binary
+        image the 3x3 median is a majority vote and the edge-enhanced copy never adds
+        a pixel the cleaned copy lacks, so everything after the blur collapses into one
+        threshold, one box sum and one inverting compare over the whole stack.
+
+        Args:
+            images: (N, H, W, 3) RGB or (N, H, W) grayscale uint8 array, or a list of
+                equally sized images
+
+        Returns:
+            numpy.ndarray: (N, H, W, 3) uint8 array
+        """
+        blurred = np.stack([ImagePreprocessor._blurred_gray(image) for image in images])
+        thresholds = ImagePreprocessor.otsu_thresholds(blurred)
+        return ImagePreprocessor._threshold_clean_invert(blurred, thresholds)
 
-            cleaned_array = np.array(cleaned)
-            edge_array = np.array(edge_enhanced)
+    @staticmethod
+    def _blurred_gray(image_array):
+        image_array = np.asarray(image_array)
+        if image_array.ndim == 2:
+            gray_image = Image.fromarray(np.ascontiguousarray(image_array, dtype=np.uint8), mode='L')
+        else:
+            image = Image.fromarray(np.ascontiguousarray(image_array[:, :, :3], dtype=np.uint8), mode='RGB')
+            gray_image = image.convert('L')
 
-            combined_array = np.logical_or(cleaned_array > 128, edge_array > 128).astype(np.uint8) * 255
-            inverted_array = 255 - combined_array
-            final_image_pil = Image.fromarray(inverted_array, mode='L')
-            final_image_rgb = final_image_pil.convert('RGB')
-            final_image_array = np.array(final_image_rgb)
+        return np.asarray(gray_image.filter(ImageFilter.GaussianBlur(radius=1.5)))
 
-            if output_path:
-                final_image_rgb.save(output_path)
+    @staticmethod
+    def otsu_thresholds(gray_stack):
+        """
+        Otsu's threshold for each image of an (N, H, W) uint8 stack.
+
+        Evaluates the between-class variance for all 256 levels at once from cumulative
+        sums of the histogram, picking the first maximum like the original loop.
+        """
+        gray_stack = np.asarray(gray_stack)
+        count = gray_stack.shape[0]
+        flat = gray_stack.reshape(count, -1)
+        total_pixels = flat.shape[1]
+
+        hist = np.stack([np.bincount(row, minlength=256) for row in flat]).astype(np.int64)
+        levels = np.arange(256, dtype=np.int64)
+
+        weight_background = np.cumsum(hist, axis=1)
+        weight_foreground = total_pixels - weight_background
+        sum_background = np.cumsum(hist * levels, axis=1)
+        sum_total = sum_background[:, -1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_background = sum_background / weight_background
+            mean_foreground = (sum_total - sum_background) / weight_foreground
+            between_class_variance = weight_background * weight_foreground * (
+                    mean_background - mean_foreground) ** 2
+
+        valid = (weight_background > 0) & (weight_foreground > 0)
+        between_class_variance = np.where(valid, between_class_variance, 0.0)
+
+        thresholds = between_class_variance.argmax(axis=1)
+        thresholds[between_class_variance.max(axis=1) <= 0] = 0
+        return thresholds
 
-            return final_image_array
+    @staticmethod
+    def _threshold_clean_invert(gray_stack, thresholds):
+        binary = gray_stack > thresholds[:, None, None]
 
-        except Exception as e:
-            return None
+        # 3x3 majority vote with edge replication, matching PIL's MedianFilter(3) on 0/255 input
+        padded = np.pad(binary.view(np.uint8), ((0, 0), (1, 1), (1, 1)), mode='edge')
+        row_sum = padded[:, :, :-2] + padded[:, :, 1:-1] + padded[:, :, 2:]
+        votes = row_sum[:, :-2] + row_sum[:, 1:-1] + row_sum[:, 2:]
+
+        inverted = (votes < 5).view(np.uint8) * np.uint8(255)
+        return np.repeat(inverted[..., None], 3, axis=-1)
 
     @staticmethod
     def enhance_line_drawing(image_array):
@@ -124,36 +233,169 @@ class ImagePreprocessor:
             return image_array
 
 
+class TFLiteModel:
+    """
+    A converted .tflite spiral model behind the same predict() call as the Keras model.
+
+    Uses the standalone tflite_runtime interpreter when it is installed and falls back to
+    tf.lite otherwise. Quantized (int8/uint8) inputs and outputs are converted to and from
+    float32 here, so callers always pass and receive floats.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            Interpreter = _ensure_tensorflow().lite.Interpreter
+
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()
+        self._refresh_details()
+
+    def _refresh_details(self):
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+
+    @staticmethod
+    def _quantize(values, details):
+        scale, zero_point = details['quantization']
+        dtype = details['dtype']
+        if dtype == np.float32 or not scale:
+            return values.astype(dtype)
+
+        limits = np.iinfo(dtype)
+        return np.clip(np.round(values / scale + zero_point), limits.min, limits.max).astype(dtype)
+
+    @staticmethod
+    def _dequantize(values, details):
+        scale, zero_point = details['quantization']
+        if values.dtype == np.float32 or not scale:
+            return values.astype(np.float32)
+
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+
+        with self._lock:
+            if tuple(self.input_details['shape']) != batch.shape:
+                self.interpreter.resize_tensor_input(self.input_details['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._refresh_details()
+
+            self.interpreter.set_tensor(self.input_details['index'], self._quantize(batch, self.input_details))
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_details['index'])
+
+        return self._dequantize(output, self.output_details)
+
+
 class ParkinsonsDetector:
 
-    def __init__(self, model_path='best_parkinsons_model.keras', image_size=(128, 128)):
+    def __init__(self, model_path='best_parkinsons_model.keras', image_size=(128, 128), backend='keras',
+                 warm_up=True, cache=None):
+        """
+        Args:
+            model_path (str): .keras model, or a .tflite file when backend is "tflite"
+            image_size (tuple): Model input height and width
+            backend (str): "keras" or "tflite"
+            warm_up (bool): Trace the compiled inference functions on a dummy input at load time
+            cache (PredictionCache): Optional persistent cache of successful predictions
+        """
+        if backend not in ('keras', 'tflite'):
+            raise ValueError(f"Unknown backend {backend!r}, expected 'keras' or 'tflite'")
+
         self.model_path = model_path
         self.image_size = image_size
+        self.backend = backend
         self.model = None
+        self.infer_single = None
+        self.infer_batch = None
+        self.cache = cache
+        self._model_version = None
         self.preprocessor = ImagePreprocessor()
         self.class_names = ['healthy', 'parkinson']
 
-        self.load_model()
+        if backend == 'keras':
+            _ensure_tensorflow()
+        if self.load_model() and warm_up:
+            self.warm_up()
 
     def load_model(self):
         if os.path.exists(self.model_path):
             try:
-                self.model = keras.models.load_model(self.model_path)
+                if self.backend == 'tflite':
+                    self.model = TFLiteModel(self.model_path)
+                else:
+                    self.model = keras.models.load_model(self.model_path)
+                    self._compile_inference()
                 return True
             except Exception as e:
                 return False
         return False
 
+    def _compile_inference(self):
+        """
+        Wrap the Keras model in tf.functions with fixed input signatures.
+
+        Calling these skips the data adapter and loop that model.predict builds on every
+        call. infer_single takes exactly (1, H, W, 3) float32; infer_batch takes any batch size.
+        """
+        model = self.model
+        height, width = self.image_size
+
+        def forward(images):
+            return model(images, training=False)
+
+        self.infer_single = tf.function(
+            forward, input_signature=[tf.TensorSpec((1, height, width, 3), tf.float32)])
+        self.infer_batch = tf.function(
+            forward, input_signature=[tf.TensorSpec((None, height, width, 3), tf.float32)])
+
+    def warm_up(self):
+        """Run both compiled functions once on zeros so no real prediction pays for tracing."""
+        if self.model is None:
+            return False
+
+        try:
+            height, width = self.image_size
+            self._forward(np.zeros((1, height, width, 3), dtype=np.float32))
+            self._forward(np.zeros((2, height, width, 3), dtype=np.float32))
+            return True
+        except Exception as e:
+            return False
+
+    def _forward(self, batch):
+        """Run the model on a preprocessed (N, H, W, 3) batch and return (N, 1) scores."""
+        if self.infer_single is None:
+            return np.asarray(self.model.predict(batch, batch_size=len(batch), verbose=0))
+
+        batch = tf.convert_to_tensor(batch, dtype=tf.float32)
+        infer = self.infer_single if batch.shape[0] == 1 else self.infer_batch
+        return np.asarray(infer(batch), dtype=np.float32)
+
     def preprocess_image(self, image_path):
+        image_array = self.preprocessor.load_image_array(image_path)
+        if image_array is None:
+            return None
+
+        return self.preprocess_array(image_array)
+
+    def preprocess_array(self, image_array):
         try:
-            processed_image = self.preprocessor.remove_background_and_isolate_drawing(image_path)
+            processed_image = self.preprocessor.isolate_drawing_from_array(image_array)
 
             if processed_image is None:
                 return None
 
-            enhanced_image = self.preprocessor.enhance_line_drawing(processed_image)
+            # enhance_line_drawing leaves a pure black/white image unchanged, so it is skipped here
+            if self.backend == 'tflite':
+                image_array = resize_bilinear(processed_image, self.image_size) / np.float32(255.0)
+                return image_array[np.newaxis]
 
-            image_tensor = tf.constant(enhanced_image, dtype=tf.float32)
+            image_tensor = tf.constant(processed_image, dtype=tf.float32)
             image_tensor = tf.image.resize(image_tensor, self.image_size, method='bilinear')
             image_tensor = image_tensor / 255.0
             image_tensor = tf.expand_dims(image_tensor, 0)
@@ -163,82 +405,244 @@ class ParkinsonsDetector:
         except Exception as e:
             return None
 
+    @property
+    def model_version(self):
+        """Cache namespace: the model file's digest plus everything else that shapes the output."""
+        if self._model_version is None:
+            from prediction_cache import file_digest
+            height, width = self.image_size
+            self._model_version = (f"{file_digest(self.model_path)}:{self.backend}:{height}x{width}"
+                                   f":preprocessing{PREPROCESSING_VERSION}")
+        return self._model_version
+
+    def _content_digest(self, item):
+        from prediction_cache import array_digest, file_digest
+
+        try:
+            if isinstance(item, (str, os.PathLike)):
+                return file_digest(item)
+            return array_digest(item)
+        except (OSError, TypeError, ValueError) as e:
+            return None
+
+    def _cached_prediction(self, item, predict):
+        if self.cache is None:
+            return predict()
+
+        digest = self._content_digest(item)
+        if digest is None:
+            return predict()
+
+        cached = self.cache.get('parkinsons', digest, self.model_version)
+        if cached is not None:
+            return cached
+
+        result = predict()
+        if result and result.get('prediction_successful'):
+            self.cache.put('parkinsons', digest, self.model_version, result)
+        return result
+
+    def _preprocess_item(self, item):
+        if isinstance(item, (str, os.PathLike)):
+            item = self.preprocessor.load_image_array(item)
+            if item is None:
+                return None
+
+        image_tensor = self.preprocess_array(item)
+        return None if image_tensor is None else image_tensor[0]
+
     def predict(self, image_path):
         if self.model is None:
             return None
 
-        processed_image = self.preprocess_image(image_path)
+        def predict_file():
+            image_array = self.preprocessor.load_image_array(image_path)
+            if image_array is None:
+                return None
+            return self._predict_array(image_array)
+
+        # A cache hit is found from the file bytes alone, before any decoding
+        return self._cached_prediction(image_path, predict_file)
+
+    def predict_qimage(self, image):
+        """Predict straight from a QImage (or QPixmap) without writing it to disk."""
+        from image_buffers import qimage_to_array
+
+        if self.model is None:
+            return None
+
+        return self.predict_array(qimage_to_array(image))
+
+    def predict_array(self, image_array):
+        """Predict from an (H, W, 3) RGB or (H, W) grayscale uint8 array."""
+        if self.model is None:
+            return None
+
+        return self._cached_prediction(image_array, lambda: self._predict_array(image_array))
+
+    def _predict_array(self, image_array):
+        processed_image = self.preprocess_array(image_array)
         if processed_image is None:
             return None
 
         try:
-            prediction = self.model.predict(processed_image, verbose=0)[0][0]
-            risk_score = float(prediction)
-
-            if risk_score < 0.35:
-                risk_level = "Low Risk"
-                interpretation = "Spiral drawing shows characteristics typical of healthy motor control"
-            elif risk_score < 0.65:
-                risk_level = "Moderate Risk"
-                interpretation = "Spiral drawing shows some irregularities that may warrant further evaluation"
-            else:
-                risk_level = "High Risk"
-                interpretation = "Spiral drawing shows significant irregularities consistent with motor control issues"
+            prediction = self._forward(processed_image)[0][0]
+            return self._build_result(float(prediction))
+
+        except Exception as e:
+            return self._error_result()
 
-            distance_from_center = abs(risk_score - 0.5)
-            confidence = min(distance_from_center * 2, 0.95)
+    def predict_batch(self, paths_or_arrays, batch_size=32, max_workers=None):
+        """
+        Predict many drawings with one forward pass per chunk.
 
-            result = {
-                'risk_score': risk_score,
-                'risk_level': risk_level,
-                'confidence': confidence,
-                'interpretation': interpretation,
-                'prediction_successful': True
-            }
+        Images are preprocessed in parallel threads and stacked into chunks of
+        batch_size. An image that cannot be read or preprocessed gets an error
+        result in its slot instead of failing the rest of the batch.
 
-            return result
+        Args:
+            paths_or_arrays (list): Image paths and/or RGB/grayscale uint8 arrays
+            batch_size (int): Images per forward pass
+            max_workers (int): Preprocessing threads, defaults to the executor's choice
 
-        except Exception as e:
-            return {
-                'risk_score': 0.0,
-                'risk_level': "Error",
-                'confidence': 0.0,
-                'interpretation': "Unable to process image",
-                'prediction_successful': False
-            }
+        Returns:
+            list: One result dict per input, in input order, shaped like predict()
+        """
+        if self.model is None:
+            return None
+
+        items = list(paths_or_arrays)
+        results = [None] * len(items)
+        digests = [None] * len(items)
+        pending = list(range(len(items)))
+
+        if self.cache is not None:
+            pending = []
+            for index, item in enumerate(items):
+                digests[index] = self._content_digest(item)
+                if digests[index] is not None:
+                    results[index] = self.cache.get('parkinsons', digests[index], self.model_version)
+                if results[index] is None:
+                    pending.append(index)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                tensors = list(executor.map(self._preprocess_item, [items[index] for index in chunk]))
+
+                valid = [index for index, tensor in zip(chunk, tensors) if tensor is not None]
+                for index, tensor in zip(chunk, tensors):
+                    if tensor is None:
+                        results[index] = self._error_result()
+
+                if not valid:
+                    continue
+
+                try:
+                    valid_tensors = [tensor for tensor in tensors if tensor is not None]
+                    batch = np.stack(valid_tensors) if self.backend == 'tflite' else tf.stack(valid_tensors)
+                    predictions = self._forward(batch)[:, 0]
+                    for index, prediction in zip(valid, predictions):
+                        results[index] = self._build_result(float(prediction))
+                        if self.cache is not None and digests[index] is not None:
+                            self.cache.put('parkinsons', digests[index], self.model_version, results[index])
+                except Exception as e:
+                    for index in valid:
+                        results[index] = self._error_result()
+
+        return results
+
+    @staticmethod
+    def _error_result():
+        return {
+            'risk_score': 0.0,
+            'risk_level': "Error",
+            'confidence': 0.0,
+            'interpretation': "Unable to process image",
+            'prediction_successful': False
+        }
+
+    @staticmethod
+    def _build_result(risk_score):
+        if risk_score < 0.35:
+            risk_level = "Low Risk"
+            interpretation = "Spiral drawing shows characteristics typical of healthy motor control"
+        elif risk_score < 0.65:
+            risk_level = "Moderate Risk"
+            interpretation = "Spiral drawing shows some irregularities that may warrant further evaluation"
+        else:
+            risk_level = "High Risk"
+            interpretation = "Spiral drawing shows significant irregularities consistent with motor control issues"
+
+        distance_from_center = abs(risk_score - 0.5)
+        confidence = min(distance_from_center * 2, 0.95)
+
+        result = {
+            'risk_score': risk_score,
+            'risk_level': risk_level,
+            'confidence': confidence,
+            'interpretation': interpretation,
+            'prediction_successful': True
+        }
+
+        return result
 
     def update_excel_with_results(self, excel_path, player_name, risk_level, evaluation_results):
+        from results_journal import shared_journal
+        from results_store import shared_store, store_path_for
+
+        if os.path.exists(store_path_for(excel_path)):
+            store = shared_store(excel_path)
+            if store is not None:
+                return store.update_player_risk(player_name, risk_level,
+                                                self._evaluation_text(evaluation_results))
+
+        journal = shared_journal(excel_path)
+        with journal.flush_lock:
+            return self._update_excel_with_results(journal, excel_path, player_name, risk_level,
+                                                   evaluation_results)
+
+    def _update_excel_with_results(self, journal, excel_path, player_name, risk_level, evaluation_results):
         try:
+            # The player's first row may still be waiting in the results journal
+            journal.flush()
+
             if os.path.exists(excel_path):
                 wb = load_workbook(excel_path)
                 ws = wb.active
             else:
                 return False
 
-            player_row = None
-            for row in range(2, ws.max_row + 1):
-                if ws.cell(row=row, column=1).value == player_name:
-                    player_row = row
-                    break
+            if journal.index is not None:
+                player_row = journal.index.first_row(player_name)
+            else:
+                player_row = None
+                for row in range(2, ws.max_row + 1):
+                    if ws.cell(row=row, column=1).value == player_name:
+                        player_row = row
+                        break
 
             if player_row is None:
                 return False
 
             ws.cell(row=player_row, column=18, value=risk_level)
 
-            if evaluation_results:
-                eval_text = f"Acc: {evaluation_results.get('accuracy', 0):.3f}, Prec: {evaluation_results.get('precision', 0):.3f}, Rec: {evaluation_results.get('recall', 0):.3f}, F1: {evaluation_results.get('f1_score', 0):.3f}, AUC: {evaluation_results.get('auc', 0):.3f}"
-            else:
-                eval_text = "Model evaluation not available"
-
-            ws.cell(row=player_row, column=19, value=eval_text)
+            ws.cell(row=player_row, column=19, value=self._evaluation_text(evaluation_results))
 
             wb.save(excel_path)
+            if journal.index is not None:
+                journal.index.workbook_saved()
             return True
 
         except Exception as e:
             return False
 
+    @staticmethod
+    def _evaluation_text(evaluation_results):
+        if evaluation_results:
+            return f"Acc: {evaluation_results.get('accuracy', 0):.3f}, Prec: {evaluation_results.get('precision', 0):.3f}, Rec: {evaluation_results.get('recall', 0):.3f}, F1: {evaluation_results.get('f1_score', 0):.3f}, AUC: {evaluation_results.get('auc', 0):.3f}"
+        return "Model evaluation not available"
+
     def cleanup_processed_image(self, image_path):
         try:
             if os.path.exists(image_path):
@@ -0,0 +1,245 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+
+_STOP = object()
+
+
+def _json_value(value):
+    """json.dumps fallback for NumPy scalars."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class PersistenceWorker:
+    """
+    Write-behind worker for session records.
+
+    submit() appends the record to a small journal, fsyncs it and only then returns, so an
+    acknowledged record survives a crash. The record is then written by the handler on a
+    background thread. The queue is bounded: when it is full, submit() blocks until the
+    worker catches up, and nothing is dropped. A "done" line is journaled and fsynced
+    after each successful write. Records without one are handed to the handler again on
+    the next start, so handlers should be idempotent on record['id'].
+
+    A handler that raises is retried with backoff. A record that still fails becomes a
+    dead letter: it no longer counts as pending, and it stays in the journal for the next
+    start to retry.
+    """
+
+    def __init__(self, journal_path, handler, maxsize=32, latency_window=256, retries=3, retry_delay=0.25):
+        """
+        Args:
+            journal_path (str): Journal file for records not yet written
+            handler (callable): handler(record, payload) writes one record; payload holds
+                in-memory extras passed to submit() and is None for recovered records
+            maxsize (int): Records queued before submit() blocks
+            latency_window (int): Recent writes kept for the latency statistics
+            retries (int): Further attempts for a record whose handler raised
+            retry_delay (float): Seconds before the first retry, doubled for each one after
+        """
+        self.journal_path = journal_path
+        self.handler = handler
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._journal_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Held while a record is written and retired, so pending() and the handler's
+        # destination can be read as one consistent snapshot
+        self.write_lock = threading.Lock()
+        self._unfinished = {}
+        self._dead_letters = {}
+        self._write_latencies = deque(maxlen=latency_window)
+        self._end_to_end_latencies = deque(maxlen=latency_window)
+        self.acknowledged = 0
+        self.written = 0
+        self.failed = 0
+        self.recovered = 0
+
+        for record in self._recover():
+            self._unfinished[record['id']] = record
+            self.recovered += 1
+
+        self._thread = threading.Thread(target=self._run, name="persistence-worker", daemon=True)
+        self._thread.start()
+
+        # Recovered records go first, ahead of anything submitted from now on
+        for record in list(self._unfinished.values()):
+            self._queue.put((record, None, time.monotonic()))
+
+    def _recover(self):
+        """Records journaled by an earlier run that never got their "done" line."""
+        if not os.path.exists(self.journal_path):
+            return []
+
+        records = {}
+        with open(self.journal_path, encoding='utf-8') as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn by a crash mid-write
+                if entry.get('op') == 'record':
+                    records[entry['record']['id']] = entry['record']
+                elif entry.get('op') == 'done':
+                    records.pop(entry['id'], None)
+
+        self._rewrite_journal(list(records.values()))
+        return list(records.values())
+
+    def _append_journal(self, entry, sync):
+        line = json.dumps(entry, default=_json_value)
+        with self._journal_lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal_file:
+                journal_file.write(line + "\n")
+                journal_file.flush()
+                if sync:
+                    os.fsync(journal_file.fileno())
+
+    def _rewrite_journal(self, records):
+        with self._journal_lock:
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as journal_file:
+                for record in records:
+                    journal_file.write(json.dumps({'op': 'record', 'record': record}, default=_json_value) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temp_path, self.journal_path)
+
+    def submit(self, record, payload=None):
+        """
+        Durably accept a record for writing. Blocks while the queue is full.
+
+        Args:
+            record (dict): JSON-serializable record; an 'id' is added if missing
+            payload: In-memory extras for the handler, e.g. images still to be encoded
+
+        Returns:
+            str: The record's id
+        """
+        record = dict(record)
+        record.setdefault('id', uuid.uuid4().hex)
+
+        self._append_journal({'op': 'record', 'record': record}, sync=True)
+        with self._stats_lock:
+            self._unfinished[record['id']] = record
+            self.acknowledged += 1
+
+        self._queue.put((record, payload, time.monotonic()))
+        return record['id']
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            record, payload, submitted = item
+            start = time.monotonic()
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                with self.write_lock:
+                    try:
+                        self.handler(record, payload)
+                    except Exception as e:
+                        print(f"Persisting record {record['id']} failed (attempt {attempt + 1}): {e}")
+                        continue
+
+                    finished = time.monotonic()
+                    # Synced before the record is retired, so a restart never writes it again
+                    self._append_journal({'op': 'done', 'id': record['id']}, sync=True)
+                    with self._stats_lock:
+                        self._unfinished.pop(record['id'], None)
+                        self.written += 1
+                        self._write_latencies.append((finished - start) * 1000)
+                        self._end_to_end_latencies.append((finished - submitted) * 1000)
+                        compact = not self._unfinished
+                break
+            else:
+                # Left unfinished in the journal, so the next start retries it
+                with self.write_lock, self._stats_lock:
+                    self._unfinished.pop(record['id'], None)
+                    self._dead_letters[record['id']] = record
+                    self.failed += 1
+                    compact = not self._unfinished
+
+            if compact and self._queue.empty():
+                with self._stats_lock:
+                    dead_letters = list(self._dead_letters.values())
+                self._rewrite_journal(dead_letters)
+            self._queue.task_done()
+
+    def pending(self, predicate=None):
+        """Records acknowledged but not written yet, optionally filtered. Dead letters are not included."""
+        with self._stats_lock:
+            records = list(self._unfinished.values())
+        return [record for record in records if predicate is None or predicate(record)]
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        """Queue depth, counters and write latency percentiles in milliseconds."""
+        with self._stats_lock:
+            write = sorted(self._write_latencies)
+            end_to_end = sorted(self._end_to_end_latencies)
+            stats = {
+                'queue_depth': self._queue.qsize(),
+                'unfinished': len(self._unfinished),
+                'acknowledged': self.acknowledged,
+                'written': self.written,
+                'failed': self.failed,
+                'dead_letters': len(self._dead_letters),
+                'recovered': self.recovered,
+            }
+
+        for name, values in (('write', write), ('end_to_end', end_to_end)):
+            stats[f'{name}_p50_ms'] = values[len(values) // 2] if values else None
+            stats[f'{name}_p95_ms'] = values[min(len(values) - 1, int(len(values) * 0.95))] if values else None
+            stats[f'{name}_max_ms'] = values[-1] if values else None
+        return stats
+
+    def drain(self):
+        """Block until every queued record has been handled."""
+        self._queue.join()
+
+    def close(self):
+        """Drain the queue and stop the worker thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def shared_worker(journal_path, handler, maxsize=32):
+    """Return one PersistenceWorker per journal for this process."""
+    journal_path = os.path.abspath(journal_path)
+    with _workers_lock:
+        if journal_path not in _workers:
+            _workers[journal_path] = PersistenceWorker(journal_path, handler, maxsize)
+            if len(_workers) == 1:
+                # Registered on first use, after the results modules, so it runs before their exit flushes
+                atexit.register(drain_all)
+        return _workers[journal_path]
+
+
+def drain_all():
+    """Write everything still queued; called on exit, before the results journals flush."""
+    with _workers_lock:
+        workers = list(_workers.values())
+    for worker in workers:
+        worker.close()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+_CHUNK_SIZE = 1 << 20
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """
+    SHA-256 of a file's bytes, memoized on (path, size, mtime).
+
+    Used both for model versions and for saved drawings, so a cached drawing is
+    recognised without decoding it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+
+    with _file_digests_lock:
+        if memo_key in _file_digests:
+            return _file_digests[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    with _file_digests_lock:
+        _file_digests[memo_key] = digest.hexdigest()
+    return _file_digests[memo_key]
+
+
+def array_digest(array):
+    """SHA-256 of an array's shape, dtype and pixel/feature values."""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha256()
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Persistent LRU cache of prediction results in a SQLite file.
+
+    Entries are keyed by (kind, content digest, model version) and hold a JSON result.
+    The file can be shared by several processes: SQLite serializes the writers, and
+    WAL mode lets readers carry on while another process writes. Once the cache holds
+    more than max_entries results, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                kind TEXT NOT NULL,
+                content_digest TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (kind, content_digest, model_version)
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)")
+
+    def get(self, kind, content_digest, model_version):
+        """Return the cached result, or None on a miss."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result FROM predictions WHERE kind = ? AND content_digest = ? AND model_version = ?",
+                (kind, content_digest, model_version)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE predictions SET last_used = ? WHERE kind = ? AND content_digest = ? AND model_version = ?",
+                (time.time(), kind, content_digest, model_version)
+            )
+        return json.loads(row[0])
+
+    def put(self, kind, content_digest, model_version, result):
+        """Store a JSON-serializable result and evict the oldest entries past max_entries."""
+        payload = json.dumps(result)
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    (kind, content_digest, model_version, payload, time.time())
+                )
+                count = self._connection.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+                if count > self.max_entries:
+                    self._connection.execute(
+                        "DELETE FROM predictions WHERE rowid IN "
+                        "(SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM predictions")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CachedClassifier:
+    """
+    Wraps a fitted scikit-learn classifier so predict_proba rows come from a PredictionCache.
+
+    Each input row is keyed by the digest of its float64 feature vector, so only rows
+    not seen before reach the model. Every other attribute is passed through.
+    """
+
+    def __init__(self, model, cache, model_version, kind='predict_proba'):
+        self.model = model
+        self.cache = cache
+        self.model_version = model_version
+        self.kind = kind
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        digests = [array_digest(row) for row in X]
+        rows = [self.cache.get(self.kind, digest, self.model_version) for digest in digests]
+
+        missing = [index for index, row in enumerate(rows) if row is None]
+        if missing:
+            probabilities = self.model.predict_proba(X[missing])
+            for index, probability in zip(missing, probabilities):
+                rows[index] = probability.tolist()
+                self.cache.put(self.kind, digests[index], self.model_version, rows[index])
+
+        return np.array(rows)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(path, max_entries=50000):
+    """Return one PredictionCache per file for this process."""
+    path = os.path.abspath(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = PredictionCache(path, max_entries)
+        return _caches[path]
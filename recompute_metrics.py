@@ -0,0 +1,126 @@
+"""
+Recompute every archived session's metrics after a formula changes.
+
+Sessions are read from the stroke archive next to the results workbook and split into
+chunks, each handled by one worker process. The main process writes each finished chunk
+back to the results store in one transaction and records it under the run's name, so
+an interrupted run picks up where it stopped when started again with the same --run.
+
+Usage:
+    python recompute_metrics.py Level1Results.xlsx
+    python recompute_metrics.py Level1Results.xlsx --workers 8 --chunk-size 64 --run cisp-fix
+    python recompute_metrics.py Level1Results.xlsx --run cisp-fix --restart
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from stroke_archive import StrokeArchive, archive_path_for
+
+
+_archive = None
+
+
+def _init_worker(archive_path):
+    global _archive
+    _archive = StrokeArchive(archive_path)
+
+
+def recompute_chunk(indices):
+    """
+    Recompute the sessions at the given archive positions.
+
+    Returns:
+        list: (record id, metrics dict, 13-feature model vector) tuples
+    """
+    from drawing_metrics_logger import CHAINED_KINEMATICS, LEVEL_KINEMATICS, session_features
+
+    results = []
+    for index in indices:
+        session = _archive[index]
+        meta = session.metadata
+        pen_positions, pen_timestamps, pressure_readings = session.samples()
+
+        metrics, features = session_features(
+            pen_positions, pen_timestamps, pressure_readings,
+            meta.get('start_time'), meta.get('end_time'), meta.get('air_time', 0),
+            meta.get('paper_time', 0), meta.get('pendown_count', 0),
+            kinematics=LEVEL_KINEMATICS.get(meta.get('level'), CHAINED_KINEMATICS))
+
+        results.append((meta['record_id'], metrics, features))
+    return results
+
+
+def recompute(excel_path, workers=None, chunk_size=64, run="default", restart=False, report=print):
+    """
+    Recompute the archived sessions of a results workbook and write them back.
+
+    Returns:
+        dict: sessions recomputed, rows updated, sessions skipped as already done, seconds
+            and sessions per second; None if the results store cannot be opened
+    """
+    from results_store import shared_store
+
+    archive_path = archive_path_for(excel_path)
+    # Through shared_store, so a workbook without a store yet has its rows imported first
+    store = shared_store(excel_path)
+    if store is None:
+        return None
+    if restart:
+        store.reset_recompute(run)
+
+    done = store.recomputed_records(run)
+    todo = [index for index, meta in enumerate(StrokeArchive(archive_path).metadata())
+            if meta.get('record_id') and meta['record_id'] not in done]
+    chunks = [todo[start:start + chunk_size] for start in range(0, len(todo), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    recomputed = updated = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive_path,)) as executor:
+        futures = [executor.submit(recompute_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            results = future.result()
+            updated += store.apply_recomputed(run, results)
+            recomputed += len(results)
+            elapsed = time.perf_counter() - start
+            report(f"  {recomputed}/{len(todo)} sessions, {recomputed / elapsed:.0f} sessions/s")
+    elapsed = time.perf_counter() - start
+
+    return {
+        'recomputed': recomputed,
+        'updated': updated,
+        'skipped': len(done),
+        'seconds': elapsed,
+        'sessions_per_second': recomputed / elapsed if recomputed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute session metrics from the stroke archive")
+    parser.add_argument('workbook', help="Results workbook whose .strokes archive and .sqlite3 store are used")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Sessions per worker task and transaction")
+    parser.add_argument('--run', default="default", help="Name under which progress is kept for resuming")
+    parser.add_argument('--restart', action='store_true', help="Forget the run's progress and start over")
+    parser.add_argument('--quiet', action='store_true', help="Only print the summary")
+    args = parser.parse_args()
+
+    if not os.path.exists(archive_path_for(args.workbook)):
+        print(f"No stroke archive at {archive_path_for(args.workbook)}")
+        return 1
+
+    summary = recompute(args.workbook, args.workers, args.chunk_size, args.run, args.restart,
+                        report=(lambda message: None) if args.quiet else print)
+    if summary is None:
+        print(f"The results store for {args.workbook} cannot be opened")
+        return 1
+    print(f"Recomputed {summary['recomputed']} sessions ({summary['updated']} rows updated, "
+          f"{summary['skipped']} already done) in {summary['seconds']:.1f} s, "
+          f"{summary['sessions_per_second']:.0f} sessions/s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
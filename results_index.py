@@ -0,0 +1,223 @@
+import os
+import sqlite3
+import threading
+
+from openpyxl import load_workbook
+
+
+class ResultsIndex:
+    """
+    SQLite sidecar index of the Results workbook: player -> session count, first row and
+    latest session per level.
+
+    Sessions are recorded when they are journaled and get their row numbers when the
+    journal is flushed, each in one transaction. The index remembers the size and mtime
+    of the workbook it last saw; if the workbook changed behind its back (or the index
+    file is new) it is rebuilt from the workbook on open.
+    """
+
+    def __init__(self, excel_path, path=None):
+        self.excel_path = excel_path
+        self.path = path or excel_path + ".index.sqlite3"
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                seq INTEGER UNIQUE,
+                player TEXT NOT NULL,
+                level TEXT,
+                session_number INTEGER NOT NULL,
+                row INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS players (
+                player TEXT PRIMARY KEY,
+                session_count INTEGER NOT NULL,
+                first_row INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS latest_sessions (
+                player TEXT NOT NULL,
+                level TEXT NOT NULL,
+                session_number INTEGER NOT NULL,
+                row INTEGER,
+                PRIMARY KEY (player, level)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    def _workbook_stamp(self):
+        if not os.path.exists(self.excel_path):
+            return ""
+        stat = os.stat(self.excel_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _stored_stamp(self):
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'workbook'").fetchone()
+        return row[0] if row else None
+
+    def _store_stamp(self):
+        self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('workbook', ?)", (self._workbook_stamp(),))
+
+    def is_stale(self):
+        with self._lock:
+            return self._stored_stamp() != self._workbook_stamp()
+
+    def _add_session(self, seq, player, level, row):
+        existing = self._connection.execute(
+            "SELECT session_count FROM players WHERE player = ?", (player,)).fetchone()
+        session_number = existing[0] + 1 if existing else 1
+
+        self._connection.execute(
+            "INSERT INTO sessions (seq, player, level, session_number, row) VALUES (?, ?, ?, ?, ?)",
+            (seq, player, level, session_number, row))
+        self._connection.execute(
+            "INSERT INTO players VALUES (?, 1, ?) ON CONFLICT(player) DO UPDATE SET "
+            "session_count = session_count + 1, first_row = COALESCE(first_row, excluded.first_row)",
+            (player, row))
+        if level is not None:
+            self._connection.execute("INSERT OR REPLACE INTO latest_sessions VALUES (?, ?, ?, ?)",
+                                     (player, str(level), session_number, row))
+
+    def record_session(self, seq, player, level):
+        """Record a journaled session that has no workbook row yet. Already known sequence numbers are ignored."""
+        if player is None:
+            return
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                known = self._connection.execute("SELECT 1 FROM sessions WHERE seq = ?", (seq,)).fetchone()
+                if not known:
+                    self._add_session(seq, player, level, None)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def record_rows(self, assignments):
+        """
+        Give flushed sessions their workbook rows and remember the workbook just written.
+
+        Args:
+            assignments (list): (journal sequence number, row number) pairs
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for seq, row in assignments:
+                    session = self._connection.execute(
+                        "SELECT player, level, session_number FROM sessions WHERE seq = ?", (seq,)).fetchone()
+                    if session is None:
+                        continue
+                    player, level, session_number = session
+
+                    self._connection.execute("UPDATE sessions SET row = ? WHERE seq = ?", (row, seq))
+                    self._connection.execute(
+                        "UPDATE players SET first_row = COALESCE(first_row, ?) WHERE player = ?", (row, player))
+                    self._connection.execute(
+                        "UPDATE latest_sessions SET row = ? WHERE player = ? AND level = ? AND session_number = ?",
+                        (row, player, str(level), session_number))
+                self._store_stamp()
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def workbook_saved(self):
+        """Accept the workbook as it is now, after a save that did not add or move rows."""
+        with self._lock:
+            self._store_stamp()
+
+    def rebuild(self, journal_entries=(), flushed_sequence=None):
+        """
+        Re-index the Results sheet, then any journaled sessions not yet in it.
+
+        Args:
+            journal_entries (list): Pending ResultsJournal entries
+            flushed_sequence (int): Last journal sequence number the workbook contains;
+                read from the workbook when None
+        """
+        rows = []
+        if os.path.exists(self.excel_path):
+            wb = load_workbook(self.excel_path, read_only=True)
+            ws = wb["Results"]
+            for row_number, values in enumerate(ws.iter_rows(min_row=2, max_col=3, values_only=True), start=2):
+                if values and values[0] is not None:
+                    rows.append((row_number, values[0], values[2] if len(values) > 2 else None))
+
+            if flushed_sequence is None:
+                from results_journal import MARKER_SHEET, sequence_value
+                flushed_sequence = sequence_value(wb[MARKER_SHEET]['A1'].value) if MARKER_SHEET in wb.sheetnames else 0
+            wb.close()
+
+        flushed_sequence = flushed_sequence or 0
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ('sessions', 'players', 'latest_sessions'):
+                    self._connection.execute(f"DELETE FROM {table}")
+                for row_number, player, level in rows:
+                    self._add_session(None, player, level, row_number)
+                for entry in journal_entries:
+                    if entry['seq'] > flushed_sequence and entry['row'][0] is not None:
+                        self._add_session(entry['seq'], entry['row'][0], entry['row'][2], None)
+                self._store_stamp()
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def session_count(self, player_name):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT session_count FROM players WHERE player = ?", (player_name,)).fetchone()
+        return row[0] if row else 0
+
+    def first_row(self, player_name):
+        """Workbook row of the player's first session, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT first_row FROM players WHERE player = ?", (player_name,)).fetchone()
+        return row[0] if row else None
+
+    def latest_session(self, player_name, level):
+        """
+        Returns:
+            tuple: (session number, workbook row or None while journaled), or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT session_number, row FROM latest_sessions WHERE player = ? AND level = ?",
+                (player_name, str(level))).fetchone()
+        return tuple(row) if row else None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_index(excel_path, journal_entries=()):
+    """
+    Open the index next to a workbook, rebuilding it when it is new or out of date.
+
+    Returns:
+        ResultsIndex: The index, or None if the sidecar file cannot be used
+    """
+    try:
+        index = ResultsIndex(excel_path)
+        if index.is_stale():
+            index.rebuild(journal_entries)
+        else:
+            # Sessions journaled by a run that died before recording them
+            for entry in journal_entries:
+                index.record_session(entry['seq'], entry['row'][0], entry['row'][2])
+        return index
+    except (sqlite3.Error, OSError, KeyError) as e:
+        print(f"Results index unavailable: {e}")
+        return None
@@ -0,0 +1,399 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image as XLImage
+
+from results_index import open_index
+
+
+RESULTS_HEADERS = [
+    "Player Name", "Processed Image", "Level",
+    "Total Time", "Air Time", "Paper Time",
+    "Mean Speed", "Mean Acceleration",
+    "Mean Pressure", "Pressure Variance",
+    "Pendown Count", "Max X", "Max Y",
+    "GMRTP", "Mean Jerk", "Dispersion Index", "Average CISP",
+    "Risk Level", "Interpretation"  # Added Parkinson's detection columns
+]
+
+# Hidden sheet holding the sequence number of the last journal entry written to the workbook
+# in A1, in column B the sequence numbers of the journal entries the last flush covered, and
+# in columns C and D the record id and sequence number of every persistence worker record
+# the workbook holds
+MARKER_SHEET = "Journal"
+
+
+def sequence_value(value):
+    """
+    A sequence number as stored in the marker sheet. They are written as text: numbers
+    are saved as doubles, which would round nanosecond sequence numbers. Workbooks
+    written before that hold a rounded number.
+    """
+    if value is None or value == "":
+        return 0
+    return int(value)
+
+
+def _json_value(value):
+    """json.dumps fallback for NumPy scalars."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def new_results_workbook():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Results"
+    ws.append(RESULTS_HEADERS)
+    return wb
+
+
+def add_results_row(ws, row_data, excel_image_path=None):
+    """Append one session row to the Results sheet, with its thumbnail when there is one. Returns the row number."""
+    ws.append(row_data)
+    row = ws.max_row
+
+    if not excel_image_path:
+        return row
+
+    try:
+        # Format row for image
+        ws.row_dimensions[row].height = 60
+        ws.column_dimensions['B'].width = 25
+
+        # Add image to Excel
+        xl_img = XLImage(excel_image_path)
+        xl_img.width = 150
+        xl_img.height = 75
+        xl_img.anchor = f"B{row}"
+        ws.add_image(xl_img)
+    except Exception as e:
+        print(f"Excel insert failed: {e}")
+
+    return row
+
+
+class ResultsJournal:
+    """
+    Append-only journal of Results rows, flushed to the workbook in batches.
+
+    Saving a session appends one JSON line and fsyncs it, which costs the same however
+    many sessions the workbook already holds. flush() writes every pending row with a
+    single load and save of the workbook. Each entry has an increasing sequence number,
+    never below the last one the workbook contains, which the workbook records in a
+    hidden sheet together with the entries its last flush covered. Entries left behind by
+    a crash are replayed exactly once, and an entry the workbook does not hold is never
+    dropped. Entries may carry the persistence worker's record id; appending one the
+    journal or the workbook has already seen is a no-op.
+    """
+
+    def __init__(self, excel_path, idle_seconds=5.0, max_age_seconds=60.0, auto_flush=True, index=None):
+        """
+        Args:
+            excel_path (str): Workbook the journal flushes into
+            idle_seconds (float): Flush once no session was saved for this long
+            max_age_seconds (float): Flush at the latest when the oldest pending entry is this old
+            auto_flush (bool): Flush from a background thread; otherwise only flush() and close() write
+            index (ResultsIndex): Optional sidecar index kept in step with appends and flushes
+        """
+        self.excel_path = excel_path
+        self.journal_path = excel_path + ".journal"
+        self.idle_seconds = idle_seconds
+        self.max_age_seconds = max_age_seconds
+        self.auto_flush = auto_flush
+        self.index = index
+
+        self._append_lock = threading.Lock()
+        self.flush_lock = threading.RLock()
+        self._last_sequence = 0
+        # The workbook's marker is read on the first append, off the startup path
+        self._sequence_floor_read = False
+        self._last_append = 0.0
+        self._oldest_pending = None
+        self._stop = threading.Event()
+        self._flusher = None
+
+        self._terminate_torn_line()
+        entries = self.pending()
+        self._record_ids = {entry['record']: entry['seq'] for entry in entries if entry.get('record')}
+        if entries:
+            self._last_sequence = entries[-1]['seq']
+            # Left over from a previous run: due right away
+            self._oldest_pending = 0.0
+
+    def _terminate_torn_line(self):
+        """End a line left half-written by a crash, so the next entry starts on a line of its own."""
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            return
+        with open(self.journal_path, 'rb+') as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            if journal_file.read(1) != b"\n":
+                journal_file.write(b"\n")
+
+    def append(self, row_data, excel_image_path=None, record_id=None):
+        """
+        Durably record one Results row. Returns the entry's sequence number.
+
+        A record_id appended before, in this process, pending from an earlier one or
+        already flushed to the workbook, returns that entry's sequence number and writes
+        nothing, so a replayed persistence worker record is not added twice.
+        """
+        with self._append_lock:
+            if record_id is not None and record_id in self._record_ids:
+                return self._record_ids[record_id]
+
+            if not self._sequence_floor_read:
+                # A clock set back since the last flush must not number entries below the marker
+                marker, applied = self._workbook_marker()
+                self._last_sequence = max(self._last_sequence, marker)
+                for applied_id, applied_sequence in applied.items():
+                    self._record_ids.setdefault(applied_id, applied_sequence)
+                self._sequence_floor_read = True
+                if record_id is not None and record_id in self._record_ids:
+                    return self._record_ids[record_id]
+            sequence = max(time.time_ns(), self._last_sequence + 1)
+            entry = {'seq': sequence, 'row': list(row_data), 'image': excel_image_path}
+            if record_id is not None:
+                entry['record'] = record_id
+            line = json.dumps(entry, default=_json_value)
+
+            with open(self.journal_path, 'a', encoding='utf-8') as journal_file:
+                journal_file.write(line + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+            self._record_in_index(lambda index: index.record_session(sequence, row_data[0], row_data[2]))
+
+            if record_id is not None:
+                self._record_ids[record_id] = sequence
+            self._last_sequence = sequence
+            self._last_append = time.monotonic()
+            if self._oldest_pending is None:
+                self._oldest_pending = self._last_append
+
+        self.start_auto_flush()
+        return sequence
+
+    def _record_in_index(self, update):
+        """Apply an index update; an index that fails once is dropped and lookups fall back to the workbook."""
+        if self.index is None:
+            return
+        try:
+            update(self.index)
+        except sqlite3.Error as e:
+            print(f"Results index disabled: {e}")
+            self.index = None
+
+    def pending(self):
+        """Journal entries in order. A line torn by a crash mid-write is ignored."""
+        if not os.path.exists(self.journal_path):
+            return []
+
+        entries = []
+        with open(self.journal_path, encoding='utf-8') as journal_file:
+            for line in journal_file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def pending_count(self, player_name=None):
+        return sum(1 for entry in self.pending() if player_name is None or entry['row'][0] == player_name)
+
+    @staticmethod
+    def _read_marker(wb):
+        if MARKER_SHEET not in wb.sheetnames:
+            return 0
+        return sequence_value(wb[MARKER_SHEET]['A1'].value)
+
+    def _workbook_marker(self):
+        """
+        The workbook's marker and applied record ids, read without loading the Results
+        sheet; (0, {}) if they cannot be read.
+        """
+        if not os.path.exists(self.excel_path):
+            return 0, {}
+        try:
+            wb = load_workbook(self.excel_path, read_only=True)
+            try:
+                return self._read_marker(wb), self._read_applied(wb)
+            finally:
+                wb.close()
+        except Exception as e:
+            print(f"Results journal marker unreadable: {e}")
+            return 0, {}
+
+    @staticmethod
+    def _read_applied(wb):
+        """Record id to sequence number of every persistence worker record the workbook holds."""
+        if MARKER_SHEET not in wb.sheetnames:
+            return {}
+        applied = {}
+        for record_id, sequence in wb[MARKER_SHEET].iter_rows(min_col=3, max_col=4, values_only=True):
+            if record_id is not None:
+                applied[str(record_id)] = sequence_value(sequence)
+        return applied
+
+    @staticmethod
+    def _read_covered(wb):
+        """Sequence numbers of the journal entries the workbook's last flush covered."""
+        if MARKER_SHEET not in wb.sheetnames:
+            return set()
+        return {sequence_value(cell.value) for cell in wb[MARKER_SHEET]['B'] if cell.value is not None}
+
+    @staticmethod
+    def _write_marker(wb, sequence, covered=(), applied=None):
+        if MARKER_SHEET in wb.sheetnames:
+            ws = wb[MARKER_SHEET]
+        else:
+            ws = wb.create_sheet(MARKER_SHEET)
+            ws.sheet_state = 'hidden'
+        ws['A1'] = str(sequence)
+        for row in range(1, ws.max_row + 1):
+            for column in (2, 3, 4):
+                ws.cell(row=row, column=column).value = None
+        for row, covered_sequence in enumerate(sorted(covered), start=1):
+            ws.cell(row=row, column=2).value = str(covered_sequence)
+        for row, (record_id, applied_sequence) in enumerate(sorted((applied or {}).items()), start=1):
+            ws.cell(row=row, column=3).value = record_id
+            ws.cell(row=row, column=4).value = str(applied_sequence)
+
+    def flush(self):
+        """
+        Write all pending rows to the workbook.
+
+        The workbook is saved to a temporary file and swapped in with os.replace, so a
+        crash leaves either the old or the new workbook, never a partial one.
+
+        Returns:
+            int: Number of rows written
+        """
+        with self.flush_lock:
+            entries = self.pending()
+            if not entries:
+                return 0
+
+            if os.path.exists(self.excel_path):
+                wb = load_workbook(self.excel_path)
+            else:
+                wb = new_results_workbook()
+
+            marker = self._read_marker(wb)
+            covered = self._read_covered(wb)
+            applied = self._read_applied(wb)
+            # At or below the marker only the entries the last flush covered are in the
+            # workbook already; anything else there (numbered by a clock that went back) is not.
+            # A record the workbook holds is skipped, however its entry is numbered
+            new_entries = []
+            for entry in entries:
+                if entry['seq'] <= marker and entry['seq'] in covered:
+                    continue
+                if entry.get('record') is not None:
+                    if entry['record'] in applied:
+                        continue
+                    applied[entry['record']] = entry['seq']
+                new_entries.append(entry)
+
+            ws = wb["Results"]
+            assignments = []
+            for entry in new_entries:
+                image_path = entry.get('image')
+                row = add_results_row(ws, entry['row'],
+                                      image_path if image_path and os.path.exists(image_path) else None)
+                assignments.append((entry['seq'], row))
+
+            flushed_sequence = max([marker] + [entry['seq'] for entry in entries])
+            self._write_marker(wb, flushed_sequence, [entry['seq'] for entry in entries], applied)
+
+            temp_path = self.excel_path + ".tmp"
+            wb.save(temp_path)
+            wb.close()
+            os.replace(temp_path, self.excel_path)
+
+            self._record_in_index(lambda index: index.record_rows(assignments))
+            self._truncate({entry['seq'] for entry in entries})
+            return len(new_entries)
+
+    def _truncate(self, written_sequences):
+        """Drop the entries the workbook now holds, keeping any appended while it was being written."""
+        with self._append_lock:
+            remaining = [entry for entry in self.pending() if entry['seq'] not in written_sequences]
+
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as journal_file:
+                for entry in remaining:
+                    journal_file.write(json.dumps(entry) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temp_path, self.journal_path)
+
+            self._oldest_pending = time.monotonic() if remaining else None
+
+    def _flush_due(self):
+        if self._oldest_pending is None:
+            return False
+        now = time.monotonic()
+        return (now - self._last_append >= self.idle_seconds or
+                now - self._oldest_pending >= self.max_age_seconds)
+
+    def _auto_flush_loop(self):
+        while not self._stop.wait(1.0):
+            if not self._flush_due():
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                # The workbook may be open in Excel; the entries stay journaled for the next try
+                print(f"Results flush failed: {e}")
+                self._oldest_pending = time.monotonic()
+
+    def start_auto_flush(self):
+        """Flush in a background thread when idle or when the oldest entry reaches max_age_seconds."""
+        with self._append_lock:
+            if self._flusher is not None or not self.auto_flush:
+                return
+            self._flusher = threading.Thread(target=self._auto_flush_loop, name="results-journal", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """Stop the background flusher and write everything still pending."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Results flush failed: {e}")
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def shared_journal(excel_path):
+    """Return one ResultsJournal per workbook for this process; pending entries start replaying at once."""
+    excel_path = os.path.abspath(excel_path)
+    with _journals_lock:
+        if excel_path not in _journals:
+            journal = ResultsJournal(excel_path)
+            journal.index = open_index(excel_path, journal.pending())
+            _journals[excel_path] = journal
+            if _journals[excel_path]._oldest_pending is not None:
+                _journals[excel_path].start_auto_flush()
+        return _journals[excel_path]
+
+
+def flush_all():
+    """Flush every shared journal; called on exit."""
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        journal.close()
+
+
+atexit.register(flush_all)
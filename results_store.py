@@ -0,0 +1,350 @@
+"""
+SQLite store for session results, with the Results workbook produced on demand.
+
+Usage:
+    python results_store.py export --db Level1Results.sqlite3 --output Level1Results.xlsx
+    python results_store.py import --db Level1Results.sqlite3 --workbook Level1Results.xlsx
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from openpyxl import load_workbook
+
+from results_journal import add_results_row, new_results_workbook, shared_journal
+
+
+# Store column for each Results sheet column; the thumbnail column is filled in on export
+RESULT_COLUMNS = [
+    'player', None, 'level',
+    'total_time', 'air_time', 'paper_time',
+    'mean_speed', 'mean_acceleration',
+    'mean_pressure', 'pressure_variance',
+    'pendown_count', 'max_x', 'max_y',
+    'gmrtp', 'mean_jerk', 'dispersion_index', 'avg_cisp',
+    'risk_level', 'interpretation'
+]
+STORED_COLUMNS = [column for column in RESULT_COLUMNS if column is not None]
+TEXT_COLUMNS = {'level', 'risk_level', 'interpretation'}
+# Columns recompute_metrics.py can rebuild from archived pen samples; the dispersion index comes from the image
+RECOMPUTED_COLUMNS = [
+    'total_time', 'air_time', 'paper_time',
+    'mean_speed', 'mean_acceleration',
+    'mean_pressure', 'pressure_variance',
+    'pendown_count', 'max_x', 'max_y',
+    'gmrtp', 'mean_jerk', 'avg_cisp'
+]
+
+
+def _stored_values(row_data):
+    """The stored columns of a Results sheet row, NumPy scalars as plain Python numbers."""
+    values = [value.item() if hasattr(value, 'item') else value
+              for column, value in zip(RESULT_COLUMNS, row_data) if column is not None]
+    return values + [None] * (len(STORED_COLUMNS) - len(values))
+
+
+class ResultsStore:
+    """
+    Session results in a SQLite database in WAL mode.
+
+    Each session is one row of metrics, risk outputs and image paths, indexed on player,
+    level and creation time. Several processes can write to the same file and it can be
+    read while a clinician has an exported spreadsheet open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+        metric_columns = ", ".join(f"{column} {'TEXT' if column in TEXT_COLUMNS else 'REAL'}"
+                                   for column in STORED_COLUMNS[1:])
+        self._connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                player TEXT NOT NULL,
+                {metric_columns},
+                processed_image_path TEXT,
+                excel_image_path TEXT,
+                record_id TEXT
+            );
+        """)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(sessions)")]
+        if 'record_id' not in columns:
+            self._connection.execute("ALTER TABLE sessions ADD COLUMN record_id TEXT")
+        self._connection.executescript("""
+            CREATE INDEX IF NOT EXISTS sessions_player ON sessions (player);
+            CREATE INDEX IF NOT EXISTS sessions_level ON sessions (level);
+            CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions (created_at);
+            CREATE UNIQUE INDEX IF NOT EXISTS sessions_record_id ON sessions (record_id);
+            CREATE TABLE IF NOT EXISTS session_features (
+                record_id TEXT PRIMARY KEY,
+                features TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS recompute_progress (
+                run TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                PRIMARY KEY (run, record_id)
+            );
+        """)
+
+    def add_session(self, row_data, excel_image_path=None, processed_image_path=None, created_at=None,
+                    record_id=None):
+        """
+        Store one session given as a Results sheet row.
+
+        Args:
+            row_data (list): Values in RESULTS_HEADERS order; the image column is ignored
+            excel_image_path (str): Thumbnail embedded on export
+            processed_image_path (str): Full-size processed drawing
+            record_id (str): Persistence worker record id; a session already stored under
+                it is not stored again
+
+        Returns:
+            int: The session's id, or None if record_id was already stored
+        """
+        values = _stored_values(row_data)
+
+        columns = ", ".join(['created_at'] + STORED_COLUMNS + ['processed_image_path', 'excel_image_path',
+                                                                'record_id'])
+        placeholders = ", ".join("?" * (len(STORED_COLUMNS) + 4))
+        with self._lock:
+            cursor = self._connection.execute(
+                f"INSERT OR IGNORE INTO sessions ({columns}) VALUES ({placeholders})",
+                [created_at or time.time()] + values + [processed_image_path, excel_image_path, record_id])
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def session_count(self, player_name):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM sessions WHERE player = ?", (player_name,)).fetchone()[0]
+
+    def latest_session(self, player_name, level):
+        """The player's most recent session at a level as a dict, or None."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT * FROM sessions WHERE player = ? AND level = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                (player_name, str(level)))
+            row = cursor.fetchone()
+            return dict(zip([column[0] for column in cursor.description], row)) if row else None
+
+    def update_player_risk(self, player_name, risk_level, interpretation):
+        """Set the risk columns on the player's first session, like the workbook update did."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE sessions SET risk_level = ?, interpretation = ? WHERE id = "
+                "(SELECT MIN(id) FROM sessions WHERE player = ?)",
+                (risk_level, interpretation, player_name))
+            return cursor.rowcount > 0
+
+    def rows(self):
+        """
+        Every session in insertion order as a Results sheet row.
+
+        Yields:
+            tuple: (row values in RESULTS_HEADERS order, thumbnail path)
+        """
+        with self._lock:
+            records = self._connection.execute(
+                f"SELECT {', '.join(STORED_COLUMNS)}, excel_image_path FROM sessions ORDER BY id").fetchall()
+
+        for record in records:
+            values = iter(record[:-1])
+            yield [None if column is None else next(values) for column in RESULT_COLUMNS], record[-1]
+
+    def recomputed_records(self, run):
+        """Record ids a recompute run has already written back."""
+        with self._lock:
+            return {row[0] for row in self._connection.execute(
+                "SELECT record_id FROM recompute_progress WHERE run = ?", (run,))}
+
+    def reset_recompute(self, run):
+        with self._lock:
+            self._connection.execute("DELETE FROM recompute_progress WHERE run = ?", (run,))
+
+    def apply_recomputed(self, run, results):
+        """
+        Write back one batch of recomputed sessions in a single transaction. Only sessions
+        whose row was updated count as done for the run.
+
+        Args:
+            run (str): Recompute run the batch belongs to
+            results (list): (record id, metrics dict, model feature vector or None) tuples
+
+        Returns:
+            int: Sessions whose row was updated
+        """
+        assignments = ", ".join(f"{column} = ?" for column in RECOMPUTED_COLUMNS)
+        updated = 0
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for record_id, metrics, features in results:
+                    values = [metrics[column] for column in RECOMPUTED_COLUMNS]
+                    cursor = self._connection.execute(
+                        f"UPDATE sessions SET {assignments} WHERE record_id = ?",
+                        [value.item() if hasattr(value, 'item') else value for value in values] + [record_id])
+                    if not cursor.rowcount:
+                        # No row to update yet: left out of the run's progress so a later run retries it
+                        continue
+                    updated += cursor.rowcount
+                    if features is not None:
+                        self._connection.execute("INSERT OR REPLACE INTO session_features VALUES (?, ?)",
+                                                 (record_id, json.dumps([float(value) for value in features])))
+                    self._connection.execute("INSERT OR IGNORE INTO recompute_progress VALUES (?, ?)",
+                                             (run, record_id))
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return updated
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def import_workbook(self, excel_path):
+        """Copy the rows of an existing Results workbook into the store. Returns the number imported."""
+        wb = load_workbook(excel_path, read_only=True)
+        rows = [list(row) for row in wb["Results"].iter_rows(min_row=2, values_only=True) if row and row[0]]
+        wb.close()
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for row in rows:
+                    self._connection.execute(
+                        f"INSERT INTO sessions (created_at, {', '.join(STORED_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(STORED_COLUMNS) + 1))})",
+                        [time.time()] + _stored_values(row))
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def export_xlsx(self, excel_path):
+        """
+        Write the Results sheet (headers, rows and thumbnails) to a new workbook.
+
+        The file is written next to the target and swapped in, so a spreadsheet that is
+        open elsewhere is never left half-written.
+
+        Returns:
+            int: Number of session rows written
+        """
+        wb = new_results_workbook()
+        ws = wb["Results"]
+
+        count = 0
+        for row_data, excel_image_path in self.rows():
+            add_results_row(ws, row_data,
+                            excel_image_path if excel_image_path and os.path.exists(excel_image_path) else None)
+            count += 1
+
+        temp_path = excel_path + ".tmp"
+        wb.save(temp_path)
+        os.replace(temp_path, excel_path)
+        return count
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def store_path_for(excel_path):
+    """The database that stands in for a results workbook: Level1Results.xlsx -> Level1Results.sqlite3."""
+    return os.path.splitext(excel_path)[0] + ".sqlite3"
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _import_new_store(path, excel_path):
+    """
+    Create the store at path from an existing workbook.
+
+    The rows are imported into a temporary database that replaces path only once the
+    import succeeded, so a failed import never leaves an empty store behind.
+    """
+    temp_path = path + ".tmp"
+    for leftover in (temp_path, temp_path + "-wal", temp_path + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+    store = ResultsStore(temp_path)
+    try:
+        # Rows still journaled for the workbook belong to it too
+        shared_journal(excel_path).flush()
+        store.import_workbook(excel_path)
+    except Exception:
+        store.close()
+        for leftover in (temp_path, temp_path + "-wal", temp_path + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    # Closing the last connection checkpoints the WAL into the file
+    store.close()
+    os.replace(temp_path, path)
+
+
+def shared_store(excel_path):
+    """
+    Return one ResultsStore per workbook for this process.
+
+    A new store takes over the rows of an existing workbook once, so session numbering
+    carries on. Returns None if the database cannot be opened or the workbook cannot be
+    imported; the workbook then stays the place results go.
+    """
+    path = os.path.abspath(store_path_for(excel_path))
+    with _stores_lock:
+        if path not in _stores:
+            try:
+                if not os.path.exists(path) and os.path.exists(excel_path):
+                    _import_new_store(path, excel_path)
+                store = ResultsStore(path)
+            except Exception as e:
+                print(f"Results store unavailable: {e}")
+                return None
+            _stores[path] = store
+        return _stores[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session results store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export = subparsers.add_parser('export', help="Write the Results workbook from the store")
+    export.add_argument('--db', required=True)
+    export.add_argument('--output', required=True)
+
+    importer = subparsers.add_parser('import', help="Copy an existing Results workbook into the store")
+    importer.add_argument('--db', required=True)
+    importer.add_argument('--workbook', required=True)
+
+    args = parser.parse_args()
+    store = ResultsStore(args.db)
+
+    if args.command == 'export':
+        count = store.export_xlsx(args.output)
+        print(f"Exported {count} sessions to {args.output}")
+    else:
+        count = store.import_workbook(args.workbook)
+        print(f"Imported {count} sessions from {args.workbook}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
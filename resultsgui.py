@@ -5,33 +5,83 @@ from collections import defaultdict
 from keras.models import load_model
 from tensorflow.keras.preprocessing import image
 import os
+from concurrent.futures import ThreadPoolExecutor
+from prediction_cache import CachedClassifier, file_digest, shared_cache
+from results_journal import shared_journal
+from results_store import shared_store, store_path_for
 
 # === Load Models ===
 rf_model = joblib.load("model14.pkl")  # Alzheimer's numerical model
 keras_model = load_model("parkinsons_model.keras")  # Parkinson's image model
 
+# === Prediction cache: reruns over the same workbook skip rows and images already scored ===
+prediction_cache = shared_cache("prediction_cache.sqlite3")
+rf_model = CachedClassifier(rf_model, prediction_cache, file_digest("model14.pkl"), kind='alzheimers_proba')
+image_model_version = f"{file_digest('parkinsons_model.keras')}:grayscale:224x224"
+
 # === Load Excel === and replace with your own fike path where city img is.
-wb = load_workbook("/Users/sihaamkhalid/Desktop/personal_proj/STEM-FELLOWSHIP-COMP/city_img/Level1Results.xlsx", data_only=True)
-ws = wb["Results"]
+results_path = "/Users/sihaamkhalid/Desktop/personal_proj/STEM-FELLOWSHIP-COMP/city_img/Level1Results.xlsx"
 
 # === Extract data rows (skip header) ===
-rows = list(ws.iter_rows(min_row=2, values_only=True))
+# Sessions saved by the game live in the results database; the workbook is the fallback
+# when there is none or it cannot be opened
+store = shared_store(results_path) if os.path.exists(store_path_for(results_path)) else None
+if store is not None:
+    rows = [tuple(row_data) for row_data, _ in store.rows()]
+else:
+    shared_journal(results_path).flush()  # sessions still waiting in the results journal
+    wb = load_workbook(results_path, data_only=True)
+    ws = wb["Results"]
+    rows = list(ws.iter_rows(min_row=2, values_only=True))
 
 # === Track predictions by player ===
 player_risks = defaultdict(lambda: {"numerical": [], "image": []})
 
-# === Image prediction function ===
-def predict_image_risk(img_path):
+# === Image prediction functions ===
+IMAGE_BATCH_SIZE = 64
+
+def load_image_array(img_path):
     try:
         img = image.load_img(img_path, target_size=(224, 224), color_mode="grayscale")
-        img_array = image.img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0) / 255.0
-        return keras_model.predict(img_array)[0][0]
+        return image.img_to_array(img) / 255.0
     except Exception as e:
         print(f"❌ Image error at {img_path}: {e}")
         return None
 
+def image_digest(img_path):
+    try:
+        return file_digest(img_path)
+    except OSError as e:
+        print(f"❌ Image error at {img_path}: {e}")
+        return None
+
+def predict_image_risks(img_paths, batch_size=IMAGE_BATCH_SIZE):
+    """Predict every image with one forward pass per chunk; unreadable images get None.
+
+    Cached images are never decoded: they are looked up by the digest of their file bytes.
+    """
+    digests = [image_digest(img_path) for img_path in img_paths]
+    risks = [None if digest is None else prediction_cache.get('resultsgui_image', digest, image_model_version)
+             for digest in digests]
+    pending = [i for i, risk in enumerate(risks) if risk is None and digests[i] is not None]
+
+    with ThreadPoolExecutor() as executor:
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            arrays = list(executor.map(load_image_array, [img_paths[i] for i in chunk]))
+            valid = [i for i, arr in zip(chunk, arrays) if arr is not None]
+            if not valid:
+                continue
+            preds = keras_model.predict(np.stack([arr for arr in arrays if arr is not None]),
+                                        batch_size=len(valid), verbose=0)
+            for i, pred in zip(valid, preds[:, 0]):
+                risks[i] = float(pred)
+                prediction_cache.put('resultsgui_image', digests[i], image_model_version, risks[i])
+    return risks
+
 # === Process each row ===
+image_jobs = []  # (name, level, img_path) predicted together after the loop
+
 for row in rows:
     name = row[0]
     level = row[2]
@@ -49,19 +99,23 @@ for row in rows:
         player_risks[name]["numerical"].append(numerical_pred)
         print(f"✅ Alzheimer's Risk for {name} (Level {level}): {numerical_pred:.3f}")
 
-        # ==== Parkinson's prediction (image) ====
+        # ==== Parkinson's prediction (image), batched below ====
         img_path = f"/Users/sihaamkhalid/Desktop/personal_proj/STEM-FELLOWSHIP-COMP/city_img/{name}_level{level}.png"
         if os.path.exists(img_path):
-            img_pred = predict_image_risk(img_path)
-            if img_pred is not None:
-                player_risks[name]["image"].append(img_pred)
-                print(f"✅ Parkinson's Risk for {name} (Level {level}): {img_pred:.3f}")
+            image_jobs.append((name, level, img_path))
         else:
             print(f"⚠️ Image not found for {name} Level {level}: {img_path}")
 
     except Exception as e:
         print(f"❌ Error processing {name}: {e}")
 
+# ==== Parkinson's prediction (image) ====
+image_risks = predict_image_risks([img_path for _, _, img_path in image_jobs])
+for (name, level, img_path), img_pred in zip(image_jobs, image_risks):
+    if img_pred is not None:
+        player_risks[name]["image"].append(img_pred)
+        print(f"✅ Parkinson's Risk for {name} (Level {level}): {img_pred:.3f}")
+
 # === Final Risk Categorization ===
 def categorize_risk(score):
     if score <= 0.33:
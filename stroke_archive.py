@@ -0,0 +1,330 @@
+"""
+Archive of each session's raw pen samples, so metrics can be recomputed later.
+
+One archive file per results store holds a chunk per session:
+
+    header   magic "STRK", version, flags, sample count, stroke count, metadata length,
+             start timestamp (float64)
+    metadata JSON: player, level, session id, record id, ...
+    columns  positions    int16 (n, 2): first sample absolute, then deltas
+                          (float32 absolute when a position is fractional or out of range)
+             time offsets float32 (n): seconds since the start timestamp
+             pressure     float32 (n)
+             strokes      uint32 (k): index of each stroke's first sample
+
+Levels only sample between pen press and release, so the pen is up exactly between
+strokes. Version 1 chunks also stored a pen-down flag per sample, always set; readers
+skip that column.
+
+Every section starts on an 8-byte boundary. Chunks are only ever appended, by one
+writer at a time holding an exclusive lock on the "<archive>.lock" file; a chunk torn by
+a crash is ignored by readers and cut off by the next writer. StrokeArchive
+memory-maps the file, so scanning thousands of sessions reads only the columns that
+are touched.
+
+Usage:
+    python stroke_archive.py Level1Results.strokes
+"""
+import argparse
+import contextlib
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+MAGIC = b"STRK"
+VERSION = 2
+# Chunks of this version carry a pen-down column between pressure and strokes
+VERSION_WITH_PEN_DOWN = 1
+FLAG_INT16_POSITIONS = 1
+
+_HEADER = struct.Struct("<4sHHIIId")
+_INT16_RANGE = (np.iinfo(np.int16).min, np.iinfo(np.int16).max)
+
+
+def _json_value(value):
+    """json.dumps fallback for NumPy scalars."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _padding(length):
+    return -length % 8
+
+
+@contextlib.contextmanager
+def _exclusive_lock(lock_path):
+    """Hold an exclusive lock on lock_path, shared with other processes, for the with block."""
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # Gives up after about ten seconds of retrying; keep waiting
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def archive_path_for(excel_path):
+    """The stroke archive that belongs to a results workbook: Level1Results.xlsx -> Level1Results.strokes."""
+    return os.path.splitext(excel_path)[0] + ".strokes"
+
+
+def encode_session(pen_positions, pen_timestamps, pressure_readings, stroke_starts=(0,), metadata=None):
+    """
+    Encode one session's samples as an archive chunk.
+
+    Args:
+        pen_positions (list): (x, y) per sample
+        pen_timestamps (list): Timestamp per sample in seconds
+        pressure_readings (list): Pressure per sample
+        stroke_starts (list): Index of the first sample of each stroke
+        metadata (dict): JSON-serializable description of the session
+
+    Returns:
+        bytes: The chunk
+    """
+    positions = np.asarray(pen_positions, dtype=np.float64).reshape(-1, 2)
+    count = len(positions)
+    timestamps = np.asarray(pen_timestamps, dtype=np.float64)
+    start = float(timestamps[0]) if count else 0.0
+
+    flags = 0
+    if count and np.array_equal(positions, np.round(positions)):
+        deltas = np.diff(positions, axis=0, prepend=0)
+        if deltas.min() >= _INT16_RANGE[0] and deltas.max() <= _INT16_RANGE[1]:
+            flags |= FLAG_INT16_POSITIONS
+            position_column = deltas.astype(np.int16)
+    if not flags & FLAG_INT16_POSITIONS:
+        position_column = positions.astype(np.float32)
+
+    pressure = np.zeros(count, dtype=np.float32)
+    pressure[:len(pressure_readings)] = np.asarray(pressure_readings, dtype=np.float32)[:count]
+    strokes = np.asarray(sorted(set(int(index) for index in stroke_starts if 0 <= index < count)), dtype=np.uint32)
+
+    meta = json.dumps(metadata or {}, default=_json_value).encode('utf-8')
+    parts = [_HEADER.pack(MAGIC, VERSION, flags, count, len(strokes), len(meta), start), meta]
+    for column in (position_column, (timestamps - start).astype(np.float32), pressure, strokes):
+        parts.append(b"\0" * _padding(sum(len(part) for part in parts)))
+        parts.append(np.ascontiguousarray(column).tobytes())
+    parts.append(b"\0" * _padding(sum(len(part) for part in parts)))
+    return b"".join(parts)
+
+
+class ArchivedSession:
+    """One session in a StrokeArchive. Columns are views into the memory map until decoded."""
+
+    def __init__(self, metadata, start_time, columns, int16_positions):
+        self.metadata = metadata
+        self.start_time = start_time
+        self._columns = columns
+        self._int16_positions = int16_positions
+
+    def __len__(self):
+        return len(self._columns['time_offsets'])
+
+    @property
+    def time_offsets(self):
+        return self._columns['time_offsets']
+
+    @property
+    def pressure(self):
+        return self._columns['pressure']
+
+    @property
+    def stroke_starts(self):
+        return self._columns['strokes']
+
+    def positions(self):
+        """(n, 2) float64 positions."""
+        column = self._columns['positions']
+        if self._int16_positions:
+            return np.cumsum(column, axis=0, dtype=np.int64).astype(np.float64)
+        return column.astype(np.float64)
+
+    def timestamps(self):
+        """Timestamps in seconds, to float32 precision relative to the session start."""
+        return self.start_time + self.time_offsets.astype(np.float64)
+
+    def strokes(self):
+        """(start, end) sample ranges, one per stroke."""
+        ends = list(self.stroke_starts[1:]) + [len(self)]
+        return [(int(start), int(end)) for start, end in zip(self.stroke_starts, ends)]
+
+    def samples(self):
+        """The session as the lists the level screens collect: (pen_positions, pen_timestamps, pressure_readings)."""
+        return ([tuple(position) for position in self.positions().tolist()],
+                self.timestamps().tolist(), self.pressure.astype(np.float64).tolist())
+
+
+class StrokeArchive:
+    """Append-only, memory-mapped archive of raw session samples."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map = None
+        self._offsets = []
+        self._metadata = []
+        self._record_ids = set()
+        self._scanned = 0
+
+    def append(self, chunk, record_id=None):
+        """
+        Append one encoded session and make it durable.
+
+        Returns:
+            bool: False if a session with this persistence worker record_id is archived
+                already, so a replayed record is not archived twice
+        """
+        with self._lock, _exclusive_lock(self.path + ".lock"):
+            # Under the lock every other writer's chunk is complete, so it is indexed here
+            self._refresh()
+            if record_id is not None and record_id in self._record_ids:
+                return False
+            with open(self.path, 'ab') as archive_file:
+                if archive_file.tell() > self._scanned:
+                    # Only a chunk torn by a crash is left past the last complete one
+                    archive_file.truncate(self._scanned)
+                archive_file.write(chunk)
+                archive_file.flush()
+                os.fsync(archive_file.fileno())
+            return True
+
+    def _refresh(self):
+        """Map the file again if it grew and index the chunks added since the last scan."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size == self._scanned:
+            return
+        if self._map is None or len(self._map) != size:
+            self._map = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+        offset = self._scanned
+        while offset + _HEADER.size <= size:
+            magic, version, flags, count, stroke_count, meta_length, start = _HEADER.unpack_from(self._map, offset)
+            end = self._chunk_end(offset, version, count, stroke_count, meta_length, flags)
+            if magic != MAGIC or end > size:
+                # Torn by a crash, or still being written by another process
+                break
+            meta_start = offset + _HEADER.size
+            metadata = json.loads(bytes(self._map[meta_start:meta_start + meta_length]) or b"{}")
+            self._offsets.append(offset)
+            self._metadata.append(metadata)
+            if metadata.get('record_id') is not None:
+                self._record_ids.add(metadata['record_id'])
+            offset = end
+        self._scanned = offset
+
+    @staticmethod
+    def _layout(offset, version, count, stroke_count, meta_length, flags):
+        position = offset + _HEADER.size + meta_length
+        position_dtype = np.int16 if flags & FLAG_INT16_POSITIONS else np.float32
+        sections = [('positions', position_dtype, (count, 2)), ('time_offsets', np.float32, (count,)),
+                    ('pressure', np.float32, (count,))]
+        if version == VERSION_WITH_PEN_DOWN:
+            sections.append((None, np.uint8, (count,)))
+        sections.append(('strokes', np.uint32, (stroke_count,)))
+
+        layout = []
+        for name, dtype, shape in sections:
+            position += _padding(position)
+            if name is not None:
+                layout.append((name, dtype, shape, position))
+            position += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return layout, position + _padding(position)
+
+    def _chunk_end(self, offset, version, count, stroke_count, meta_length, flags):
+        return self._layout(offset, version, count, stroke_count, meta_length, flags)[1]
+
+    def _session_at(self, offset, metadata):
+        magic, version, flags, count, stroke_count, meta_length, start = _HEADER.unpack_from(self._map, offset)
+
+        columns = {}
+        layout, _ = self._layout(offset, version, count, stroke_count, meta_length, flags)
+        for name, dtype, shape, position in layout:
+            length = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            columns[name] = self._map[position:position + length].view(dtype).reshape(shape)
+        return ArchivedSession(metadata, start, columns, bool(flags & FLAG_INT16_POSITIONS))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def metadata(self):
+        """Every session's metadata, in archive order, without touching the sample columns."""
+        with self._lock:
+            self._refresh()
+            return list(self._metadata)
+
+    def __getitem__(self, index):
+        with self._lock:
+            self._refresh()
+            return self._session_at(self._offsets[index], self._metadata[index])
+
+    def sessions(self, **filters):
+        """
+        Iterate the archived sessions, optionally only those whose metadata matches.
+
+        Example:
+            archive.sessions(player="Ada", level="Level 1")
+        """
+        with self._lock:
+            self._refresh()
+            entries = list(zip(self._offsets, self._metadata))
+
+        for offset, metadata in entries:
+            if all(metadata.get(key) == value for key, value in filters.items()):
+                yield self._session_at(offset, metadata)
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def shared_archive(excel_path):
+    """Return one StrokeArchive per results workbook for this process."""
+    path = os.path.abspath(archive_path_for(excel_path))
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = StrokeArchive(path)
+        return _archives[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the sessions in a stroke archive")
+    parser.add_argument('archive')
+    args = parser.parse_args()
+
+    archive = StrokeArchive(args.archive)
+    for session in archive.sessions():
+        meta = session.metadata
+        print(f"{meta.get('player', '?'):<20} {meta.get('level', '?'):<10} session {meta.get('session_id', '?'):<5} "
+              f"{len(session):>7} samples {len(session.stroke_starts):>4} strokes")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
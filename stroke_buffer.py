@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class StrokeBuffer:
+    """
+    Pen samples of one drawing in preallocated typed arrays.
+
+    Levels append every sample from their mouse and tablet handlers; the arrays grow by
+    half when full, so an append is amortized O(1) and never builds Python tuples, and at
+    most a third of the allocation is spare. Readers get NumPy views of the filled part
+    without copying. A view keeps showing the samples it was taken over, so take a fresh
+    one after further appends.
+
+    Per sample: float32 x and y, float64 time, float32 pressure and a uint32 stroke id,
+    24 bytes stored against about 180 for the three Python lists it replaces. With spare
+    capacity, a drawing allocates 24 to 36 bytes per sample, and never less than the
+    initial capacity.
+    """
+
+    __slots__ = ('_xy', '_time', '_pressure', '_stroke', '_count', '_stroke_id', '_stroke_start', 'accumulator')
+
+    def __init__(self, accumulator=None, capacity=1024):
+        """
+        Args:
+            accumulator (StreamingMetricsAccumulator): Also fed every sample and pen down
+            capacity (int): Samples allocated up front
+        """
+        self.accumulator = accumulator
+        self._allocate(max(1, capacity))
+        self._count = 0
+        self._stroke_id = 0
+        self._stroke_start = 0
+
+    def _allocate(self, capacity):
+        self._xy = np.empty(2 * capacity, dtype=np.float32)
+        self._time = np.empty(capacity, dtype=np.float64)
+        self._pressure = np.empty(capacity, dtype=np.float32)
+        self._stroke = np.empty(capacity, dtype=np.uint32)
+
+    def _grow(self):
+        old = (self._xy, self._time, self._pressure, self._stroke)
+        self._allocate(len(self._time) + max(1, len(self._time) // 2))
+        for new_column, old_column in zip((self._xy, self._time, self._pressure, self._stroke), old):
+            new_column[:len(old_column)] = old_column
+
+    def append(self, x, y, timestamp, pressure):
+        """
+        Args:
+            x (float): Pen x position
+            y (float): Pen y position
+            timestamp (float): Sample time in seconds
+            pressure (float): Pen pressure
+        """
+        index = self._count
+        if index == len(self._time):
+            self._grow()
+        # Flat x, y pairs: two scalar stores are cheaper than assigning a row
+        self._xy[2 * index] = x
+        self._xy[2 * index + 1] = y
+        self._time[index] = timestamp
+        self._pressure[index] = pressure
+        self._stroke[index] = self._stroke_id
+        self._count = index + 1
+
+        if self.accumulator is not None:
+            # The accumulator keeps full precision; only the stored columns are narrowed
+            self.accumulator.add_sample((x, y), timestamp, pressure)
+
+    def pen_down(self):
+        """Start a new stroke at the next sample; called from the levels' press handlers."""
+        if self._count > self._stroke_start:
+            self._stroke_id += 1
+            self._stroke_start = self._count
+        if self.accumulator is not None:
+            self.accumulator.pen_down()
+
+    def clear(self):
+        """Forget every sample, keeping the allocated arrays."""
+        self._count = 0
+        self._stroke_id = 0
+        self._stroke_start = 0
+        if self.accumulator is not None:
+            self.accumulator.reset()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def positions(self):
+        """(n, 2) float32 view of the x, y positions."""
+        return self._xy[:2 * self._count].reshape(-1, 2)
+
+    @property
+    def timestamps(self):
+        """(n,) float64 view of the timestamps."""
+        return self._time[:self._count]
+
+    @property
+    def pressures(self):
+        """(n,) float32 view of the pressure readings."""
+        return self._pressure[:self._count]
+
+    @property
+    def stroke_ids(self):
+        """(n,) uint32 view of each sample's stroke number."""
+        return self._stroke[:self._count]
+
+    @property
+    def stroke_starts(self):
+        """Index of the first sample of each stroke."""
+        ids = self.stroke_ids
+        if not len(ids):
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+
+    def strokes(self):
+        """(start, end) sample ranges, one per stroke."""
+        starts = self.stroke_starts.tolist()
+        return list(zip(starts, starts[1:] + [self._count]))
+
+    @property
+    def nbytes(self):
+        """Bytes allocated for the columns, spare capacity included."""
+        return self._xy.nbytes + self._time.nbytes + self._pressure.nbytes + self._stroke.nbytes
@@ -0,0 +1,164 @@
+"""
+Convert the spiral CNN to TFLite and report accuracy and latency against Keras.
+
+Usage:
+    python tflite_export.py --model best_parkinsons_model.keras --output-dir tflite_models
+
+Writes <name>_float32.tflite, <name>_float16.tflite and <name>_int8.tflite plus a
+<name>_tflite_report.json. int8 calibration uses the drawings in city_img.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from parkinsons_detector import ParkinsonsDetector, TFLiteModel
+
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "city_img")
+VARIANTS = ('float32', 'float16', 'int8')
+
+
+def sample_label(path):
+    """
+    1 for Parkinson's samples (P1.png, ...), 0 for healthy ones (H1.png, Healthy1.png, ...),
+    None for anything else, such as the players' saved drawings.
+    """
+    name = os.path.basename(path)
+    if re.fullmatch(r'P\d+\.\w+', name):
+        return 1
+    if re.fullmatch(r'(H|Healthy)\d+\.\w+', name):
+        return 0
+    return None
+
+
+def load_inputs(detector, image_paths):
+    """Preprocess each image exactly as the detector does; unreadable images are skipped."""
+    inputs = []
+    for path in image_paths:
+        tensor = detector.preprocess_image(path)
+        if tensor is not None:
+            inputs.append((path, np.asarray(tensor)))
+    return inputs
+
+
+def convert(keras_model, variant, calibration_inputs):
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+
+    if variant == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        def representative_dataset():
+            for _, tensor in calibration_inputs:
+                yield [tensor.astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    return converter.convert()
+
+
+def measure_latency(model, inputs, repeats):
+    """Single-image latencies in milliseconds, one warm-up call first."""
+    model.predict(inputs[0][1], verbose=0)
+
+    latencies = []
+    for _ in range(repeats):
+        for _, tensor in inputs:
+            start = time.perf_counter()
+            model.predict(tensor, verbose=0)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(scores, reference_scores, labels, latencies, size_bytes):
+    scores = np.asarray(scores)
+    reference_scores = np.asarray(reference_scores)
+    levels = [ParkinsonsDetector._build_result(float(score))['risk_level'] for score in scores]
+    reference_levels = [ParkinsonsDetector._build_result(float(score))['risk_level'] for score in reference_scores]
+
+    labelled = [(score, label) for score, label in zip(scores, labels) if label is not None]
+    accuracy = (float(np.mean([(score >= 0.5) == label for score, label in labelled]))
+                if labelled else None)
+
+    return {
+        'size_bytes': size_bytes,
+        'mean_abs_score_delta': float(np.mean(np.abs(scores - reference_scores))),
+        'max_abs_score_delta': float(np.max(np.abs(scores - reference_scores))),
+        'risk_level_agreement': float(np.mean([a == b for a, b in zip(levels, reference_levels)])),
+        'labelled_accuracy': accuracy,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the spiral CNN to TFLite")
+    parser.add_argument('--model', default='best_parkinsons_model.keras')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--samples', default=SAMPLE_FOLDER, help="Folder of PNGs for calibration and the report")
+    parser.add_argument('--image-size', type=int, default=128)
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    detector = ParkinsonsDetector(model_path=args.model, image_size=(args.image_size, args.image_size))
+    if detector.model is None:
+        print(f"Could not load {args.model}")
+        return 1
+
+    image_paths = sorted(glob.glob(os.path.join(args.samples, "*.png")))
+    inputs = load_inputs(detector, image_paths)
+    if not inputs:
+        print(f"No usable sample images in {args.samples}")
+        return 1
+
+    labels = [sample_label(path) for path, _ in inputs]
+    reference_scores = [float(detector.model.predict(tensor, verbose=0)[0][0]) for _, tensor in inputs]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(args.model))[0]
+
+    report = {
+        'model': os.path.abspath(args.model),
+        'samples': len(inputs),
+        'keras': summarize(reference_scores, reference_scores, labels,
+                           measure_latency(detector.model, inputs, args.repeats),
+                           os.path.getsize(args.model)),
+    }
+
+    for variant in args.variants:
+        output_path = os.path.join(args.output_dir, f"{base_name}_{variant}.tflite")
+        with open(output_path, 'wb') as output_file:
+            output_file.write(convert(detector.model, variant, inputs))
+
+        model = TFLiteModel(output_path)
+        scores = [float(model.predict(tensor)[0][0]) for _, tensor in inputs]
+        report[variant] = summarize(scores, reference_scores, labels,
+                                    measure_latency(model, inputs, args.repeats),
+                                    os.path.getsize(output_path))
+        report[variant]['path'] = os.path.abspath(output_path)
+
+    report_path = os.path.join(args.output_dir, f"{base_name}_tflite_report.json")
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+
+    print(f"{'backend':<8} {'size KB':>9} {'mean |d|':>9} {'max |d|':>8} {'agree':>6} {'p50 ms':>7} {'p99 ms':>7}")
+    for name in ['keras'] + list(args.variants):
+        row = report[name]
+        print(f"{name:<8} {row['size_bytes'] / 1024:>9.0f} {row['mean_abs_score_delta']:>9.4f} "
+              f"{row['max_abs_score_delta']:>8.4f} {row['risk_level_agreement']:>6.2f} "
+              f"{row['latency_p50_ms']:>7.2f} {row['latency_p99_ms']:>7.2f}")
+    print(f"\nReport written to {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())